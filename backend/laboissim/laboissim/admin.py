@@ -1,8 +1,10 @@
 # admin.py
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.forms import UserChangeForm
 from django.contrib.auth.models import User
-from .models import UserProfile, SiteContent, UserFile, Publication, Project, ProjectDocument
+from .models import UserProfile, SiteContent, UserFile, Publication, Project, ProjectDocument, get_user_by_email
 
 # Define an inline admin descriptor for UserProfile model
 class UserProfileInline(admin.StackedInline):
@@ -10,8 +12,17 @@ class UserProfileInline(admin.StackedInline):
     can_delete = False
     verbose_name_plural = 'Profile'
 
+class UniqueEmailUserChangeForm(UserChangeForm):
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        owner = get_user_by_email(email)
+        if owner is not None and owner.pk != self.instance.pk:
+            raise forms.ValidationError("Cette adresse email est déjà utilisée par un autre compte.")
+        return email
+
 # Define a new User admin
 class UserAdmin(BaseUserAdmin):
+    form = UniqueEmailUserChangeForm
     inlines = (UserProfileInline,)
 
 # Re-register UserAdmin
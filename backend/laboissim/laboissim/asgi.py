@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'laboissim.settings')
+# Read views with an async implementation are served natively (see async_views.py)
+os.environ.setdefault('LABOISSIM_ASYNC_READS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,228 @@
+"""Async read views for the busiest public endpoints, served natively under ASGI.
+
+Each AsyncReadView wraps the sync DRF view of a route. It answers the common
+GET itself with the async ORM, reusing the sync view's queryset, permissions,
+content negotiation, pagination and read plan, so an ASGI worker serves many
+such requests at once without a thread each. Everything else goes to the sync
+view unchanged: other methods, session-authenticated callers, the browsable
+API, errors, and query parameters only the sync view handles (event calendar
+windows). Responses match the sync view: same body, ETag, Last-Modified, Link,
+Allow and Vary headers.
+
+The wrappers are installed by async_reads() when settings.ASYNC_READ_VIEWS is
+on, which asgi.py does. Under WSGI an async view would run on a fresh event
+loop per request and only cost time.
+"""
+from calendar import timegm
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import ForcedAuthentication, Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .auth_backend import CachedJWTAuthentication
+from .conditional import ConditionalGetMixin, apply_validators, compute_validators
+from .db_router import ReplicaReadMixin, ais_sticky, changed_recently, replica_aliases, set_read_intent
+from .event_views import EVENT_LIST_READ_PLAN
+from .models import EventRegistration
+from .publication_views import PUBLICATION_READ_PLAN
+from .versioning import aget_versions
+from .views import EXTENDED_USER_READ_PLAN, aget_site_content
+
+class AsyncReadView:
+    """Serve GET on a sync DRF view natively, handing everything else to it.
+
+    Subclasses implement get(view), returning a Response or None to let the
+    sync view answer. ``view`` is a fresh instance of the sync view's class
+    set up as DRF's dispatch() would, with request.user authenticated.
+    """
+    # Read by CsrfViewMiddleware, like on the DRF view it wraps
+    csrf_exempt = True
+
+    def __init__(self, sync_view):
+        self.sync_view = sync_view
+        # What as_view() sets on its views, read by the browsable API
+        self.cls = sync_view.cls
+        self.initkwargs = sync_view.initkwargs
+        self.actions = getattr(sync_view, 'actions', None) or {}
+        self.run_sync = sync_to_async(sync_view)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request, *args, **kwargs):
+        if request.method == 'GET':
+            # The lazy user of AuthenticationMiddleware, which DRF replaces
+            user = request.__dict__.get('user')
+            response = await self.serve(request)
+            if response is not None:
+                return response
+            if user is not None:
+                request.user = user
+        set_read_intent(False)
+        return await self.run_sync(request, *args, **kwargs)
+
+    def make_view(self):
+        view = self.cls(**self.initkwargs)
+        if self.actions:
+            view.action_map = self.actions
+            for method, action in self.actions.items():
+                setattr(view, method, getattr(view, action))
+            view.action = self.actions.get('get')
+        # As View.setup() and ViewSetMixin.as_view() do
+        if hasattr(view, 'get') and not hasattr(view, 'head'):
+            view.head = view.get
+        view.args, view.kwargs = (), {}
+        view.format_kwarg = None
+        view.headers = view.default_response_headers
+        return view
+
+    async def serve(self, django_request):
+        view = self.make_view()
+        try:
+            credentials = await self.authenticate(view, django_request)
+            if credentials is None:
+                return None
+            view.request = request = Request(django_request, authenticators=[ForcedAuthentication(*credentials)])
+            if not all(permission.has_permission(request, view) for permission in view.get_permissions()):
+                # The sync view answers 401 or 403
+                return None
+            renderer, media_type = view.get_content_negotiator().select_renderer(request, view.get_renderers())
+            if not isinstance(renderer, JSONRenderer):
+                return None
+            request.accepted_renderer, request.accepted_media_type = renderer, media_type
+
+            validators = await self.get_validators(view, request)
+            response = None
+            if validators is not None:
+                etag, last_modified = validators
+                response = get_conditional_response(django_request, etag=etag, last_modified=last_modified)
+            if response is None:
+                await self.set_read_intent(view, request, validators)
+                response = await self.get(view)
+                if response is None:
+                    return None
+        except APIException:
+            # Validation and authentication errors are answered by the sync view
+            return None
+
+        if isinstance(response, Response):
+            response.accepted_renderer = renderer
+            response.accepted_media_type = media_type
+            response.renderer_context = {'view': view, 'args': (), 'kwargs': {}, 'request': request}
+            response.render()
+        # What APIView.finalize_response() adds
+        vary = view.headers.pop('Vary', None)
+        if vary is not None:
+            patch_vary_headers(response, [vary])
+        for key, value in view.headers.items():
+            response[key] = value
+        return self.finalize(response, validators)
+
+    async def authenticate(self, view, request):
+        """(user, auth) like DRF's Request would find, or None if only the sync view can tell"""
+        for authenticator in view.get_authenticators():
+            if isinstance(authenticator, CachedJWTAuthentication):
+                credentials = await authenticator.aauthenticate(request)
+            elif isinstance(authenticator, SessionAuthentication):
+                # Sessions load the user synchronously
+                if settings.SESSION_COOKIE_NAME in request.COOKIES:
+                    return None
+                credentials = None
+            else:
+                return None
+            if credentials is not None:
+                return credentials
+        return api_settings.UNAUTHENTICATED_USER(), None
+
+    async def get_validators(self, view, request):
+        """(etag, last_modified timestamp) as ConditionalGetMixin computes them, or None"""
+        if not isinstance(view, ConditionalGetMixin):
+            return None
+        versions = await aget_versions(view.get_version_names())
+        return compute_validators(
+            request, request.user, request.accepted_renderer.format, versions, view.get_time_slice(request)
+        )
+
+    async def set_read_intent(self, view, request, validators):
+        # As ReplicaReadMixin.initial(); only replica actions are served here
+        if isinstance(view, ReplicaReadMixin):
+            set_read_intent(
+                bool(replica_aliases())
+                and not await ais_sticky(request.user)
+                and not changed_recently(validators)
+            )
+
+    def finalize(self, response, validators):
+        return apply_validators(response, validators)
+
+    async def get(self, view):
+        raise NotImplementedError
+
+class AsyncPublicationList(AsyncReadView):
+    """PublicationViewSet.list"""
+    async def get(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        context = view.get_serializer_context()
+        rows = await view.paginator.apaginate_queryset(
+            PUBLICATION_READ_PLAN.values(queryset, context, view.paginator.get_ordering(queryset)), view.request, view=view
+        )
+        return view.paginator.get_paginated_response(await PUBLICATION_READ_PLAN.arender(rows, context))
+
+class AsyncEventList(AsyncReadView):
+    """EventViewSet.list, for the paginated list; upcoming and calendar windows expand series synchronously"""
+    async def get(self, view):
+        request = view.request
+        params = request.query_params
+        if params.get('upcoming') or (params.get('start') and params.get('end')):
+            return None
+        queryset = view.filter_queryset(view.get_queryset())
+        context = view.get_serializer_context()
+        events = await view.paginator.apaginate_queryset(
+            EVENT_LIST_READ_PLAN.values(queryset, context, view.paginator.get_ordering(queryset)), request, view=view
+        )
+        context['user_registrations'] = {}
+        if request.user.is_authenticated:
+            registrations = EventRegistration.objects.filter(
+                user=request.user, event_id__in={event['pk'] for event in events}
+            ).select_related('occurrence')
+            context['user_registrations'] = {
+                (registration.event_id, registration.occurrence.original_start if registration.occurrence_id else None): registration
+                async for registration in registrations
+            }
+        return view.paginator.get_paginated_response(await EVENT_LIST_READ_PLAN.arender(events, context))
+
+class AsyncTeamMembers(AsyncReadView):
+    """TeamMembersView"""
+    async def get(self, view):
+        return Response(await EXTENDED_USER_READ_PLAN.aserialize(User.objects.filter(is_active=True)))
+
+class AsyncSiteContent(AsyncReadView):
+    """SiteContentView.get, with the validators of its condition() decorator"""
+    async def get_validators(self, view, request):
+        (version, last_modified), = await aget_versions(['site_content'])
+        return quote_etag(f'site-content-{version}'), timegm(last_modified.utctimetuple())
+
+    async def get(self, view):
+        data, _, _ = await aget_site_content()
+        response = Response(data)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def finalize(self, response, validators):
+        etag, last_modified = validators
+        if not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(last_modified)
+        response.headers.setdefault('ETag', etag)
+        return response
+
+def async_reads(view_class, sync_view):
+    """The async view for a route under ASGI (settings.ASYNC_READ_VIEWS), else the sync view"""
+    if not settings.ASYNC_READ_VIEWS:
+        return sync_view
+    return view_class(sync_view)
@@ -1,15 +1,125 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .models import get_user_by_email
+from .versioning import aget_user_version, get_user_version
 
 UserModel = get_user_model()
 
 class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
         email = kwargs.get('email', username)
-        try:
-            user = UserModel.objects.get(email=email)
-        except UserModel.DoesNotExist:
+        user = get_user_by_email(email)
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            UserModel().set_password(password)
             return None
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
-        return None 
\ No newline at end of file
+        return None
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication loading the user and profile in one query.
+
+    Users are kept in process memory for AUTH_USER_CACHE_TTL seconds (0 disables
+    it). Each hit is checked against the user's version in the shared cache, so
+    a ban or role change applies on the next request in every worker.
+    aauthenticate() is the same for async views.
+    """
+    max_entries = 1024
+    _users = OrderedDict()
+    _lock = threading.Lock()
+
+    def get_user(self, validated_token):
+        return self.check_user(validated_token, self.load_user(self.get_user_id(validated_token)))
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = self.check_user(validated_token, await self.aload_user(self.get_user_id(validated_token)))
+        return user, validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def check_user(self, validated_token, user):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+    def load_user(self, user_id):
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+        if not ttl:
+            return self.fetch_user(user_id)
+
+        version = get_user_version(user_id)
+        user = self.cached_user(user_id, version)
+        if user is None:
+            user = self.fetch_user(user_id)
+            self.remember_user(user_id, version, user, ttl)
+        return user
+
+    async def aload_user(self, user_id):
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+        if not ttl:
+            return await self.afetch_user(user_id)
+
+        version = await aget_user_version(user_id)
+        user = self.cached_user(user_id, version)
+        if user is None:
+            user = await self.afetch_user(user_id)
+            self.remember_user(user_id, version, user, ttl)
+        return user
+
+    def cached_user(self, user_id, version):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] > time.monotonic() and entry[1] == version:
+                self._users.move_to_end(user_id)
+                # Views may modify request.user, so never hand out the cached instance
+                return copy.deepcopy(entry[2])
+        return None
+
+    def remember_user(self, user_id, version, user, ttl):
+        if user is None:
+            return
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + ttl, version, copy.deepcopy(user))
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    def user_queryset(self, user_id):
+        return self.user_model.objects.select_related('profile').filter(**{api_settings.USER_ID_FIELD: user_id})
+
+    def fetch_user(self, user_id):
+        return self.user_queryset(user_id).first()
+
+    async def afetch_user(self, user_id):
+        return await self.user_queryset(user_id).afirst()
@@ -0,0 +1,161 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from io import BytesIO
+from urllib.parse import urlsplit
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .db_router import set_read_intent
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Request headers a sub-request may set; everything else comes from the batch request
+BATCH_REQUEST_HEADERS = ('If-None-Match', 'If-Modified-Since', 'Accept-Language')
+BATCH_RESPONSE_HEADERS = ('ETag', 'Last-Modified', 'Link', 'X-Next-Cursor', 'Location')
+
+class BatchRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS, default='GET')
+    path = serializers.CharField()
+    headers = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
+    body = serializers.JSONField(required=False, default=None)
+
+    def validate_path(self, value):
+        parts = urlsplit(value)
+        if parts.scheme or parts.netloc or not parts.path.startswith('/api/') or parts.path.startswith('/api/batch/'):
+            raise serializers.ValidationError('Chemin non autorisé')
+        return value
+
+    def validate_headers(self, value):
+        allowed = {name.lower() for name in BATCH_REQUEST_HEADERS}
+        unknown = [name for name in value if name.lower() not in allowed]
+        if unknown:
+            raise serializers.ValidationError(f"En-têtes non autorisés : {', '.join(unknown)}")
+        return value
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(f'{BATCH_MAX_REQUESTS} requêtes au plus')
+        return value
+
+def _can_run_concurrently():
+    # Threads get their own connections: they would not see an open transaction,
+    # and every connection to an in-memory SQLite database is a new database
+    if any(conn.in_atomic_block for conn in connections.all(initialized_only=True)):
+        return False
+    return not getattr(connection, 'is_in_memory_db', lambda: False)()
+
+class BatchView(APIView):
+    """Run several API requests in one round trip, for pages that load many collections at once.
+
+    POST {"requests": [{"method": "GET", "path": "/api/...", "headers": {...}, "body": {...}}]}
+    returns {"responses": [{"status": 200, "headers": {...}, "body": ...}]} in
+    the same order. The batch is authenticated once and every sub-request runs
+    as that user, with the permissions of its own endpoint. Consecutive GETs
+    run concurrently; other methods run one at a time, in order, so a read
+    listed after a write sees it. Only JSON endpoints can be batched: file
+    downloads and exports answer 406.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['requests']
+
+        results = [None] * len(items)
+        concurrent = _can_run_concurrently()
+        reads = []
+        for index, item in enumerate(items):
+            if item['method'] == 'GET' and concurrent:
+                reads.append(index)
+                continue
+            self.run_reads(request, items, reads, results)
+            reads = []
+            results[index] = self.run(request, item)
+        self.run_reads(request, items, reads, results)
+        return Response({'responses': results})
+
+    def run_reads(self, request, items, indexes, results):
+        if len(indexes) < 2:
+            for index in indexes:
+                results[index] = self.run(request, items[index])
+            return
+        # Each thread runs in a copy of this request's context, so database routing knows about earlier writes
+        contexts = {index: copy_context() for index in indexes}
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(indexes))) as executor:
+            for index, result in zip(indexes, executor.map(lambda index: contexts[index].run(self.run_in_thread, request, items[index]), indexes)):
+                results[index] = result
+
+    def run_in_thread(self, request, item):
+        try:
+            return self.run(request, item)
+        finally:
+            connections.close_all()
+
+    def run(self, request, item):
+        parts = urlsplit(item['path'])
+        try:
+            match = resolve(parts.path)
+        except Resolver404:
+            return {'status': status.HTTP_404_NOT_FOUND, 'headers': {}, 'body': {'error': 'Introuvable'}}
+        # Sub-requests run synchronously, so async views hand over the sync view they wrap
+        view = getattr(match.func, 'sync_view', match.func)
+        if not issubclass(getattr(view, 'cls', object), APIView):
+            return {'status': status.HTTP_406_NOT_ACCEPTABLE, 'headers': {}, 'body': {'error': 'Point d\'accès non disponible en lot'}}
+
+        # The previous sub-request may have been a read-only one
+        set_read_intent(False)
+        try:
+            response = view(self.sub_request(request, item, parts), *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Batch sub-request %s %s failed', item['method'], item['path'])
+            return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'headers': {}, 'body': {'error': 'Erreur interne'}}
+        headers = {name: response[name] for name in BATCH_RESPONSE_HEADERS if response.has_header(name)}
+        if isinstance(response, Response):
+            # The batch response is rendered once, as a whole
+            body = response.data
+        elif response.status_code == status.HTTP_304_NOT_MODIFIED:
+            body = None
+        elif response.streaming or not response.get('Content-Type', '').startswith('application/json'):
+            return {'status': status.HTTP_406_NOT_ACCEPTABLE, 'headers': {}, 'body': {'error': 'Réponse non JSON'}}
+        else:
+            body = json.loads(response.content) if response.content else None
+        return {'status': response.status_code, 'headers': headers, 'body': body}
+
+    def sub_request(self, request, item, parts):
+        body = b'' if item['body'] is None else json.dumps(item['body']).encode()
+        environ = {
+            key: value for key, value in request.META.items()
+            if isinstance(value, str) and key not in ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+        }
+        environ.update({
+            'REQUEST_METHOD': item['method'],
+            'PATH_INFO': parts.path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': parts.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': BytesIO(body),
+            'wsgi.url_scheme': request.scheme,
+        })
+        for name, value in item['headers'].items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        sub_request = WSGIRequest(environ)
+        if request.user.is_authenticated:
+            # Authenticated once for the whole batch (see rest_framework.request.Request)
+            sub_request._force_auth_user = request.user
+            sub_request._force_auth_token = request.auth
+        return sub_request
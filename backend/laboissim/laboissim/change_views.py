@@ -0,0 +1,151 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import NotAuthenticated, NotFound
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import ChangeLogEntry, Event, EventRegistration, InternalMessage, Project, Publication, UserFile
+from .pagination import decode_cursor, encode_cursor
+from .event_views import EVENT_LIST_READ_PLAN
+from .file_views import UserFileSerializer
+from .message_views import INTERNAL_MESSAGE_READ_PLAN
+from .publication_views import PUBLICATION_READ_PLAN
+from .views import ProjectSerializer
+
+CHANGE_FEED_PAGE_SIZE = 500
+# Entries younger than this are not served yet. They are inserted after their
+# transaction commits (see record_changes), each in its own short insert, but
+# concurrent inserts may still commit out of id order
+CHANGE_FEED_SETTLE = timedelta(seconds=5)
+
+def _visible_files(request):
+    return UserFile.objects.select_related('uploaded_by')
+
+def _render_files(queryset, context):
+    files = list(queryset)
+    return dict(zip([file.pk for file in files], UserFileSerializer(files, many=True, context=context).data))
+
+def _visible_publications(request):
+    return Publication.objects.all()
+
+def _render_publications(queryset, context):
+    rows = list(PUBLICATION_READ_PLAN.values(queryset, context))
+    return dict(zip([row['pk'] for row in rows], PUBLICATION_READ_PLAN.render(rows, context)))
+
+def _visible_events(request):
+    # Same rule as EventViewSet.get_queryset
+    queryset = Event.objects.all()
+    if not request.user.is_staff:
+        queryset = queryset.filter(is_active=True)
+    return queryset
+
+def _render_events(queryset, context):
+    rows = list(EVENT_LIST_READ_PLAN.values(queryset, context))
+    context['user_registrations'] = {}
+    request = context['request']
+    if request.user.is_authenticated:
+        registrations = EventRegistration.objects.filter(
+            user=request.user, event_id__in=[row['pk'] for row in rows]
+        ).select_related('occurrence')
+        context['user_registrations'] = {
+            (registration.event_id, registration.occurrence.original_start if registration.occurrence_id else None): registration
+            for registration in registrations
+        }
+    return dict(zip([row['pk'] for row in rows], EVENT_LIST_READ_PLAN.render(rows, context)))
+
+def _visible_projects(request):
+    return Project.objects.filter(Q(created_by=request.user) | Q(team_members=request.user)).distinct()
+
+def _render_projects(queryset, context):
+    projects = list(queryset.select_related('created_by').prefetch_related('team_members', 'documents'))
+    return dict(zip([project.pk for project in projects], ProjectSerializer(projects, many=True, context=context).data))
+
+def _visible_messages(request):
+    return InternalMessage.objects.filter(Q(sender=request.user) | Q(receiver=request.user))
+
+def _render_messages(queryset, context):
+    rows = list(INTERNAL_MESSAGE_READ_PLAN.values(queryset, context))
+    return dict(zip([row['pk'] for row in rows], INTERNAL_MESSAGE_READ_PLAN.render(rows, context)))
+
+# name: (readable without login, visible queryset for the caller, renderer returning {pk: object})
+CHANGE_FEED_SOURCES = {
+    'files': (False, _visible_files, _render_files),
+    'publications': (True, _visible_publications, _render_publications),
+    'events': (True, _visible_events, _render_events),
+    'projects': (False, _visible_projects, _render_projects),
+    'messages': (False, _visible_messages, _render_messages),
+}
+
+class ChangeFeedView(APIView):
+    """What changed in a collection since a cursor, for clients keeping a local copy.
+
+    Without a cursor the response only holds the current cursor: load the
+    collection from its list endpoint, then poll with ?cursor=. Each change
+    carries the object as the list endpoint renders it (?fields= and
+    ?exclude= apply), or null with action "deleted" when the object is gone
+    or no longer visible to the caller. Cursors older than
+    CHANGE_LOG_RETENTION_DAYS get 410 Gone: the log they point into was
+    compacted, reload the collection.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, collection):
+        try:
+            public, visible, render = CHANGE_FEED_SOURCES[collection]
+        except KeyError:
+            raise NotFound('Collection inconnue')
+        if not public and not request.user.is_authenticated:
+            raise NotAuthenticated()
+
+        now = timezone.now()
+        settled = now - CHANGE_FEED_SETTLE
+        entries = ChangeLogEntry.objects.filter(collection=collection)
+        if request.user.is_authenticated:
+            entries = entries.filter(Q(recipient_id__isnull=True) | Q(recipient_id=request.user.pk))
+        else:
+            entries = entries.filter(recipient_id__isnull=True)
+
+        cursor = request.query_params.get('cursor')
+        if not cursor:
+            last_id = ChangeLogEntry.objects.filter(collection=collection, created_at__lte=settled).order_by('-id').values_list('id', flat=True).first() or 0
+            return Response({'collection': collection, 'cursor': encode_cursor([last_id, now.timestamp()]), 'has_more': False, 'changes': []})
+
+        last_id, issued_at = decode_cursor(cursor, 2)
+        if not isinstance(last_id, int) or not isinstance(issued_at, (int, float)):
+            raise serializers.ValidationError({'cursor': 'Curseur invalide'})
+        if issued_at < (now - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS) + CHANGE_FEED_SETTLE).timestamp():
+            return Response(
+                {'error': 'Curseur expiré, rechargez la collection'},
+                status=status.HTTP_410_GONE,
+            )
+
+        rows = list(entries.filter(id__gt=last_id).order_by('id').values_list('id', 'object_id', 'action', 'created_at')[:CHANGE_FEED_PAGE_SIZE + 1])
+        has_more = len(rows) > CHANGE_FEED_PAGE_SIZE
+        latest = {}
+        for entry_id, object_id, action, created_at in rows[:CHANGE_FEED_PAGE_SIZE]:
+            if created_at > settled:
+                has_more = False
+                break
+            # One change per object, at the position of its latest entry
+            latest.pop(object_id, None)
+            latest[object_id] = action
+            last_id = entry_id
+
+        present = [object_id for object_id, action in latest.items() if action != 'deleted']
+        objects = render(visible(request).filter(pk__in=present), {'request': request}) if present else {}
+        changes = []
+        for object_id, action in latest.items():
+            item = objects.get(object_id)
+            if item is None:
+                changes.append({'id': object_id, 'action': 'deleted', 'object': None})
+            else:
+                changes.append({'id': object_id, 'action': action, 'object': item})
+        return Response({
+            'collection': collection,
+            'cursor': encode_cursor([last_id, now.timestamp()]),
+            'has_more': has_more,
+            'changes': changes,
+        })
@@ -0,0 +1,97 @@
+"""Conditional GETs for viewsets, driven by the version counters of versioning.py.
+
+Collections change only when one of their versions is bumped, so a response
+can be identified by those versions plus everything else it depends on: the
+path, the query string, the caller and the negotiated format. A client
+sending that ETag back in If-None-Match gets 304 Not Modified before any
+queryset is built.
+
+Responses computed relative to the current time (the next N events) also
+depend on when they were built: such views return a time slice from
+get_time_slice(), which goes into the ETag, and send no Last-Modified since
+the collections' last change says nothing about them.
+"""
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .versioning import get_versions, model_version_name
+
+def compute_validators(request, user, renderer_format, versions, time_slice=None):
+    """(etag, last_modified timestamp) of a response built from collections at versions"""
+    parts = [
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        f'{user.pk}:{int(user.is_staff)}' if user.is_authenticated else '-',
+        renderer_format,
+        *(str(version) for version, _ in versions),
+    ]
+    if time_slice is not None:
+        parts.append(f'@{time_slice}')
+    key = '\n'.join(parts)
+    etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+    if time_slice is not None:
+        return etag, None
+    last_modified = max((modified for _, modified in versions), default=None)
+    return etag, timegm(last_modified.utctimetuple()) if last_modified else None
+
+def apply_validators(response, validators):
+    """Set the ETag, Last-Modified and caching headers of a conditional response"""
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = validators
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    if response.status_code == 200:
+        # Always revalidate: the check is a cache read, and writers see their changes at once
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
+
+class ConditionalGetMixin:
+    """Answer unchanged GET requests with 304 Not Modified.
+
+    version_names lists the collections the responses are built from: model
+    classes (their model version) or collection names such as 'events' or
+    'team'. On viewsets only conditional_actions are covered; on plain
+    APIViews every GET is.
+    """
+    version_names = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version_names(self):
+        return [
+            name if isinstance(name, str) else model_version_name(name)
+            for name in self.version_names
+        ]
+
+    def get_time_slice(self, request):
+        """Period of time the response to this request holds for, None if it does not depend on the time"""
+        return None
+
+    def get_validators(self, request):
+        """(etag, last_modified timestamp) of the response to this request"""
+        versions = get_versions(self.get_version_names())
+        return compute_validators(
+            request, request.user, request.accepted_renderer.format, versions, self.get_time_slice(request)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        # Runs after authentication and permission checks, before the handler
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        action = getattr(self, 'action', None)
+        if request.method not in ('GET', 'HEAD') or (action is not None and action not in self.conditional_actions):
+            return
+        self.conditional_validators = etag, last_modified = self.get_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            # dispatch() looks the handler up after initial(), so no queryset is ever built
+            setattr(self, request.method.lower(), lambda *args, **kwargs: not_modified)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return apply_validators(response, getattr(self, 'conditional_validators', None))
@@ -0,0 +1,134 @@
+"""Send the reads of safe API actions to read replicas.
+
+The primary ('default') takes every write and every read by default. A view
+marks its request as read-only with set_read_intent(True), which
+ReplicaReadMixin does for safe actions; the reads that follow go to one of
+settings.DATABASE_REPLICAS. Replicas lag behind the primary, so reads stay on
+the primary when:
+
+- the request already wrote, or runs inside a transaction on the primary;
+- the caller wrote less than REPLICA_STICKY_SECONDS ago (read-your-writes),
+  which ReplicaRoutingMiddleware records in the cache;
+- the collection read changed less than REPLICA_STICKY_SECONDS ago, so a
+  fresh ETag is never paired with a stale body (see conditional.py).
+
+With no replicas configured everything goes to the primary, as before.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_read_intent = ContextVar('read_intent', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+def set_read_intent(value):
+    """Mark the current request as read-only (True) or not (False)"""
+    _read_intent.set(value)
+
+def reset_routing(**kwargs):
+    """Start a new request: no read intent, no write yet"""
+    _read_intent.set(False)
+    _wrote.set(False)
+
+# Sent once the response is closed, after a streamed body (exports) has been read
+request_finished.connect(reset_routing)
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+def _sticky_key(user_id):
+    return f'primary-sticky:{user_id}'
+
+def is_sticky(user):
+    return user.is_authenticated and cache.get(_sticky_key(user.pk)) is not None
+
+async def ais_sticky(user):
+    return user.is_authenticated and await cache.aget(_sticky_key(user.pk)) is not None
+
+def changed_recently(validators):
+    """Whether the collections behind conditional validators changed too recently for a replica"""
+    last_modified = validators[1] if validators else None
+    return last_modified is not None and time.time() - last_modified < settings.REPLICA_STICKY_SECONDS
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or not _read_intent.get() or _wrote.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in replica_aliases():
+            return False
+        return None
+
+class ReplicaRoutingMiddleware:
+    """Reset the routing state per request and make writers read from the primary for a while"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        reset_routing()
+        response = self.get_response(request)
+        if self.made_sticky(request):
+            cache.set(_sticky_key(request.user.pk), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        reset_routing()
+        # Sync views run in a thread with a copy of this context, and their writes are copied back
+        response = await self.get_response(request)
+        if self.made_sticky(request):
+            await cache.aset(_sticky_key(request.user.pk), True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def made_sticky(self, request):
+        # DRF sets the user it authenticated on the Django request too
+        user = getattr(request, 'user', None)
+        return _wrote.get() and user is not None and user.is_authenticated and bool(replica_aliases())
+
+class ReplicaReadMixin:
+    """Read from a replica for safe requests to replica_actions.
+
+    On viewsets only replica_actions are covered; on plain APIViews every GET
+    is. Put it before ConditionalGetMixin, whose validators it reads.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication reads the user from the primary, before the intent is set
+        super().initial(request, *args, **kwargs)
+        action = getattr(self, 'action', None)
+        set_read_intent(
+            bool(replica_aliases())
+            and request.method in SAFE_METHODS
+            and (action is None or action in self.replica_actions)
+            and not is_sticky(request.user)
+            and not changed_recently(getattr(self, 'conditional_validators', None))
+        )
@@ -0,0 +1,138 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import serializers, status
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .db_router import ReplicaReadMixin
+from .event_views import parse_boundary
+from .pagination import keyset_page
+from .views import EXTENDED_USER_READ_PLAN
+from .versioning import get_version
+
+DIRECTORY_CACHE_TIMEOUT = 60 * 60
+DIRECTORY_MAX_AGE = 60
+DIRECTORY_PAGE_SIZE = 24
+DIRECTORY_MAX_PAGE_SIZE = 100
+ADMIN_USER_FIELDS = [
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_staff',
+    'is_superuser', 'is_active', 'date_joined', 'last_login',
+]
+# Sort keys accepted by the admin directory; id is appended as the tie-breaker
+ADMIN_USER_ORDERINGS = ['username', 'email', 'first_name', 'last_name', 'date_joined']
+
+def _page_params(request):
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = int(request.query_params.get('page_size', DIRECTORY_PAGE_SIZE))
+    except ValueError:
+        raise serializers.ValidationError({'page': 'Nombre invalide'})
+    return page, min(max(page_size, 1), DIRECTORY_MAX_PAGE_SIZE)
+
+def _parse_bool(value, name):
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise serializers.ValidationError({name: 'Valeur booléenne invalide'})
+
+def _directory_etag(request, *args, **kwargs):
+    return f"team-{get_version('team')[0]}"
+
+def _directory_last_modified(request, *args, **kwargs):
+    return get_version('team')[1]
+
+class TeamDirectoryView(APIView):
+    """Public, paginated team directory cached per version of the 'team' collection.
+
+    Query parameters: role, institution, page, page_size.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @method_decorator(condition(etag_func=_directory_etag, last_modified_func=_directory_last_modified))
+    def get(self, request):
+        role = request.query_params.get('role', '')
+        institution = request.query_params.get('institution', '')
+        page, page_size = _page_params(request)
+
+        version = get_version('team')[0]
+        cache_key = f'team:directory:{version}:{role}:{institution.lower()}:{page}:{page_size}'
+        data = cache.get(cache_key)
+        if data is None:
+            users = User.objects.filter(is_active=True)
+            if role:
+                users = users.filter(profile__role=role)
+            if institution:
+                users = users.filter(profile__institution__iexact=institution)
+            users = users.order_by('last_name', 'first_name', 'id')
+
+            offset = (page - 1) * page_size
+            data = {
+                'count': users.count(),
+                'page': page,
+                'page_size': page_size,
+                'results': EXTENDED_USER_READ_PLAN.serialize(users[offset:offset + page_size]),
+            }
+            cache.set(cache_key, data, DIRECTORY_CACHE_TIMEOUT)
+
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=DIRECTORY_MAX_AGE)
+        return response
+
+class AdminUsersView(ReplicaReadMixin, APIView):
+    """Admin user directory, filtered, searched, sorted and paginated in the database.
+
+    Query parameters:
+    role, is_active, is_staff: exact filters
+    joined_after/joined_before: date_joined range [after, before), ISO date or datetime
+    search: whitespace separated terms, each matching the start of the
+        username, email, first or last name
+    ordering: one of ADMIN_USER_ORDERINGS, prefixed with '-' for descending
+    cursor/page_size: keyset pagination, next_cursor is null on the last page
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        users = User.objects.all()
+
+        if params.get('role'):
+            if params['role'] == 'member':
+                # Users created before profiles existed count as members
+                users = users.filter(Q(profile__role='member') | Q(profile__isnull=True))
+            else:
+                users = users.filter(profile__role=params['role'])
+        for name in ('is_active', 'is_staff'):
+            if params.get(name):
+                users = users.filter(**{name: _parse_bool(params[name], name)})
+        if params.get('joined_after'):
+            users = users.filter(date_joined__gte=parse_boundary(params['joined_after'], 'joined_after'))
+        if params.get('joined_before'):
+            users = users.filter(date_joined__lt=parse_boundary(params['joined_before'], 'joined_before'))
+        for term in params.get('search', '').split():
+            # Prefix matches can use the column indexes, unlike infix LIKE
+            users = users.filter(
+                Q(username__istartswith=term) | Q(email__istartswith=term)
+                | Q(first_name__istartswith=term) | Q(last_name__istartswith=term)
+            )
+
+        ordering = params.get('ordering', 'username')
+        if ordering.lstrip('-') not in ADMIN_USER_ORDERINGS:
+            return Response({'error': 'Tri non supporté'}, status=status.HTTP_400_BAD_REQUEST)
+        descending = ordering.startswith('-')
+        ordering = [ordering, '-id' if descending else 'id']
+
+        try:
+            page_size = min(max(int(params.get('page_size', 50)), 1), DIRECTORY_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'page_size invalide'}, status=status.HTTP_400_BAD_REQUEST)
+
+        users = users.values(*ADMIN_USER_FIELDS, role=Coalesce(F('profile__role'), Value('member')))
+        results, next_cursor = keyset_page(users, ordering, params.get('cursor'), page_size)
+        return Response({'next_cursor': next_cursor, 'results': results})
@@ -1,19 +1,82 @@
 from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+import csv
+import heapq
+import tempfile
+from datetime import datetime, time
+from itertools import islice
+from operator import attrgetter
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
 from django.db.models import Q
-from .models import Event, EventRegistration
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Event, EventOccurrence, EventRegistration, occurrence_overrides, record_changes
+from .recurrence import RecurrenceRule
+from .fieldsets import SparseFieldsetMixin, SparseQuerysetMixin
+from .conditional import ConditionalGetMixin
+from .db_router import ReplicaReadMixin
+from .read_serializers import Computed, ReadPlan
+from .versioning import bump_model_version, bump_version
 from django.contrib.auth.models import User
 
-class EventRegistrationSerializer(serializers.ModelSerializer):
+def reserve_seat(event_id, user, notes='', occurrence_start=None):
+    """Register a user for an event, waitlisting them when it is full.
+
+    Recurring events take the registration on the occurrence starting at
+    occurrence_start, each occurrence having its own seats.
+    Returns None if the user already has a registration for the event or occurrence.
+    """
+    with transaction.atomic():
+        # Lock the event row so concurrent registrations are serialized per event
+        event = Event.objects.select_for_update().get(pk=event_id)
+        occurrence = None
+        if event.is_recurring:
+            if occurrence_start is None:
+                raise serializers.ValidationError({'occurrence_start': 'Requis pour un événement récurrent'})
+            occurrence = event.get_occurrence(occurrence_start)
+            if occurrence is None or occurrence.cancelled:
+                raise serializers.ValidationError({'occurrence_start': 'Occurrence introuvable'})
+        holder = occurrence or event
+        if holder.seat_registrations().filter(user=user).exists():
+            return None
+        return EventRegistration.objects.create(
+            event=event,
+            occurrence=occurrence,
+            user=user,
+            notes=notes,
+            status='waitlisted' if holder.is_full else 'pending'
+        )
+
+def set_registration_status(event, holder, registrations, new_status):
+    """Change the status of some of holder's registrations, seats permitting (see
+    SeatHolderMixin.change_status). The caller holds the lock of event, as reserve_seat() does."""
+    updated = holder.change_status(registrations, new_status)
+    if updated:
+        bump_version('events')
+        bump_model_version(EventRegistration)
+        record_changes('events', [event.pk], 'updated')
+    return updated
+
+def release_seat(registration):
+    """Delete a registration and promote the waitlist into the freed seat"""
+    with transaction.atomic():
+        event = Event.objects.select_for_update().get(pk=registration.event_id)
+        holder = registration.occurrence if registration.occurrence_id else event
+        registration.delete()
+        holder.promote_waitlist()
+
+class EventRegistrationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
     user_full_name = serializers.SerializerMethodField()
+    occurrence_start = serializers.DateTimeField(source='occurrence.original_start', read_only=True)
     
     class Meta:
         model = EventRegistration
         fields = '__all__'
-        read_only_fields = ['registration_date', 'user_name', 'user_email', 'user_full_name']
+        read_only_fields = ['registration_date', 'user_name', 'user_email', 'user_full_name', 'occurrence_start']
     
     def get_user_full_name(self, obj):
         profile = getattr(obj.user, 'profile', None)
@@ -21,7 +84,30 @@ class EventRegistrationSerializer(serializers.ModelSerializer):
             return profile.full_name
         return f"{obj.user.first_name} {obj.user.last_name}".strip() or obj.user.username
 
-class EventSerializer(serializers.ModelSerializer):
+class RegistrationUpdateSerializer(EventRegistrationSerializer):
+    """Registration as its owner may edit it: only the notes.
+    
+    Seats are taken and released by reserve_seat() and release_seat(), and
+    statuses change through the staff actions, all under the event row lock.
+    """
+    class Meta(EventRegistrationSerializer.Meta):
+        read_only_fields = EventRegistrationSerializer.Meta.read_only_fields + ['event', 'occurrence', 'user', 'status']
+
+class RecurrenceRuleMixin:
+    """Validation of recurrence_rule shared by the event serializers"""
+    def validate(self, attrs):
+        rule = attrs.get('recurrence_rule', getattr(self.instance, 'recurrence_rule', ''))
+        if rule:
+            start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+            try:
+                parsed = RecurrenceRule.parse(rule)
+                if start_date:
+                    parsed.validate_start(start_date)
+            except ValueError as exc:
+                raise serializers.ValidationError({'recurrence_rule': str(exc)})
+        return attrs
+
+class EventSerializer(RecurrenceRuleMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     registered_count = serializers.IntegerField(read_only=True)
     is_full = serializers.BooleanField(read_only=True)
@@ -31,20 +117,118 @@ class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = '__all__'
-        read_only_fields = ['created_by', 'created_by_name', 'created_at', 'updated_at', 'registered_count', 'is_full', 'user_registration']
+        read_only_fields = ['created_by', 'created_by_name', 'created_at', 'updated_at', 'recurrence_end', 'confirmed_count', 'reserved_count', 'registered_count', 'is_full', 'user_registration']
     
     def get_user_registration(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            try:
-                registration = obj.registrations.get(user=request.user)
-                return EventRegistrationSerializer(registration).data
-            except EventRegistration.DoesNotExist:
-                return None
+            registration = obj.registrations.filter(user=request.user, occurrence__isnull=True).first()
+            return EventRegistrationSerializer(registration).data if registration else None
         return None
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventOccurrenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventOccurrence
+        fields = ['id', 'original_start', 'cancelled', 'start_date', 'end_date', 'title', 'location', 'confirmed_count', 'reserved_count']
+        read_only_fields = ['original_start', 'confirmed_count', 'reserved_count']
+
+class OwnRegistrationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventRegistration
+        fields = ['id', 'status', 'registration_date']
+
+class EventListSerializer(RecurrenceRuleMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    """Compact event representation: counts and the caller's own registration, no attendee list.
+    
+    Occurrences of recurring events carry occurrence_start and their own counters.
+    """
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+    registered_count = serializers.IntegerField(read_only=True)
+    is_full = serializers.BooleanField(read_only=True)
+    occurrence_start = serializers.DateTimeField(read_only=True, default=None)
+    user_registration = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Event
+        fields = '__all__'
+        read_only_fields = EventSerializer.Meta.read_only_fields
+    
+    def get_user_registration(self, obj):
+        # The list view resolves the caller's registrations for all events in one query
+        user_registrations = self.context.get('user_registrations')
+        if user_registrations is not None:
+            registration = user_registrations.get((obj.pk, getattr(obj, 'occurrence_start', None)))
+        else:
+            request = self.context.get('request')
+            if not (request and request.user.is_authenticated):
+                return None
+            registration = obj.registrations.filter(user=request.user, occurrence__isnull=True).first()
+        return OwnRegistrationSerializer(registration).data if registration else None
+
+def _own_registration(context, event_id):
+    registration = context['user_registrations'].get((event_id, None))
+    return OwnRegistrationSerializer(registration).data if registration else None
+
+def _is_full(reserved_count, max_participants):
+    return max_participants is not None and reserved_count >= max_participants
+
+# Same output as EventListSerializer for events that are not expanded into occurrences,
+# given the caller's registrations in context['user_registrations']
+EVENT_LIST_READ_PLAN = ReadPlan(
+    EventListSerializer,
+    registered_count=Computed(['confirmed_count'], int),
+    is_full=Computed(['reserved_count', 'max_participants'], _is_full),
+    occurrence_start=Computed([], lambda: None),
+    user_registration=Computed(['pk'], _own_registration, uses_context=True),
+)
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+EXPORT_HEADER = ['ID', 'Occurrence', 'Nom d\'utilisateur', 'Nom complet', 'Email', 'Statut', 'Date d\'inscription', 'Notes']
+
+def registration_export_rows(event):
+    """Yield export rows for an event's registrations, users resolved through one join"""
+    rows = event.registrations.order_by('registration_date', 'id').values_list(
+        'id', 'occurrence__original_start', 'user__username', 'user__first_name', 'user__last_name',
+        'user__email', 'status', 'registration_date', 'notes'
+    ).iterator(chunk_size=2000)
+    for reg_id, occurrence_start, username, first_name, last_name, email, reg_status, registration_date, notes in rows:
+        full_name = f"{first_name} {last_name}".strip() or username
+        yield [
+            reg_id, occurrence_start.isoformat() if occurrence_start else '', username, full_name,
+            email, reg_status, registration_date.isoformat(), notes or ''
+        ]
+
+def parse_boundary(value, name):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise serializers.ValidationError({name: 'Date invalide'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+class EventViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = EventSerializer
+    max_upcoming = 100
+    # Seconds an ?upcoming= list is served as unchanged; events drop out of it as they end
+    upcoming_time_slice = 60
+    version_names = ('events', 'team')
+    replica_actions = ('list', 'retrieve', 'registrations', 'export_registrations')
+    # Read by the calendar expansion and the computed fields
+    sparse_required_fields = (
+        'title', 'location', 'start_date', 'end_date', 'recurrence_rule', 'recurrence_end',
+        'is_active', 'max_participants', 'confirmed_count', 'reserved_count',
+    )
     
     def get_permissions(self):
         """Allow public access for viewing events, require auth for actions"""
@@ -54,11 +238,120 @@ class EventViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
     
+    def get_serializer_class(self):
+        """Embedded registrations are only served to staff on retrieve and writes; everyone else always gets the compact representation"""
+        if self.action == 'list' or not self.request.user.is_staff:
+            return EventListSerializer
+        return EventSerializer
+    
     def get_queryset(self):
         """Return all active events for public, all events for admin"""
-        if self.request.user.is_authenticated and self.request.user.is_staff:
-            return Event.objects.all().prefetch_related('registrations', 'registrations__user', 'registrations__user__profile')
-        return Event.objects.filter(is_active=True).prefetch_related('registrations', 'registrations__user', 'registrations__user__profile')
+        queryset = Event.objects.select_related('created_by')
+        if not (self.request.user.is_authenticated and self.request.user.is_staff):
+            queryset = queryset.filter(is_active=True)
+        if self.action == 'retrieve' and self.get_serializer_class() is EventSerializer:
+            queryset = queryset.prefetch_related('registrations', 'registrations__user', 'registrations__user__profile')
+        if self.action == 'list':
+            queryset = self.filter_calendar_window(queryset)
+        return queryset
+    
+    def get_time_slice(self, request):
+        """The upcoming_time_slice an ?upcoming= list was built in; other lists only depend on the versions"""
+        if request.query_params.get('upcoming'):
+            return int(timezone.now().timestamp()) // self.upcoming_time_slice
+        return None
+    
+    def filter_calendar_window(self, queryset):
+        """Apply the calendar query parameters to the event list.
+        
+        start/end: events overlapping the window (either bound may be omitted);
+            recurring series are expanded into occurrences when both are given
+        event_type: restrict to one event type
+        is_active: true/false, staff only since others only see active events
+        upcoming=N: the next N events or occurrences that have not ended yet, soonest
+            first (applied in list())
+        """
+        params = self.request.query_params
+        
+        event_type = params.get('event_type')
+        if event_type:
+            queryset = queryset.filter(event_type=event_type)
+        
+        is_active = params.get('is_active')
+        if is_active in ('true', 'false') and self.request.user.is_staff:
+            queryset = queryset.filter(is_active=is_active == 'true')
+        
+        if params.get('start'):
+            start = parse_boundary(params['start'], 'start')
+            # A series overlaps the window until its last occurrence ends
+            queryset = queryset.filter(
+                Q(recurrence_rule='', end_date__gt=start)
+                | (~Q(recurrence_rule='') & (Q(recurrence_end__isnull=True) | Q(recurrence_end__gt=start)))
+            )
+        if params.get('end'):
+            queryset = queryset.filter(start_date__lt=parse_boundary(params['end'], 'end'))
+        return queryset
+    
+    def window_occurrences(self, events, start, end):
+        """Replace recurring series by their occurrences inside [start, end)"""
+        overrides = occurrence_overrides(events, start, end)
+        expanded = []
+        for event in events:
+            if event.is_recurring:
+                expanded.extend(event.expand(start, end, overrides.get(event.pk, ())))
+            else:
+                expanded.append(event)
+        expanded.sort(key=attrgetter('start_date'), reverse=True)
+        return expanded
+    
+    def upcoming_occurrences(self, queryset, upcoming):
+        """The next events or occurrences, merging lazily expanded series with single events"""
+        try:
+            limit = min(max(int(upcoming), 1), self.max_upcoming)
+        except ValueError:
+            raise serializers.ValidationError({'upcoming': 'Nombre invalide'})
+        now = timezone.now()
+        singles = queryset.filter(recurrence_rule='', end_date__gte=now).order_by('start_date')[:limit]
+        series = list(queryset.exclude(recurrence_rule='').filter(Q(recurrence_end__isnull=True) | Q(recurrence_end__gte=now)))
+        overrides = occurrence_overrides(series, now)
+        streams = [iter(singles)] + [event.expand(now, None, overrides.get(event.pk, ())) for event in series]
+        upcoming_events = list(islice(heapq.merge(*streams, key=attrgetter('start_date')), limit))
+        # Rescheduled occurrences may come slightly out of order from their series
+        upcoming_events.sort(key=attrgetter('start_date'))
+        return upcoming_events
+    
+    def list(self, request, *args, **kwargs):
+        """List events with the caller's registrations resolved in one query.
+        
+        Only the plain list is paginated: upcoming is already bounded, and a
+        calendar window is bounded by its dates.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        params = request.query_params
+        paginated = False
+        if params.get('upcoming'):
+            events = self.upcoming_occurrences(queryset, params['upcoming'])
+        elif params.get('start') and params.get('end'):
+            events = self.window_occurrences(list(queryset), parse_boundary(params['start'], 'start'), parse_boundary(params['end'], 'end'))
+        else:
+            # Nothing to expand: rows are rendered straight from values()
+            events = self.paginate_queryset(EVENT_LIST_READ_PLAN.values(queryset, self.get_serializer_context(), self.paginator.get_ordering(queryset)))
+            paginated = True
+        
+        context = self.get_serializer_context()
+        context['user_registrations'] = {}
+        if request.user.is_authenticated:
+            registrations = EventRegistration.objects.filter(
+                user=request.user, event_id__in={event['pk'] if paginated else event.pk for event in events}
+            ).select_related('occurrence')
+            context['user_registrations'] = {
+                (registration.event_id, registration.occurrence.original_start if registration.occurrence_id else None): registration
+                for registration in registrations
+            }
+        if paginated:
+            return self.get_paginated_response(EVENT_LIST_READ_PLAN.render(events, context))
+        serializer = self.get_serializer(events, many=True, context=context)
+        return Response(serializer.data)
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -67,22 +360,15 @@ class EventViewSet(viewsets.ModelViewSet):
     def register(self, request, pk=None):
         """Register current user for an event"""
         event = self.get_object()
-        user = request.user
-        
-        # Check if user is already registered
-        if event.registrations.filter(user=user).exists():
-            return Response({'error': 'Vous êtes déjà inscrit à cet événement'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if event is full
-        if event.is_full:
-            return Response({'error': 'Cet événement est complet'}, status=status.HTTP_400_BAD_REQUEST)
+        occurrence_start = request.data.get('occurrence_start')
+        if occurrence_start:
+            occurrence_start = parse_boundary(occurrence_start, 'occurrence_start')
         
-        # Create registration
-        registration = EventRegistration.objects.create(
-            event=event,
-            user=user,
-            notes=request.data.get('notes', '')
-        )
+        # Full events put the user on the waitlist instead of refusing them
+        registration = reserve_seat(event.pk, request.user, request.data.get('notes', ''), occurrence_start or None)
+        if registration is None:
+            return Response({'error': 'Vous êtes déjà inscrit à cet événement'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(EventRegistrationSerializer(registration).data, status=status.HTTP_201_CREATED)
     
@@ -92,12 +378,18 @@ class EventViewSet(viewsets.ModelViewSet):
         event = self.get_object()
         user = request.user
         
-        try:
-            registration = event.registrations.get(user=user)
-            registration.delete()
-            return Response({'message': 'Inscription annulée avec succès'}, status=status.HTTP_200_OK)
-        except EventRegistration.DoesNotExist:
+        registrations = event.registrations.filter(user=user)
+        if event.is_recurring:
+            occurrence_start = request.data.get('occurrence_start')
+            if not occurrence_start:
+                return Response({'error': 'occurrence_start est requis pour un événement récurrent'}, status=status.HTTP_400_BAD_REQUEST)
+            registrations = registrations.filter(occurrence__original_start=parse_boundary(occurrence_start, 'occurrence_start'))
+        
+        registration = registrations.first()
+        if registration is None:
             return Response({'error': 'Vous n\'êtes pas inscrit à cet événement'}, status=status.HTTP_400_BAD_REQUEST)
+        release_seat(registration)
+        return Response({'message': 'Inscription annulée avec succès'}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['get'])
     def registrations(self, request, pk=None):
@@ -107,7 +399,7 @@ class EventViewSet(viewsets.ModelViewSet):
         if not request.user.is_staff:
             return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
         
-        registrations = event.registrations.all().select_related('user', 'user__profile')
+        registrations = event.registrations.all().select_related('user', 'user__profile', 'occurrence')
         return Response(EventRegistrationSerializer(registrations, many=True).data)
     
     @action(detail=True, methods=['patch'])
@@ -124,21 +416,173 @@ class EventViewSet(viewsets.ModelViewSet):
         if not registration_id or not new_status:
             return Response({'error': 'registration_id et status sont requis'}, status=status.HTTP_400_BAD_REQUEST)
         
+        if new_status not in dict(EventRegistration.STATUS_CHOICES):
+            return Response({'error': 'Statut invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
-            registration = event.registrations.get(id=registration_id)
-            registration.status = new_status
-            registration.save()
+            with transaction.atomic():
+                event = Event.objects.select_for_update().get(pk=event.pk)
+                registration = event.registrations.select_related('occurrence').get(id=registration_id)
+                holder = registration.occurrence if registration.occurrence_id else event
+                if registration.status != new_status and not set_registration_status(event, holder, [registration], new_status):
+                    return Response({'error': 'Aucune place disponible'}, status=status.HTTP_400_BAD_REQUEST)
+                # A cancellation frees a seat for the next waitlisted user
+                holder.promote_waitlist()
             return Response(EventRegistrationSerializer(registration).data)
         except EventRegistration.DoesNotExist:
             return Response({'error': 'Inscription non trouvée'}, status=status.HTTP_404_NOT_FOUND)
+    
+    @action(detail=True, methods=['post'])
+    def bulk_registration_status(self, request, pk=None):
+        """Update the status of many registrations at once (admin only).
+        
+        Targets the given registration_ids and/or every registration currently in current_status.
+        Registrations moved into a seat only get one while seats are free, oldest first;
+        the others are returned in skipped.
+        """
+        event = self.get_object()
+        
+        if not request.user.is_staff:
+            return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
+        
+        new_status = request.data.get('status')
+        registration_ids = request.data.get('registration_ids')
+        current_status = request.data.get('current_status')
+        
+        if new_status not in dict(EventRegistration.STATUS_CHOICES):
+            return Response({'error': 'Statut invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        if not registration_ids and not current_status:
+            return Response({'error': 'registration_ids ou current_status est requis'}, status=status.HTTP_400_BAD_REQUEST)
+        if registration_ids is not None and not (
+            isinstance(registration_ids, list)
+            and all(isinstance(registration_id, int) and not isinstance(registration_id, bool) for registration_id in registration_ids)
+        ):
+            return Response({'error': 'registration_ids doit être une liste d\'identifiants entiers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            # The same lock as reserve_seat(), so seats are counted against concurrent registrations
+            event = Event.objects.select_for_update().get(pk=event.pk)
+            registrations = event.registrations.exclude(status=new_status).select_related('occurrence').order_by('registration_date', 'id')
+            if registration_ids:
+                registrations = registrations.filter(id__in=registration_ids)
+            if current_status:
+                registrations = registrations.filter(status=current_status)
+            by_holder = {}
+            for registration in registrations:
+                by_holder.setdefault(registration.occurrence_id, []).append(registration)
+            
+            updated, promoted = [], []
+            for occurrence_id, holder_registrations in by_holder.items():
+                holder = holder_registrations[0].occurrence if occurrence_id else event
+                updated += set_registration_status(event, holder, holder_registrations, new_status)
+                # Cancellations free seats for the waitlist
+                promoted += holder.promote_waitlist()
+        
+        updated_ids = {registration.pk for registration in updated}
+        event.refresh_from_db(fields=['confirmed_count', 'reserved_count'])
+        return Response({
+            'updated': len(updated),
+            'skipped': [registration.pk for registrations in by_holder.values() for registration in registrations if registration.pk not in updated_ids],
+            'promoted': [registration.id for registration in promoted],
+            'registered_count': event.registered_count,
+            'reserved_count': event.reserved_count,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def override_occurrence(self, request, pk=None):
+        """Cancel, reschedule or edit one occurrence of a recurring event (admin only)"""
+        event = self.get_object()
+        
+        if not request.user.is_staff:
+            return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
+        if not event.is_recurring:
+            return Response({'error': 'Cet événement n\'est pas récurrent'}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.data.get('occurrence_start'):
+            return Response({'error': 'occurrence_start est requis'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        original_start = parse_boundary(request.data['occurrence_start'], 'occurrence_start')
+        with transaction.atomic():
+            # The lock reserve_seat() and release_seat() take: the occurrence row and its
+            # counters are not written while a registration is changing them
+            event = Event.objects.select_for_update().get(pk=event.pk)
+            occurrence = event.get_occurrence(original_start)
+            if occurrence is None:
+                return Response({'error': 'Occurrence introuvable'}, status=status.HTTP_404_NOT_FOUND)
+            
+            # The seat counters are read-only and left out of the save (see SeatHolderMixin.save)
+            serializer = EventOccurrenceSerializer(occurrence, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def export_registrations(self, request, pk=None):
+        """Export an event's registrations as CSV (default) or XLSX with ?type=xlsx (admin only)"""
+        event = self.get_object()
+        
+        if not request.user.is_staff:
+            return Response({'error': 'Accès non autorisé'}, status=status.HTTP_403_FORBIDDEN)
+        
+        filename = f"inscriptions_evenement_{event.pk}"
+        
+        if request.query_params.get('type') == 'xlsx':
+            try:
+                from openpyxl import Workbook
+            except ImportError:
+                return Response({'error': 'Export XLSX indisponible: openpyxl n\'est pas installé'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+            # Write-only mode keeps memory flat; the workbook is spooled to disk and streamed back
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet('Inscriptions')
+            sheet.append(EXPORT_HEADER)
+            for row in registration_export_rows(event):
+                sheet.append(row)
+            output = tempfile.TemporaryFile()
+            workbook.save(output)
+            output.seek(0)
+            return FileResponse(
+                output,
+                as_attachment=True,
+                filename=f"{filename}.xlsx",
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        
+        writer = csv.writer(Echo())
+        
+        def stream():
+            yield writer.writerow(EXPORT_HEADER)
+            for row in registration_export_rows(event):
+                yield writer.writerow(row)
+        
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
 
-class EventRegistrationViewSet(viewsets.ModelViewSet):
+class EventRegistrationViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = EventRegistrationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_names = ('events', 'team')
     
     def get_queryset(self):
         """Return registrations for the current user"""
-        return EventRegistration.objects.filter(user=self.request.user).select_related('event', 'user', 'user__profile')
+        return EventRegistration.objects.filter(user=self.request.user).select_related('event', 'occurrence', 'user', 'user__profile')
+    
+    def get_serializer_class(self):
+        if self.action in ('update', 'partial_update'):
+            return RegistrationUpdateSerializer
+        return EventRegistrationSerializer
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        event = serializer.validated_data['event']
+        occurrence = serializer.validated_data.get('occurrence')
+        registration = reserve_seat(
+            event.pk,
+            self.request.user,
+            serializer.validated_data.get('notes') or '',
+            occurrence.original_start if occurrence else None
+        )
+        if registration is None:
+            raise serializers.ValidationError({'error': 'Vous êtes déjà inscrit à cet événement'})
+        serializer.instance = registration
+    
+    def perform_destroy(self, instance):
+        release_seat(instance)
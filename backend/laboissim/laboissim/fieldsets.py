@@ -0,0 +1,73 @@
+"""Sparse fieldsets: ?fields=a,b or ?exclude=c,d on list and detail endpoints.
+
+Serializers using SparseFieldsetMixin drop the fields the client did not ask
+for, so they are never computed. Viewsets using SparseQuerysetMixin also load
+only the matching columns when every requested field maps to a plain column.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+def requested_fields(request):
+    """(fields, exclude) sets from the query string, None when absent"""
+    if request is None or request.method != 'GET':
+        return None, None
+
+    def parse(name):
+        value = request.query_params.get(name)
+        return {field.strip() for field in value.split(',') if field.strip()} if value else None
+
+    return parse('fields'), parse('exclude')
+
+class SparseFieldsetMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only the top-level serializer follows the query string, not nested ones
+        if self.parent is not None and not isinstance(self.parent, serializers.ListSerializer):
+            return
+        fields, exclude = requested_fields(self.context.get('request'))
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or (exclude is not None and name in exclude):
+                self.fields.pop(name)
+
+class SparseQuerysetMixin:
+    """Defer unrequested columns for list and retrieve.
+
+    sparse_required_fields lists columns the view itself needs whatever the
+    client asked for.
+    """
+    sparse_required_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        columns = self.sparse_columns(queryset)
+        if columns is None:
+            return queryset
+        # Nothing relational was requested, so joins and prefetches are not needed either
+        return queryset.select_related(None).prefetch_related(None).only(*columns)
+
+    def sparse_columns(self, queryset):
+        model = queryset.model
+        fields, exclude = requested_fields(self.request)
+        if fields is None and exclude is None:
+            return None
+        serializer = self.get_serializer()
+        columns = {model._meta.pk.name, *self.sparse_required_fields}
+        ordering = getattr(self.paginator, 'get_ordering', None)
+        if ordering is not None:
+            columns.update(field.lstrip('-') for field in ordering(queryset, self))
+        columns.discard('pk')
+        for field in serializer.fields.values():
+            if (field.source == '*' or '.' in field.source
+                    or isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer))):
+                return None
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                # A property or annotation: its inputs are unknown, load everything
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            columns.add(model_field.name)
+        return columns
@@ -6,6 +6,9 @@ from django.core.files.base import ContentFile
 import os
 import mimetypes
 from .models import UserFile
+from .fieldsets import SparseFieldsetMixin, SparseQuerysetMixin
+from .conditional import ConditionalGetMixin
+from .db_router import ReplicaReadMixin
 from rest_framework import serializers
 
 class UploadedBySerializer(serializers.ModelSerializer):
@@ -19,7 +22,7 @@ class UploadedBySerializer(serializers.ModelSerializer):
             'name': instance.username
         }
 
-class UserFileSerializer(serializers.ModelSerializer):
+class UserFileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by = UploadedBySerializer(read_only=True)
     
     class Meta:
@@ -27,10 +30,11 @@ class UserFileSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'file', 'uploaded_at', 'file_type', 'size', 'uploaded_by']
         read_only_fields = ['uploaded_by', 'file_type', 'size', 'uploaded_at']
 
-class FileViewSet(viewsets.ModelViewSet):
+class FileViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     parser_classes = (MultiPartParser, FormParser)
     serializer_class = UserFileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_names = (UserFile, 'team')
 
     def get_queryset(self):
         # For viewing all files in table view, return all files ordered by upload date
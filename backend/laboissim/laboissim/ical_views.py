@@ -0,0 +1,231 @@
+import secrets
+from datetime import timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import Event, EventOccurrence, EventRegistration, UserProfile
+from .versioning import get_version
+
+FEED_SALT = 'laboissim.events.ical'
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+FEED_MAX_AGE = 300
+ICAL_CONTENT_TYPE = 'text/calendar; charset=utf-8'
+EVENT_FIELDS = ['id', 'title', 'description', 'event_type', 'location', 'start_date', 'end_date', 'updated_at', 'recurrence_rule']
+OCCURRENCE_FIELDS = ['event_id', 'original_start', 'cancelled', 'start_date', 'end_date', 'title', 'location']
+
+def feed_token(user):
+    """Signed token identifying a user's personal feed, valid until rotate_feed_key()"""
+    # Read from the table: request.user may come from the authentication cache
+    profiles = UserProfile.objects.filter(user=user)
+    key = profiles.values_list('calendar_feed_key', flat=True).first()
+    if not key:
+        # Only the first of concurrent requests sets it, so no URL handed out is revoked
+        profiles.filter(calendar_feed_key='').update(calendar_feed_key=secrets.token_urlsafe(16))
+        key = profiles.values_list('calendar_feed_key', flat=True).first()
+    return signing.dumps([user.pk, key], salt=FEED_SALT)
+
+def rotate_feed_key(user):
+    """Give a user a new feed key, revoking every feed URL handed out before"""
+    # A queryset update: nothing the user or team caches hold changes
+    UserProfile.objects.filter(user=user).update(calendar_feed_key=secrets.token_urlsafe(16))
+
+def _user_id_from_token(token):
+    try:
+        user_id, key = signing.loads(token, salt=FEED_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise Http404
+    if not UserProfile.objects.filter(user_id=user_id, calendar_feed_key=key).exclude(calendar_feed_key='').exists():
+        raise Http404
+    return user_id
+
+def _escape(text):
+    """Escape a TEXT value (RFC 5545 section 3.3.11)"""
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+def _fold(line):
+    """Fold a content line at 75 octets without splitting UTF-8 sequences"""
+    parts, current, size = [], [], 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > 75:
+            parts.append(''.join(current))
+            # Continuation lines start with a space, which counts towards the limit
+            current, size = [' '], 1
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n'.join(parts) + '\r\n'
+
+def _format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def _vevent(event):
+    uid = event.get('uid') or f"event-{event['id']}@laboissim"
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{uid}",
+        f"DTSTAMP:{_format_datetime(event['updated_at'])}",
+        f"LAST-MODIFIED:{_format_datetime(event['updated_at'])}",
+        f"DTSTART:{_format_datetime(event['start_date'])}",
+        f"DTEND:{_format_datetime(event['end_date'])}",
+    ]
+    if event.get('recurrence_id'):
+        lines.append(f"RECURRENCE-ID:{_format_datetime(event['recurrence_id'])}")
+    if event.get('recurrence_rule'):
+        lines.append(f"RRULE:{event['recurrence_rule'].upper().removeprefix('RRULE:')}")
+        lines.extend(f"EXDATE:{_format_datetime(exdate)}" for exdate in event.get('exdates', ()))
+    lines += [
+        f"SUMMARY:{_escape(event['title'])}",
+        f"DESCRIPTION:{_escape(event['description'])}",
+        f"LOCATION:{_escape(event['location'])}",
+        f"CATEGORIES:{_escape(event['event_type'])}",
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+def _occurrence_event(event, occurrence):
+    """Concrete event dict for one occurrence of a series, with its overrides applied"""
+    start = occurrence['start_date'] or occurrence['original_start']
+    return {
+        **event,
+        'recurrence_rule': '',
+        'start_date': start,
+        'end_date': occurrence['end_date'] or start + (event['end_date'] - event['start_date']),
+        'title': occurrence['title'] or event['title'],
+        'location': occurrence['location'] or event['location'],
+    }
+
+def _calendar_chunks(events, name):
+    yield ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//LABOISSIM//Events//FR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ])
+    for event in events:
+        yield _vevent(event)
+    yield _fold('END:VCALENDAR')
+
+def _feed_response(cache_key, events, name):
+    """Serve a cached feed body, or stream it and cache it once fully generated"""
+    body = cache.get(cache_key)
+    if body is not None:
+        return HttpResponse(body, content_type=ICAL_CONTENT_TYPE)
+
+    def stream():
+        chunks = []
+        for chunk in _calendar_chunks(events, name):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(cache_key, ''.join(chunks), FEED_CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(stream(), content_type=ICAL_CONTENT_TYPE)
+
+def _public_etag(request):
+    return f"events-{get_version('events')[0]}"
+
+def _user_etag(request, token):
+    return f"events-{_user_id_from_token(token)}-{get_version('events')[0]}"
+
+def _last_modified(request, *args, **kwargs):
+    return get_version('events')[1]
+
+def _public_events():
+    """Active events; series carry their RRULE, EXDATEs for cancelled occurrences and a
+    RECURRENCE-ID instance for each rescheduled or edited occurrence"""
+    modified = (
+        Q(cancelled=True) | Q(start_date__isnull=False) | Q(end_date__isnull=False)
+        | ~Q(title='') | ~Q(location='')
+    )
+    overrides = {}
+    for occurrence in (
+        EventOccurrence.objects.filter(modified, event__is_active=True)
+        .exclude(event__recurrence_rule='')
+        .values(*OCCURRENCE_FIELDS)
+    ):
+        overrides.setdefault(occurrence['event_id'], []).append(occurrence)
+
+    events = Event.objects.filter(is_active=True).order_by('start_date').values(*EVENT_FIELDS).iterator()
+    for event in events:
+        occurrences = overrides.get(event['id'], ()) if event['recurrence_rule'] else ()
+        event['exdates'] = [occurrence['original_start'] for occurrence in occurrences if occurrence['cancelled']]
+        yield event
+        for occurrence in occurrences:
+            if not occurrence['cancelled']:
+                yield {**_occurrence_event(event, occurrence), 'recurrence_id': occurrence['original_start']}
+
+def _user_events(user_id):
+    """Events a user holds a seat for, occurrences of series expanded to concrete instances"""
+    registrations = (
+        EventRegistration.objects.filter(
+            user_id=user_id,
+            event__is_active=True,
+            status__in=EventRegistration.SEAT_STATUSES,
+        )
+        .exclude(occurrence__cancelled=True)
+        .select_related('event', 'occurrence')
+        .order_by('event__start_date', 'occurrence__original_start')
+        .iterator()
+    )
+    for registration in registrations:
+        event = {field: getattr(registration.event, field) for field in EVENT_FIELDS}
+        if registration.occurrence_id is None:
+            yield event
+            continue
+        occurrence = {field: getattr(registration.occurrence, field) for field in OCCURRENCE_FIELDS}
+        yield {
+            **_occurrence_event(event, occurrence),
+            'uid': f"event-{event['id']}-{_format_datetime(occurrence['original_start'])}@laboissim",
+        }
+
+@require_GET
+@condition(etag_func=_public_etag, last_modified_func=_last_modified)
+def public_events_feed(request):
+    """iCalendar feed of all active events"""
+    version = get_version('events')[0]
+    events = _public_events()
+    response = _feed_response(f'ical:public:{version}', events, 'LABOISSIM')
+    patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+    return response
+
+@require_GET
+@condition(etag_func=_user_etag, last_modified_func=_last_modified)
+def user_events_feed(request, token):
+    """iCalendar feed of the events a user registered for, addressed by signed token"""
+    user_id = _user_id_from_token(token)
+    version = get_version('events')[0]
+    events = _user_events(user_id)
+    response = _feed_response(f'ical:user:{user_id}:{version}', events, 'LABOISSIM - Mes événements')
+    patch_cache_control(response, private=True, max_age=FEED_MAX_AGE)
+    return response
+
+class CalendarFeedView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Return the feed URLs for the current user"""
+        return Response(self.feed_urls(request))
+
+    def post(self, request):
+        """Replace the current user's personal feed URL, e.g. after it leaked"""
+        rotate_feed_key(request.user)
+        return Response(self.feed_urls(request))
+
+    def feed_urls(self, request):
+        return {
+            'public_url': request.build_absolute_uri(reverse('events-ical')),
+            'user_url': request.build_absolute_uri(reverse('events-ical-user', args=[feed_token(request.user)])),
+        }
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+
+DEFAULT_PATHS = ['/api/publications/', '/api/events/', '/api/team-members/']
+SERVERS = ('wsgi', 'asgi')
+
+def percentile(values, fraction):
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+def add_latency(seconds):
+    """Delay every query by ``seconds``, the round trip to a database server over the network"""
+    def delayed(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def on_connection(sender, connection, **kwargs):
+        if delayed not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delayed)
+    connection_created.connect(on_connection, weak=False)
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the public read endpoints at N concurrent clients: the async views "
+        "under asgi.py against the sync views under wsgi.py, served by a thread pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500, help="Concurrent clients")
+        parser.add_argument('--requests', type=int, default=10, help="Requests per client")
+        parser.add_argument('--path', action='append', dest='paths', help="Path to request, repeatable (default: publications, events, team members)")
+        parser.add_argument('--user', help="Username the requests authenticate as (JWT); also requests /api/site-content/")
+        parser.add_argument('--wsgi-threads', type=int, default=64, help="Worker threads of the WSGI server")
+        parser.add_argument(
+            '--db-latency', type=float, default=0,
+            help="Milliseconds added to every query, to stand in for a database server (local SQLite answers at once)",
+        )
+        parser.add_argument('--server', choices=SERVERS, help="Run one side in this process (used internally)")
+
+    def handle(self, *args, **options):
+        if options['server']:
+            result = self.run_server(options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        results = []
+        for server in SERVERS:
+            # Each side runs in its own process, with the application and urls its server would load
+            env = {**os.environ, 'LABOISSIM_ASYNC_READS': '1' if server == 'asgi' else '0'}
+            command = [sys.executable, sys.argv[0], 'bench_async_reads', '--server', server]
+            for name in ('clients', 'requests', 'user', 'wsgi_threads', 'db_latency', 'settings', 'pythonpath'):
+                if options.get(name) is not None:
+                    command += [f"--{name.replace('_', '-')}", str(options[name])]
+            for path in options['paths'] or []:
+                command += ['--path', path]
+            output = subprocess.run(command, env=env, capture_output=True, text=True)
+            if output.returncode:
+                raise CommandError(f"Échec du banc {server} :\n{output.stderr}")
+            results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(
+            f"{options['clients']} clients x {options['requests']} requêtes, "
+            f"WSGI servi par {options['wsgi_threads']} threads, {options['db_latency']:g} ms ajoutées par requête SQL"
+        )
+        self.stdout.write(f"{'':<6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'erreurs':>9}")
+        for result in results:
+            self.stdout.write(
+                f"{result['server'].upper():<6}{result['throughput']:>9.0f}"
+                + ''.join(f"{result[key] * 1000:>9.1f}" for key in ('p50', 'p95', 'p99', 'max'))
+                + f"{result['errors']:>9}"
+            )
+
+    def run_server(self, options):
+        if options['db_latency']:
+            add_latency(options['db_latency'] / 1000)
+        paths = list(options['paths'] or DEFAULT_PATHS)
+        headers = {}
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur {options['user']} introuvable")
+            headers['Authorization'] = f'Bearer {AccessToken.for_user(user)}'
+            if not options['paths']:
+                paths.append('/api/site-content/')
+
+        if options['server'] == 'asgi':
+            from laboissim.asgi import application
+            call = self.asgi_caller(application, headers)
+            latencies, statuses, seconds = asyncio.run(self.drive(call, paths, options['clients'], options['requests']))
+        else:
+            from laboissim.wsgi import application
+            call_sync = self.wsgi_caller(application, headers)
+            with ThreadPoolExecutor(max_workers=options['wsgi_threads']) as pool:
+                async def call(path):
+                    # Waiting for a free worker counts, as in a server's accept queue
+                    return await asyncio.get_running_loop().run_in_executor(pool, call_sync, path)
+                latencies, statuses, seconds = asyncio.run(self.drive(call, paths, options['clients'], options['requests']))
+
+        latencies.sort()
+        return {
+            'server': options['server'],
+            'async_views': settings.ASYNC_READ_VIEWS,
+            'throughput': len(latencies) / seconds,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1],
+            'errors': sum(1 for status in statuses if status not in (200, 304)),
+        }
+
+    async def drive(self, call, paths, clients, requests):
+        # Warm up process caches and compiled read plans, outside the measure
+        for path in paths:
+            await call(path)
+        latencies, statuses = [], []
+
+        async def client(index):
+            for number in range(requests):
+                started = time.perf_counter()
+                statuses.append(await call(paths[(index + number) % len(paths)]))
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(clients)))
+        return latencies, statuses, time.perf_counter() - started
+
+    def asgi_caller(self, application, headers):
+        raw_headers = [(b'host', b'localhost')] + [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+
+        async def call(url):
+            parts = urlsplit(url)
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': parts.path, 'raw_path': parts.path.encode(),
+                'query_string': parts.query.encode(), 'root_path': '', 'headers': raw_headers,
+                'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            disconnected = asyncio.Event()
+            received = False
+            status = None
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client stays connected until the response is sent
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+
+            await application(scope, receive, send)
+            disconnected.set()
+            return status
+        return call
+
+    def wsgi_caller(self, application, headers):
+        base = {
+            'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost', 'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+            **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()},
+        }
+
+        def call(url):
+            parts = urlsplit(url)
+            status = None
+
+            def start_response(status_line, response_headers, exc_info=None):
+                nonlocal status
+                status = int(status_line.split(' ', 1)[0])
+
+            environ = {**base, 'PATH_INFO': parts.path, 'QUERY_STRING': parts.query, 'wsgi.input': BytesIO()}
+            result = application(environ, start_response)
+            try:
+                b''.join(result)
+            finally:
+                # Sends request_finished, as a server does
+                result.close()
+            return status
+        return call
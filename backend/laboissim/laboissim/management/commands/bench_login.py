@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from laboissim.auth_backend import CachedJWTAuthentication
+from laboissim.models import UserProfile, get_user_by_email, normalize_email
+
+PREFIX = 'bench_login_'
+
+def per_call(function, arguments):
+    """Mean seconds per call of function over arguments"""
+    started = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - started) / len(arguments)
+
+class Command(BaseCommand):
+    help = (
+        "Measure the login lookup (email= scan against the email_key index, password "
+        "hashing left out) and JWT authentication with and without the user cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help="Users in the table; bench users are added up to this count")
+        parser.add_argument('--lookups', type=int, default=500, help="Logins measured per variant")
+        parser.add_argument('--keep', action='store_true', help="Keep the bench users for the next run")
+
+    def handle(self, *args, **options):
+        created = self.seed(options['users'])
+        try:
+            self.measure(options['lookups'])
+        finally:
+            if created and not options['keep']:
+                # Profiles and tokens go with their users
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    def seed(self, count):
+        missing = count - User.objects.count()
+        if missing <= 0:
+            return False
+        self.stdout.write(f"Création de {missing} utilisateurs de test...")
+        offset = User.objects.filter(username__startswith=PREFIX).count()
+        with transaction.atomic():
+            for start in range(offset, offset + missing, 5000):
+                names = [f'{PREFIX}{index}' for index in range(start, min(start + 5000, offset + missing))]
+                User.objects.bulk_create([
+                    User(username=name, email=f'{name}@Example.org', password='!') for name in names
+                ])
+                # bulk_create sends no post_save, so the profiles are created here
+                UserProfile.objects.bulk_create([
+                    UserProfile(user_id=user_id, email_key=normalize_email(email))
+                    for user_id, email in User.objects.filter(username__in=names).values_list('id', 'email')
+                ])
+        return True
+
+    def measure(self, lookups):
+        emails = list(User.objects.filter(username__startswith=PREFIX).exclude(email='').values_list('email', flat=True)[:50000])
+        if not emails:
+            emails = list(User.objects.exclude(email='').values_list('email', flat=True)[:50000])
+        sample = [random.choice(emails) for _ in range(lookups)]
+        # Logins come in any case
+        typed = [email.upper() if index % 2 else email.lower() for index, email in enumerate(sample)]
+
+        self.stdout.write(f"{User.objects.count()} utilisateurs, {lookups} connexions par variante")
+        self.report("email= (avant)", per_call(lambda email: User.objects.filter(email=email).first(), sample))
+        self.report("email_key (index)", per_call(get_user_by_email, typed))
+
+        factory = RequestFactory()
+        users = {user.pk: user for user in User.objects.filter(email__in=sample[:100])}
+        requests = [
+            factory.get('/api/user/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            for user in users.values()
+        ] * max(1, lookups // max(len(users), 1))
+        authentication = CachedJWTAuthentication()
+        with override_settings(AUTH_USER_CACHE_TTL=0):
+            self.report("JWT sans cache", per_call(authentication.authenticate, requests))
+        CachedJWTAuthentication._users.clear()
+        # First pass fills the cache
+        per_call(authentication.authenticate, requests[:len(users)])
+        self.report("JWT avec cache", per_call(authentication.authenticate, requests))
+
+    def report(self, label, seconds):
+        self.stdout.write(f"{label:<20}{seconds * 1000:>9.3f} ms")
@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from laboissim.directory_views import ADMIN_USER_FIELDS
+from laboissim.pagination import encode_cursor, keyset_page
+
+PREFIX = 'bench_page_'
+
+def per_call(function, repeat):
+    """Mean seconds per call of function"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+class Command(BaseCommand):
+    help = (
+        "Measure one page of the admin user directory at increasing depths: "
+        "OFFSET/LIMIT against the keyset cursor of AdminUsersView"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help="Users in the table; bench users are added up to this count")
+        parser.add_argument('--page-size', type=int, default=50, help="Rows per page")
+        parser.add_argument('--repeat', type=int, default=20, help="Pages fetched per depth and variant")
+        parser.add_argument('--keep', action='store_true', help="Keep the bench users for the next run")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['users'])
+            self.measure(options['page_size'], options['repeat'])
+            # Rolling back is much faster than deleting 100k users through the ORM
+            transaction.set_rollback(not options['keep'])
+
+    def seed(self, count):
+        missing = count - User.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f"Création de {missing} utilisateurs de test...")
+        offset = User.objects.filter(username__startswith=PREFIX).count()
+        joined = timezone.now() - timedelta(days=365)
+        for start in range(offset, offset + missing, 5000):
+            # Batches of 100 users share their date_joined, as after an import
+            User.objects.bulk_create([
+                User(
+                    username=f'{PREFIX}{index}', email=f'{PREFIX}{index}@example.org', password='!',
+                    date_joined=joined + timedelta(minutes=index // 100),
+                )
+                for index in range(start, min(start + 5000, offset + missing))
+            ])
+
+    def measure(self, page_size, repeat):
+        ordering = ['date_joined', 'id']
+        users = User.objects.values(*ADMIN_USER_FIELDS, role=Coalesce(F('profile__role'), Value('member')))
+        total = User.objects.count()
+        self.stdout.write(f"{total} utilisateurs, pages de {page_size}, tri par date_joined")
+        self.stdout.write(f"{'profondeur':>12}{'offset':>12}{'curseur':>12}")
+
+        depth = page_size
+        while depth < total:
+            # The cursor a client holds after reading the first ``depth`` rows
+            last = User.objects.order_by(*ordering).values_list(*ordering)[depth - 1]
+            cursor = encode_cursor(last)
+            offset = per_call(lambda: list(users.order_by(*ordering)[depth:depth + page_size]), repeat)
+            keyset = per_call(lambda: keyset_page(users, ordering, cursor, page_size), repeat)
+            self.stdout.write(f"{depth:>12}{offset * 1000:>9.3f} ms{keyset * 1000:>9.3f} ms")
+            depth *= 10
@@ -0,0 +1,132 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from laboissim.event_views import EVENT_LIST_READ_PLAN, EventListSerializer
+from laboissim.message_views import INTERNAL_MESSAGE_READ_PLAN, InternalMessageSerializer
+from laboissim.models import Event, InternalMessage, Publication, UserFile, UserProfile, exterieurs
+from laboissim.publication_views import PUBLICATION_READ_PLAN, PublicationSerializer
+from laboissim.renderers import FastJSONRenderer
+from laboissim.views import EXTENDED_USER_READ_PLAN, ExtendedUserSerializer
+
+PREFIX = 'bench_plan_'
+
+def best_of(function, runs):
+    """Best wall time of ``runs`` calls, and the last result"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+class Command(BaseCommand):
+    help = (
+        "Render N rows of each hot list with its DRF serializer and with its ReadPlan, "
+        "check that both give the same bytes and compare the time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows rendered per list")
+        parser.add_argument('--runs', type=int, default=3, help="Runs per variant, the best is kept")
+        parser.add_argument('--keep', action='store_true', help="Keep the bench rows for the next run")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            users = self.seed(rows)
+            request = Request(APIRequestFactory().get('/api/', HTTP_HOST='localhost'))
+            context = {'request': request, 'user_registrations': {}}
+            lists = [
+                (
+                    'PublicationSerializer', PublicationSerializer, PUBLICATION_READ_PLAN,
+                    Publication.objects.filter(title__startswith=PREFIX).order_by('-posted_at', '-id'),
+                    lambda queryset: queryset.select_related('posted_by').prefetch_related('tagged_members', 'tagged_externals', 'attached_files'),
+                ),
+                (
+                    'InternalMessage', InternalMessageSerializer, INTERNAL_MESSAGE_READ_PLAN,
+                    InternalMessage.objects.filter(subject__startswith=PREFIX).order_by('-created_at', '-id'),
+                    lambda queryset: queryset.select_related('sender', 'receiver'),
+                ),
+                (
+                    'ExtendedUserSerializer', ExtendedUserSerializer, EXTENDED_USER_READ_PLAN,
+                    User.objects.filter(pk__in=users).order_by('id'),
+                    lambda queryset: queryset.select_related('profile'),
+                ),
+                (
+                    'EventListSerializer', EventListSerializer, EVENT_LIST_READ_PLAN,
+                    Event.objects.filter(title__startswith=PREFIX).order_by('start_date', 'id'),
+                    lambda queryset: queryset.select_related('created_by'),
+                ),
+            ]
+            renderer = FastJSONRenderer()
+            self.stdout.write(f"{rows} lignes par liste, meilleur de {options['runs']}")
+            self.stdout.write(f"{'sérialiseur':<24}{'DRF ms':>9}{'plan ms':>9}{'gain':>8}{'octets':>10}")
+            for label, serializer_class, plan, queryset, related in lists:
+                drf, expected = best_of(
+                    lambda: renderer.render(serializer_class(related(queryset), many=True, context=context).data), options['runs']
+                )
+                compiled, rendered = best_of(lambda: renderer.render(plan.serialize(queryset, context)), options['runs'])
+                if rendered != expected:
+                    raise CommandError(f"{label}: la sortie du plan diffère de celle du sérialiseur")
+                self.stdout.write(f"{label:<24}{drf * 1000:>9.0f}{compiled * 1000:>9.0f}{drf / compiled:>7.1f}x{len(rendered):>10}")
+            transaction.set_rollback(not options['keep'])
+
+    def seed(self, count):
+        """Create ``count`` rows of each list; returns the bench user ids"""
+        self.stdout.write(f"Création de {count} lignes de test par liste...")
+        now = timezone.now()
+        # Users come with their profile, half of them with a picture
+        users = [User.objects.create(username=f'{PREFIX}{index}', email=f'{PREFIX}{index}@example.org', first_name=f'Prénom{index}') for index in range(20)]
+        User.objects.bulk_create([
+            User(username=f'{PREFIX}{index}', email=f'{PREFIX}{index}@example.org', last_name=f'Nom{index}', password='!')
+            for index in range(20, count)
+        ], batch_size=2000)
+        user_ids = list(User.objects.filter(username__startswith=PREFIX).order_by('id').values_list('id', flat=True))
+        UserProfile.objects.bulk_create([
+            UserProfile(user_id=user_id, bio='Bio', profile_image=f'profile_images/{user_id}.png' if user_id % 2 else None)
+            for user_id in user_ids[20:]
+        ], batch_size=2000)
+
+        externals = exterieurs.objects.bulk_create([exterieurs(name=f'{PREFIX}{index}', email=f'ext{index}@example.org') for index in range(20)])
+        files = UserFile.objects.bulk_create([
+            UserFile(file=f'user_files/{PREFIX}{index}.pdf', name=f'{index}.pdf', file_type='pdf', size=index, uploaded_by=users[0])
+            for index in range(20)
+        ])
+        publications = Publication.objects.bulk_create([
+            Publication(title=f'{PREFIX}{index}', abstract='Résumé ' * 20, posted_by=users[index % 20], keywords='a, b')
+            for index in range(count)
+        ], batch_size=2000)
+        for relation, targets in (('tagged_members', users), ('tagged_externals', externals), ('attached_files', files)):
+            through = getattr(Publication, relation).through
+            source, target = Publication._meta.get_field(relation).m2m_field_name(), Publication._meta.get_field(relation).m2m_reverse_field_name()
+            through.objects.bulk_create([
+                through(**{f'{source}_id': publication.pk, f'{target}_id': targets[(publication.pk + offset) % 20].pk})
+                for publication in publications for offset in range(2)
+            ], batch_size=5000)
+
+        messages = InternalMessage.objects.bulk_create([
+            InternalMessage(sender=users[index % 20], receiver=users[(index + 1) % 20], subject=f'{PREFIX}{index}', message='Bonjour ' * 10)
+            for index in range(count)
+        ], batch_size=2000)
+        # Every other message answers the previous one, the others have a null reply_to
+        for previous, message in zip(messages, messages[1::2]):
+            message.reply_to = previous
+        InternalMessage.objects.bulk_update(messages[1::2], ['reply_to'], batch_size=2000)
+
+        Event.objects.bulk_create([
+            Event(
+                title=f'{PREFIX}{index}', description='Description', event_type='seminar', location='Salle',
+                start_date=now + timedelta(hours=index), end_date=now + timedelta(hours=index + 1),
+                max_participants=index % 30 or None, created_by=users[index % 20],
+            )
+            for index in range(count)
+        ], batch_size=2000)
+        return user_ids
@@ -0,0 +1,122 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from laboissim.directory_views import TeamDirectoryView
+from laboissim.event_views import EventViewSet
+from laboissim.message_views import InternalMessageViewSet
+from laboissim.models import Event, EventRegistration, InternalMessage, Publication, UserFile, UserProfile, exterieurs
+from laboissim.publication_views import PublicationViewSet
+from laboissim.renderers import FastJSONRenderer, orjson
+
+PREFIX = 'bench_render_'
+
+def best_of(function, runs, loops):
+    """Best mean seconds per call over ``runs`` runs of ``loops`` calls, and the last result"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        for _ in range(loops):
+            result = function()
+        elapsed = (time.perf_counter() - started) / loops
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+class Command(BaseCommand):
+    help = (
+        "Render the data of the heavy list endpoints with DRF's JSONRenderer and with "
+        "FastJSONRenderer, check that both give the same bytes and compare the time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Runs per variant, the best is kept")
+        parser.add_argument('--loops', type=int, default=20, help="Renders per run")
+        parser.add_argument('--keep', action='store_true', help="Keep the bench rows for the next run")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson n'est pas installé : FastJSONRenderer se comporte comme JSONRenderer")
+        with transaction.atomic():
+            staff, detail_event = self.seed()
+            stdlib, fast = JSONRenderer(), FastJSONRenderer()
+            self.stdout.write(f"meilleur de {options['runs']}x{options['loops']} rendus")
+            self.stdout.write(f"{'endpoint':<32}{'stdlib ms':>10}{'orjson ms':>10}{'gain':>8}{'octets':>9}")
+            for label, data in self.payloads(staff, detail_event):
+                old, expected = best_of(lambda: stdlib.render(data), options['runs'], options['loops'])
+                new, rendered = best_of(lambda: fast.render(data), options['runs'], options['loops'])
+                if rendered != expected:
+                    raise CommandError(f"{label} : la sortie d'orjson diffère de celle de JSONRenderer")
+                self.stdout.write(f"{label:<32}{old * 1000:>10.2f}{new * 1000:>10.2f}{old / new:>7.1f}x{len(rendered):>9}")
+            transaction.set_rollback(not options['keep'])
+
+    def payloads(self, staff, detail_event):
+        """(label, response.data) of each endpoint, as the views build them for staff"""
+        factory = APIRequestFactory()
+        endpoints = [
+            ('publications (300)', PublicationViewSet.as_view({'get': 'list'}), '/api/publications/', {'page_size': 300}, {}),
+            ('events list (100)', EventViewSet.as_view({'get': 'list'}), '/api/events/', {'page_size': 100}, {}),
+            ('event detail, 20 registrations', EventViewSet.as_view({'get': 'retrieve'}), f'/api/events/{detail_event.pk}/', {}, {'pk': detail_event.pk}),
+            ('conversations (200)', InternalMessageViewSet.as_view({'get': 'conversations'}), '/api/messages/internal/conversations/', {}, {}),
+            ('internal messages (500)', InternalMessageViewSet.as_view({'get': 'list'}), '/api/messages/internal/', {'page_size': 500}, {}),
+            ('team directory (100)', TeamDirectoryView.as_view(), '/api/team-members/directory/', {'page_size': 100}, {}),
+        ]
+        for label, view, path, params, kwargs in endpoints:
+            request = factory.get(path, params, HTTP_HOST='localhost')
+            force_authenticate(request, staff)
+            response = view(request, **kwargs)
+            if response.status_code != 200:
+                raise CommandError(f"{label} : statut {response.status_code}")
+            yield label, response.data
+
+    def seed(self):
+        self.stdout.write("Création des données de test...")
+        now = timezone.now()
+        staff = User.objects.create(username=f'{PREFIX}staff', email=f'{PREFIX}staff@example.org', is_staff=True)
+        users = User.objects.bulk_create([
+            User(username=f'{PREFIX}{index}', email=f'{PREFIX}{index}@example.org', first_name=f'Prénom{index}', last_name=f'Nom{index}', password='!')
+            for index in range(200)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, bio='Chercheuse en écologie', institution='LABOISSIM', profile_image=f'profile_images/{user.pk}.png')
+            for user in users
+        ])
+
+        externals = exterieurs.objects.bulk_create([exterieurs(name=f'{PREFIX}{index}', email=f'ext{index}@example.org') for index in range(20)])
+        files = UserFile.objects.bulk_create([
+            UserFile(file=f'user_files/{PREFIX}{index}.pdf', name=f'{index}.pdf', file_type='pdf', size=index, uploaded_by=staff)
+            for index in range(20)
+        ])
+        publications = Publication.objects.bulk_create([
+            Publication(title=f'{PREFIX}{index}', abstract='Résumé « détaillé » ' * 20, posted_by=users[index % 200], keywords='écologie, modèles')
+            for index in range(300)
+        ])
+        for publication in publications:
+            publication.tagged_members.set(users[publication.pk % 190:publication.pk % 190 + 3])
+            publication.tagged_externals.set(externals[publication.pk % 18:publication.pk % 18 + 2])
+            publication.attached_files.set(files[publication.pk % 19:publication.pk % 19 + 1])
+
+        events = Event.objects.bulk_create([
+            Event(
+                title=f'{PREFIX}{index}', description='Présentation des travaux en cours', event_type='seminar', location='Salle 101',
+                start_date=now + timedelta(days=index), end_date=now + timedelta(days=index, hours=2),
+                max_participants=30, created_by=staff,
+            )
+            for index in range(100)
+        ])
+        for user in users[:20]:
+            EventRegistration.objects.create(event=events[0], user=user, status='confirmed', notes='Végétarien')
+
+        InternalMessage.objects.bulk_create([
+            InternalMessage(
+                sender=users[index % 200] if index % 2 else staff, receiver=staff if index % 2 else users[index % 200],
+                subject=f'Réunion {index}', message='Bonjour, voici le compte rendu de la réunion. ' * 5,
+            )
+            for index in range(600)
+        ])
+        return staff, events[0]
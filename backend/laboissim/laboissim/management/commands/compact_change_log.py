@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from laboissim.models import ChangeLogEntry
+
+class Command(BaseCommand):
+    help = "Compact the change feed log: drop superseded entries, then the expired ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Entries deleted per query")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # A newer entry for the same object and reader already says what a client must do
+        newer = ChangeLogEntry.objects.filter(
+            collection=OuterRef('collection'),
+            object_id=OuterRef('object_id'),
+            id__gt=OuterRef('id'),
+        )
+        superseded = ChangeLogEntry.objects.annotate(
+            superseded_shared=Exists(newer.filter(recipient_id__isnull=True)),
+            superseded_private=Exists(newer.filter(recipient_id=OuterRef('recipient_id'))),
+        ).filter(
+            Q(recipient_id__isnull=True, superseded_shared=True) | Q(recipient_id__isnull=False, superseded_private=True)
+        )
+        compacted = self.delete_in_batches(superseded, batch_size)
+        # Cursors this old get 410 Gone and reload the collection
+        cutoff = timezone.now() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+        expired = self.delete_in_batches(ChangeLogEntry.objects.filter(created_at__lt=cutoff), batch_size)
+        self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} - {compacted} entrée(s) remplacée(s), {expired} expirée(s) supprimée(s)")
+
+    def delete_in_batches(self, queryset, batch_size):
+        deleted = 0
+        while True:
+            # Ids first: MySQL cannot delete from a table its subquery reads
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += ChangeLogEntry.objects.filter(pk__in=ids).delete()[0]
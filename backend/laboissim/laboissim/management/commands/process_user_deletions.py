@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from laboissim.models import UserDeletion
+from laboissim.user_deletion import process_batch
+
+class Command(BaseCommand):
+    help = "Delete the accounts queued for deletion, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows deleted per transaction")
+        parser.add_argument('--loop', action='store_true', help="Keep running, polling every --interval seconds")
+        parser.add_argument('--interval', type=int, default=10, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            finished = self.process_pending(options['batch_size'])
+            if finished or not options['loop']:
+                self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} - {finished} suppression(s) terminée(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def process_pending(self, batch_size):
+        finished = 0
+        job_ids = UserDeletion.objects.filter(status__in=('pending', 'running')).values_list('pk', flat=True)
+        for job_id in list(job_ids):
+            try:
+                while process_batch(job_id, batch_size):
+                    pass
+            except Exception as exc:
+                # The failed batch was rolled back; the job can be queued again from the admin
+                UserDeletion.objects.filter(pk=job_id).update(status='failed', error=str(exc), updated_at=timezone.now())
+                self.stderr.write(f"Suppression {job_id} échouée : {exc}")
+                continue
+            if UserDeletion.objects.filter(pk=job_id, status='done').exists():
+                finished += 1
+        return finished
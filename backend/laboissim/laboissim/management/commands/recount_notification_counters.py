@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from laboissim.models import recount_notification_counters
+
+class Command(BaseCommand):
+    help = "Recompute the notification counters from the message, request and registration tables"
+
+    def handle(self, *args, **options):
+        recount_notification_counters()
+        self.stdout.write("Compteurs de notifications recalculés")
@@ -0,0 +1,120 @@
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from laboissim.models import Event, EventRegistration, EventReminder, occurrence_overrides
+
+class Command(BaseCommand):
+    help = "Email confirmed participants of events starting within the reminder window"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help="Reminder window before the event start, in hours")
+        parser.add_argument('--batch-size', type=int, default=500, help="Registrations loaded and emailed per batch")
+        parser.add_argument('--loop', action='store_true', help="Keep running, dispatching every --interval seconds")
+        parser.add_argument('--interval', type=int, default=300, help="Seconds between passes with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = self.dispatch(options['hours'], options['batch_size'])
+            self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} - {sent} rappel(s) envoyé(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def dispatch(self, hours, batch_size):
+        self.token = secrets.token_hex(16)
+        now = timezone.now()
+        horizon = now + timedelta(hours=hours)
+        # Served by the (start_date, end_date) index
+        events = Event.objects.filter(
+            is_active=True,
+            recurrence_rule='',
+            start_date__gt=now,
+            start_date__lte=horizon,
+        ).order_by('start_date').iterator()
+
+        sent = 0
+        with get_connection() as connection:
+            for event in events:
+                sent += self.remind_event(event, hours, batch_size, connection)
+            for occurrence in self.upcoming_occurrences(now, horizon):
+                sent += self.remind_event(occurrence, hours, batch_size, connection)
+        return sent
+
+    def upcoming_occurrences(self, now, horizon):
+        """Occurrences of recurring series starting within (now, horizon]"""
+        series = list(
+            Event.objects.filter(is_active=True, start_date__lte=horizon)
+            .exclude(recurrence_rule='')
+            .filter(Q(recurrence_end__isnull=True) | Q(recurrence_end__gt=now))
+        )
+        overrides = occurrence_overrides(series, now, horizon + timedelta(seconds=1))
+        for event in series:
+            for occurrence in event.expand(now, horizon + timedelta(seconds=1), overrides.get(event.pk, ())):
+                if now < occurrence.start_date <= horizon:
+                    yield occurrence
+
+    def remind_event(self, event, hours, batch_size, connection):
+        """Send reminders for one event or occurrence in keyset batches, so memory stays bounded"""
+        already_reminded = EventReminder.objects.filter(registration=OuterRef('pk'), hours_before=hours)
+        occurrence_start = getattr(event, 'occurrence_start', None)
+        if occurrence_start is not None:
+            registrations = EventRegistration.objects.filter(event=event, occurrence__original_start=occurrence_start)
+        else:
+            registrations = EventRegistration.objects.filter(event=event, occurrence__isnull=True)
+        pending = (
+            registrations.filter(status='confirmed')
+            .exclude(user__email='')
+            .filter(~Exists(already_reminded))
+            .order_by('id')
+        )
+
+        sent, last_id = 0, 0
+        while True:
+            batch = list(
+                pending.filter(id__gt=last_id)
+                .values_list('id', 'user__email', 'user__first_name', 'user__last_name', 'user__username')[:batch_size]
+            )
+            if not batch:
+                return sent
+            last_id = batch[-1][0]
+
+            recipients = {registration_id: (email, f"{first_name} {last_name}".strip() or username)
+                          for registration_id, email, first_name, last_name, username in batch}
+            # Claim the reminders first: a conflicting row was inserted by another run, which
+            # sends that reminder itself. Sending inside the transaction rolls the claims back
+            # when it fails, so the batch is retried on the next pass.
+            with transaction.atomic():
+                EventReminder.objects.bulk_create(
+                    [EventReminder(registration_id=registration_id, hours_before=hours, dispatch=self.token) for registration_id in recipients],
+                    ignore_conflicts=True,
+                )
+                claimed = EventReminder.objects.filter(
+                    registration_id__in=recipients, hours_before=hours, dispatch=self.token
+                ).values_list('registration_id', flat=True)
+                messages = [self.build_message(event, *recipients[registration_id]) for registration_id in sorted(claimed)]
+                connection.send_messages(messages)
+            sent += len(messages)
+
+    def build_message(self, event, email, name):
+        start = timezone.localtime(event.start_date)
+        body = (
+            f"Bonjour {name},\n\n"
+            f"Nous vous rappelons que l'événement « {event.title} » commence le "
+            f"{start:%d/%m/%Y à %H:%M}.\n"
+            f"Lieu : {event.location}\n\n"
+            "À bientôt,\nL'équipe LABOISSIM"
+        )
+        return EmailMessage(
+            subject=f"Rappel : {event.title}",
+            body=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )
@@ -0,0 +1,24 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+class Command(BaseCommand):
+    help = "Copy the SQLite primary into the SQLite replicas (local stand-in for replication)"
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if not settings.DATABASE_REPLICAS or primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("Aucun réplica SQLite configuré (LABOISSIM_SQLITE_REPLICA)")
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Réplica {alias} synchronisé")
+        finally:
+            source.close()
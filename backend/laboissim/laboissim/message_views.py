@@ -2,24 +2,56 @@ from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
+import os
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
-from .models import ContactMessage, AccountRequest, InternalMessage
+from .models import (
+    ContactMessage, AccountRequest, InternalMessage, UserProfile, NotificationCounter, UnreadMessageCounter,
+    NEW_CONTACT_MESSAGES, PENDING_ACCOUNT_REQUESTS, PENDING_REGISTRATIONS,
+    add_to_counter, add_unread, normalize_email, get_user_by_email, record_changes,
+)
+from .versioning import bump_model_version, bump_version
+from .fieldsets import SparseFieldsetMixin, SparseQuerysetMixin
+from .conditional import ConditionalGetMixin
+from .db_router import ReplicaReadMixin
+from .read_serializers import Computed, ReadPlan
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+BULK_REVIEW_MAX_IDS = 200
+REVIEWED_ELSEWHERE = {'status': 'error', 'error': 'Account request already reviewed'}
+# Below this many passwords, starting worker processes costs more than it saves
+PARALLEL_HASH_THRESHOLD = 4
+
+def hash_passwords(passwords):
+    """Hash passwords with make_password, spreading the slow PBKDF2 rounds over CPU cores"""
+    workers = min(len(passwords), os.cpu_count() or 1)
+    if len(passwords) < PARALLEL_HASH_THRESHOLD or workers == 1:
+        return [make_password(password) for password in passwords]
+    # django.setup makes the hasher settings available under the spawn start method too
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        return list(executor.map(make_password, passwords))
+
+def split_name(name):
+    parts = name.split()
+    return (parts[0] if parts else ''), ' '.join(parts[1:])
+
+class ContactMessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactMessage
         fields = '__all__'
         read_only_fields = ['created_at']
 
-class AccountRequestSerializer(serializers.ModelSerializer):
+class AccountRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = AccountRequest
         fields = '__all__'
         read_only_fields = ['created_at']
 
-class InternalMessageSerializer(serializers.ModelSerializer):
+class InternalMessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     sender_name = serializers.CharField(source='sender.username', read_only=True)
     receiver_name = serializers.CharField(source='receiver.username', read_only=True)
     conversation_id = serializers.CharField(read_only=True)
@@ -29,10 +61,20 @@ class InternalMessageSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['created_at', 'sender', 'sender_name', 'receiver_name', 'conversation_id']
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+def _conversation_id(sender_id, receiver_id):
+    return f"conv_{min(sender_id, receiver_id)}_{max(sender_id, receiver_id)}"
+
+# Same output as InternalMessageSerializer, for message lists
+INTERNAL_MESSAGE_READ_PLAN = ReadPlan(
+    InternalMessageSerializer,
+    conversation_id=Computed(['sender', 'receiver'], _conversation_id),
+)
+
+class ContactMessageViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_names = (ContactMessage,)
     
     def get_permissions(self):
         """
@@ -48,10 +90,11 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
-class AccountRequestViewSet(viewsets.ModelViewSet):
+class AccountRequestViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = AccountRequest.objects.all()
     serializer_class = AccountRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_names = (AccountRequest,)
     
     def get_permissions(self):
         """
@@ -76,7 +119,7 @@ class AccountRequestViewSet(viewsets.ModelViewSet):
             # Create a new user in auth_user table
             try:
                 # Check if user already exists
-                if User.objects.filter(email=instance.email).exists():
+                if get_user_by_email(instance.email) is not None:
                     return Response(
                         {'error': 'A user with this email already exists'}, 
                         status=status.HTTP_400_BAD_REQUEST
@@ -124,9 +167,142 @@ class AccountRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-class InternalMessageViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def bulk_review(self, request):
+        """Approve or reject many pending account requests at once (admin only).
+        
+        Body: {"status": "approved" | "rejected", "ids": [...]}.
+        Approved requests become users and profiles created in one transaction;
+        the response reports the outcome of each request.
+        """
+        if not request.user.is_staff:
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        new_status = request.data.get('status')
+        if new_status not in ('approved', 'rejected'):
+            return Response(
+                {'error': 'Invalid status. Must be "approved" or "rejected"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        request_ids = request.data.get('ids')
+        if not isinstance(request_ids, list) or not request_ids or len(request_ids) > BULK_REVIEW_MAX_IDS:
+            return Response(
+                {'error': f'ids must be a list of 1 to {BULK_REVIEW_MAX_IDS} account request ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            request_ids = list(dict.fromkeys(int(request_id) for request_id in request_ids))
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pending = AccountRequest.objects.filter(status='pending').in_bulk(request_ids)
+        results = {
+            request_id: {'status': 'error', 'error': 'Pending account request not found'}
+            for request_id in request_ids if request_id not in pending
+        }
+        
+        if new_status == 'rejected':
+            with transaction.atomic():
+                # Requests another admin approved meanwhile stay approved
+                rejected = set(
+                    AccountRequest.objects.select_for_update(skip_locked=True)
+                    .filter(pk__in=list(pending), status='pending').values_list('pk', flat=True)
+                )
+                AccountRequest.objects.filter(pk__in=rejected).delete()
+            for request_id in pending:
+                results[request_id] = {'status': 'rejected'} if request_id in rejected else REVIEWED_ELSEWHERE
+            return Response({'results': [{'id': request_id, **results[request_id]} for request_id in request_ids]})
+        
+        accepted = self.without_conflicts([pending[request_id] for request_id in request_ids if request_id in pending], results)
+        # Hash before opening the transaction so no locks are held meanwhile
+        passwords = dict(zip(
+            (account_request.pk for account_request in accepted),
+            hash_passwords([account_request.password for account_request in accepted]),
+        ))
+        
+        with transaction.atomic():
+            # Lock the requests, so an admin approving them at the same time skips them,
+            # and keep those still pending: the other admin may have committed already
+            locked = set(
+                AccountRequest.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=list(passwords), status='pending').values_list('pk', flat=True)
+            )
+            for account_request in accepted:
+                if account_request.pk not in locked:
+                    results[account_request.pk] = REVIEWED_ELSEWHERE
+            # Accounts created by other approvals since the first check
+            accepted = self.without_conflicts([account_request for account_request in accepted if account_request.pk in locked], results)
+            User.objects.bulk_create([
+                User(
+                    username=account_request.name,
+                    email=account_request.email,
+                    first_name=split_name(account_request.name)[0],
+                    last_name=split_name(account_request.name)[1],
+                    password=passwords[account_request.pk],
+                    is_active=True,
+                    is_staff=False,
+                    is_superuser=False
+                )
+                for account_request in accepted
+            ])
+            # MySQL does not return the ids of bulk inserted rows, so read them back
+            user_ids = dict(
+                User.objects.filter(username__in=[account_request.name for account_request in accepted])
+                .values_list('username', 'id')
+            )
+            # bulk_create skips the post_save signal that creates profiles, and UserProfile.save
+            UserProfile.objects.bulk_create([
+                UserProfile(user_id=user_ids[account_request.name], email_key=normalize_email(account_request.email))
+                for account_request in accepted
+            ])
+            approved = AccountRequest.objects.filter(
+                pk__in=[account_request.pk for account_request in accepted], status='pending'
+            ).update(status='approved')
+            add_to_counter(PENDING_ACCOUNT_REQUESTS, -approved)
+            bump_version('team')
+            for model in (User, UserProfile, AccountRequest):
+                bump_model_version(model)
+        
+        for account_request in accepted:
+            results[account_request.pk] = {'status': 'approved', 'user_id': user_ids[account_request.name]}
+        return Response({'results': [{'id': request_id, **results[request_id]} for request_id in request_ids]})
+    
+    def without_conflicts(self, account_requests, results):
+        """The account requests whose email and username are free, in order; the others get an error in results.
+        
+        Usernames compare without case, as MySQL's default collation makes auth_user.username
+        unique. Within the batch, the first request for an email or username wins.
+        """
+        # Emails and usernames already taken, checked with one query each
+        taken_emails = set(
+            UserProfile.objects.filter(
+                email_key__in=[normalize_email(account_request.email) for account_request in account_requests]
+            ).values_list('email_key', flat=True)
+        )
+        taken_usernames = set(
+            User.objects.annotate(username_key=Lower('username'))
+            .filter(username_key__in=[account_request.name.lower() for account_request in account_requests])
+            .values_list('username_key', flat=True)
+        )
+        
+        accepted = []
+        for account_request in account_requests:
+            email = normalize_email(account_request.email)
+            username = account_request.name.lower()
+            if email in taken_emails:
+                results[account_request.pk] = {'status': 'error', 'error': 'A user with this email already exists'}
+            elif username in taken_usernames:
+                results[account_request.pk] = {'status': 'error', 'error': 'A user with this username already exists'}
+            else:
+                taken_emails.add(email)
+                taken_usernames.add(username)
+                accepted.append(account_request)
+        return accepted
+
+class InternalMessageViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = InternalMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_names = (InternalMessage, 'team')
     
     def get_queryset(self):
         """Return messages where the current user is sender or receiver"""
@@ -134,6 +310,12 @@ class InternalMessageViewSet(viewsets.ModelViewSet):
             Q(sender=self.request.user) | Q(receiver=self.request.user)
         ).order_by('-created_at')
     
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        context = self.get_serializer_context()
+        rows = self.paginate_queryset(INTERNAL_MESSAGE_READ_PLAN.values(queryset, context, self.paginator.get_ordering(queryset)))
+        return self.get_paginated_response(INTERNAL_MESSAGE_READ_PLAN.render(rows, context))
+    
     def perform_create(self, serializer):
         serializer.save(sender=self.request.user)
     
@@ -144,6 +326,7 @@ class InternalMessageViewSet(viewsets.ModelViewSet):
         
         # Get all unique conversations
         conversations = {}
+        unread_counts = dict(UnreadMessageCounter.objects.filter(user=user).values_list('sender_id', 'count'))
         
         # Get messages where user is sender or receiver
         messages = InternalMessage.objects.filter(
@@ -162,18 +345,11 @@ class InternalMessageViewSet(viewsets.ModelViewSet):
             conversation_id = message.conversation_id
             
             if conversation_id not in conversations:
-                # Count unread messages from this user
-                unread_count = InternalMessage.objects.filter(
-                    sender=other_user,
-                    receiver=user,
-                    status='unread'
-                ).count()
-                
                 conversations[conversation_id] = {
                     'user_id': other_user.id,
                     'user_name': other_user_name,
                     'last_message': InternalMessageSerializer(message).data,
-                    'unread_count': unread_count
+                    'unread_count': unread_counts.get(other_user.id, 0)
                 }
         
         return Response(list(conversations.values()))
@@ -196,10 +372,16 @@ class InternalMessageViewSet(viewsets.ModelViewSet):
             (Q(sender=other_user) & Q(receiver=request.user))
         ).order_by('created_at')
         
-        # Mark messages as read
-        messages.filter(sender=other_user, receiver=request.user, status='unread').update(status='read')
+        # Mark messages as read; update() sends no signals, so the change log is written here
+        unread_ids = list(messages.filter(sender=other_user, receiver=request.user, status='unread').values_list('pk', flat=True))
+        with transaction.atomic():
+            marked = InternalMessage.objects.filter(pk__in=unread_ids, status='unread').update(status='read')
+            add_unread(request.user.pk, other_user.pk, -marked)
+        if marked:
+            bump_model_version(InternalMessage)
+            record_changes('messages', unread_ids, 'updated', {request.user.pk, other_user.pk})
         
-        return Response(InternalMessageSerializer(messages, many=True).data)
+        return Response(INTERNAL_MESSAGE_READ_PLAN.serialize(messages))
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -220,20 +402,40 @@ class InternalMessageViewSet(viewsets.ModelViewSet):
         """Get count of unread messages"""
         user_id = request.query_params.get('user_id')
         
+        counters = UnreadMessageCounter.objects.filter(user=request.user)
         if user_id:
-            # Count unread messages from specific user
-            count = InternalMessage.objects.filter(
-                sender_id=user_id,
-                receiver=request.user,
-                status='unread'
-            ).count()
-        else:
-            # Count all unread messages
-            count = InternalMessage.objects.filter(
-                receiver=request.user,
-                status='unread'
-            ).count()
+            # Unread messages from specific user
+            try:
+                counters = counters.filter(sender_id=int(user_id))
+            except ValueError:
+                return Response({'error': 'user_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
         
+        count = counters.aggregate(total=Sum('count'))['total'] or 0
         return Response({'unread_count': count})
 
+class NotificationCountersView(APIView):
+    """Every badge count of the dashboard in one request.
 
+    All of them are read from counters maintained on writes (see
+    NotificationCounter), never counted from the message tables. Counts of
+    contact messages, account requests and event registrations are only
+    returned to staff.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        unread = dict(UnreadMessageCounter.objects.filter(user=request.user, count__gt=0).values_list('sender_id', 'count'))
+        counters = {
+            'unread_messages': sum(unread.values()),
+            'unread_by_user': [{'user_id': user_id, 'unread_count': count} for user_id, count in sorted(unread.items())],
+        }
+        if request.user.is_staff:
+            values = dict(NotificationCounter.objects.filter(
+                name__in=[NEW_CONTACT_MESSAGES, PENDING_ACCOUNT_REQUESTS, PENDING_REGISTRATIONS]
+            ).values_list('name', 'value'))
+            counters.update({
+                'new_contact_messages': values.get(NEW_CONTACT_MESSAGES, 0),
+                'pending_account_requests': values.get(PENDING_ACCOUNT_REQUESTS, 0),
+                'pending_event_registrations': values.get(PENDING_REGISTRATIONS, 0),
+            })
+        return Response(counters)
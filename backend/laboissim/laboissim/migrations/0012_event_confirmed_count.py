@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+def backfill_confirmed_count(apps, schema_editor):
+    Event = apps.get_model('laboissim', 'Event')
+    EventRegistration = apps.get_model('laboissim', 'EventRegistration')
+    counts = (
+        EventRegistration.objects.filter(status='confirmed')
+        .values('event_id')
+        .annotate(total=models.Count('id'))
+    )
+    for row in counts:
+        Event.objects.filter(pk=row['event_id']).update(confirmed_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0011_project_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='confirmed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_confirmed_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+def backfill_reserved_count(apps, schema_editor):
+    Event = apps.get_model('laboissim', 'Event')
+    EventRegistration = apps.get_model('laboissim', 'EventRegistration')
+    counts = (
+        EventRegistration.objects.filter(status__in=['pending', 'confirmed'])
+        .values('event_id')
+        .annotate(total=models.Count('id'))
+    )
+    for row in counts:
+        Event.objects.filter(pk=row['event_id']).update(reserved_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0012_event_confirmed_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='reserved_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='eventregistration',
+            name='status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('confirmed', 'Confirmé'), ('waitlisted', "Liste d'attente"), ('cancelled', 'Annulé')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(fields=['event', 'status', 'registration_date'], name='eventreg_event_status_idx'),
+        ),
+        migrations.RunPython(backfill_reserved_count, migrations.RunPython.noop),
+    ]
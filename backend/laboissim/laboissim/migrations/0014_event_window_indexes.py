@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0013_event_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date', 'end_date'], name='event_start_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['end_date', 'start_date'], name='event_end_start_idx'),
+        ),
+    ]
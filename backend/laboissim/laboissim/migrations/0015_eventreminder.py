@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0014_event_window_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hours_before', models.PositiveIntegerField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('registration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='laboissim.eventregistration')),
+            ],
+            options={
+                'unique_together': {('registration', 'hours_before')},
+            },
+        ),
+    ]
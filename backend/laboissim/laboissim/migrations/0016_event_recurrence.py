@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:00
+
+import django.db.models.deletion
+import laboissim.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0015_eventreminder'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_rule',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.CreateModel(
+            name='EventOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_start', models.DateTimeField()),
+                ('cancelled', models.BooleanField(default=False)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('location', models.CharField(blank=True, default='', max_length=255)),
+                ('confirmed_count', models.PositiveIntegerField(default=0)),
+                ('reserved_count', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='laboissim.event')),
+            ],
+            options={
+                'ordering': ['original_start'],
+                'unique_together': {('event', 'original_start')},
+            },
+            bases=(laboissim.models.SeatHolderMixin, models.Model),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventregistration',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='eventregistration',
+            name='occurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='registrations', to='laboissim.eventoccurrence'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventregistration',
+            unique_together={('event', 'occurrence', 'user')},
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+# auth_user belongs to django.contrib.auth, so its extra indexes are created
+# directly through the schema editor instead of through model state
+AUTH_USER_INDEXES = [
+    models.Index(fields=['date_joined'], name='auth_user_joined_idx'),
+    models.Index(fields=['is_active', 'date_joined'], name='auth_user_active_joined_idx'),
+    models.Index(fields=['last_name', 'first_name'], name='auth_user_name_idx'),
+]
+
+
+def add_auth_user_indexes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    for index in AUTH_USER_INDEXES:
+        schema_editor.add_index(User, index)
+
+
+def remove_auth_user_indexes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    for index in AUTH_USER_INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('laboissim', '0016_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role'], name='userprofile_role_idx'),
+        ),
+        migrations.RunPython(add_auth_user_indexes, remove_auth_user_indexes),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+def populate_email_keys(apps, schema_editor):
+    """Fill UserProfile.email_key, creating missing profiles.
+
+    When several accounts share an email (ignoring case), the key goes to the
+    active account used most recently; the others keep a NULL key and can only
+    log in by username until an admin fixes their address.
+    """
+    User = apps.get_model('auth', 'User')
+    UserProfile = apps.get_model('laboissim', 'UserProfile')
+
+    users = list(User.objects.values_list('id', 'email', 'is_active', 'last_login', 'date_joined'))
+    has_profile = set(UserProfile.objects.values_list('user_id', flat=True))
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user_id) for user_id, *_ in users if user_id not in has_profile],
+        batch_size=1000,
+    )
+
+    def preference(user):
+        user_id, email, is_active, last_login, date_joined = user
+        return (not is_active, -(last_login.timestamp() if last_login else 0), date_joined, user_id)
+
+    owners = {}
+    for user in sorted(users, key=preference):
+        key = (user[1] or '').strip().lower()
+        if key and key not in owners:
+            owners[key] = user[0]
+
+    profiles = list(UserProfile.objects.filter(user_id__in=owners.values()))
+    key_by_user = {user_id: key for key, user_id in owners.items()}
+    for profile in profiles:
+        profile.email_key = key_by_user[profile.user_id]
+    UserProfile.objects.bulk_update(profiles, ['email_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0018_user_deletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True, unique=True),
+        ),
+        migrations.RunPython(populate_email_keys, migrations.RunPython.noop),
+    ]
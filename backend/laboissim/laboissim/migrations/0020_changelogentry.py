@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0019_userprofile_email_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('created', 'Création'), ('updated', 'Modification'), ('deleted', 'Suppression')], max_length=10)),
+                ('recipient_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [
+                    models.Index(fields=['collection', 'id'], name='changelog_collection_idx'),
+                    models.Index(fields=['collection', 'object_id', 'id'], name='changelog_object_idx'),
+                    models.Index(fields=['created_at'], name='changelog_created_idx'),
+                ],
+            },
+        ),
+    ]
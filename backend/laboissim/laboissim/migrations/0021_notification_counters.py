@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    """Start the counters from the current tables"""
+    NotificationCounter = apps.get_model('laboissim', 'NotificationCounter')
+    UnreadMessageCounter = apps.get_model('laboissim', 'UnreadMessageCounter')
+    ContactMessage = apps.get_model('laboissim', 'ContactMessage')
+    AccountRequest = apps.get_model('laboissim', 'AccountRequest')
+    EventRegistration = apps.get_model('laboissim', 'EventRegistration')
+    InternalMessage = apps.get_model('laboissim', 'InternalMessage')
+
+    NotificationCounter.objects.bulk_create([
+        NotificationCounter(name='contact_messages_new', value=ContactMessage.objects.filter(status='new').count()),
+        NotificationCounter(name='account_requests_pending', value=AccountRequest.objects.filter(status='pending').count()),
+        NotificationCounter(name='event_registrations_pending', value=EventRegistration.objects.filter(status='pending').count()),
+    ])
+    UnreadMessageCounter.objects.bulk_create([
+        UnreadMessageCounter(user_id=row['receiver_id'], sender_id=row['sender_id'], count=row['count'])
+        for row in InternalMessage.objects.filter(status='unread').values('receiver_id', 'sender_id').annotate(count=Count('pk')).order_by()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0020_changelogentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UnreadMessageCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'sender')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-20 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0021_notification_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='calendar_feed_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-20 10:00
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_registrations(apps, schema_editor):
+    """Keep the oldest registration of each user to an event or occurrence.
+
+    The former unique_together did not cover registrations without an
+    occurrence, so duplicates may exist; the seat counters of the events and
+    occurrences they held seats of are recomputed.
+    """
+    Event = apps.get_model('laboissim', 'Event')
+    EventOccurrence = apps.get_model('laboissim', 'EventOccurrence')
+    EventRegistration = apps.get_model('laboissim', 'EventRegistration')
+
+    duplicated = (
+        EventRegistration.objects.values('event_id', 'occurrence_key', 'user_id')
+        .annotate(total=models.Count('id'), first=models.Min('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    event_ids = set()
+    for row in duplicated:
+        EventRegistration.objects.filter(
+            event_id=row['event_id'], occurrence_key=row['occurrence_key'], user_id=row['user_id']
+        ).exclude(pk=row['first']).delete()
+        event_ids.add(row['event_id'])
+
+    for event_id in event_ids:
+        counts = (
+            EventRegistration.objects.filter(event_id=event_id)
+            .values('occurrence_id')
+            .annotate(
+                confirmed=models.Count('id', filter=models.Q(status='confirmed')),
+                reserved=models.Count('id', filter=models.Q(status__in=['pending', 'confirmed'])),
+            )
+            .order_by()
+        )
+        Event.objects.filter(pk=event_id).update(confirmed_count=0, reserved_count=0)
+        EventOccurrence.objects.filter(event_id=event_id).update(confirmed_count=0, reserved_count=0)
+        for row in counts:
+            holders = EventOccurrence.objects.filter(pk=row['occurrence_id']) if row['occurrence_id'] else Event.objects.filter(pk=event_id)
+            holders.update(confirmed_count=row['confirmed'], reserved_count=row['reserved'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0022_userprofile_calendar_feed_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventregistration',
+            name='occurrence_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce(models.F('occurrence'), models.Value(0)), output_field=models.BigIntegerField(), serialize=False),
+        ),
+        migrations.RunPython(remove_duplicate_registrations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventregistration',
+            constraint=models.UniqueConstraint(fields=('event', 'occurrence_key', 'user'), name='eventreg_unique_user'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventregistration',
+            unique_together=set(),
+        ),
+    ]
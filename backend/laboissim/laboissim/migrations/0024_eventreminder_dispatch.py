@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-20 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laboissim', '0023_eventregistration_unique_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventreminder',
+            name='dispatch',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
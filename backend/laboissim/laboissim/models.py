@@ -1,10 +1,16 @@
-from django.db import models
+import copy
+from datetime import timedelta
+from django.db import models, transaction
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_save, post_delete, post_init, pre_delete
 from django.dispatch import receiver
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
+from .recurrence import RecurrenceRule
+from .versioning import bump_model_version, bump_user_version, bump_version
 
 class SiteContent(models.Model):
     contact_address = models.CharField(max_length=255, blank=True, default='')
@@ -29,6 +35,17 @@ class exterieurs(models.Model):
     def __str__(self):
         return self.name
 
+def normalize_email(email):
+    """Case-folded key for unique, indexed email lookups (None when there is no email)"""
+    return (email or '').strip().lower() or None
+
+def get_user_by_email(email):
+    """The user owning an email address, whatever its case, via the unique UserProfile.email_key index"""
+    key = normalize_email(email)
+    if key is None:
+        return None
+    return User.objects.select_related('profile').filter(profile__email_key=key).first()
+
 class UserProfile(models.Model):
     ROLE_CHOICES = (
         ('member', 'Member'),
@@ -50,10 +67,31 @@ class UserProfile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_team_lead = models.BooleanField(default=False)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='member')
+    # Normalized copy of user.email, kept in sync on save
+    email_key = models.CharField(max_length=254, unique=True, null=True, blank=True, editable=False)
+    # Signed into the personal calendar feed URL; replacing it revokes the old URLs
+    calendar_feed_key = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['role'], name='userprofile_role_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username}'s profile"
 
+    def save(self, *args, **kwargs):
+        key = normalize_email(self.user.email)
+        if key != self.email_key and key is not None and UserProfile.objects.filter(email_key=key).exclude(pk=self.pk).exists():
+            # Another account owns the address (duplicates predating the unique key, see
+            # migration 0019): this one keeps no key and logs in by username
+            key = None
+        self.email_key = key
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email_key' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'email_key']
+        super().save(*args, **kwargs)
+
     @property
     def full_name(self):
         return f"{self.user.first_name} {self.user.last_name}".strip() or self.user.username
@@ -73,7 +111,9 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
     if hasattr(instance, 'profile'):
         instance.profile.save()
 
@@ -165,6 +205,11 @@ class InternalMessage(models.Model):
     
     def __str__(self):
         return f"{self.sender.username} -> {self.receiver.username}: {self.subject}"
+
+    def save(self, *args, **kwargs):
+        # Keep the row write and the unread counter update in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     @property
     def conversation_id(self):
@@ -172,7 +217,93 @@ class InternalMessage(models.Model):
         user_ids = sorted([self.sender.id, self.receiver.id])
         return f"conv_{user_ids[0]}_{user_ids[1]}"
 
-class Event(models.Model):
+class SeatHolderMixin:
+    """Capacity helpers shared by Event and EventOccurrence, which both carry seat counters"""
+    # Only ever changed by UPDATE ... SET count = count + delta (see _update_seat_counters)
+    COUNTER_FIELDS = ('confirmed_count', 'reserved_count')
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+            super().save(*args, **kwargs)
+            return
+        # The counters this instance loaded may be stale: writing them back would undo
+        # registrations made since, and reopen full events
+        deferred = self.get_deferred_fields()
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+        ]
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+
+    @property
+    def registered_count(self):
+        return self.confirmed_count
+
+    @property
+    def is_full(self):
+        if self.max_participants is None:
+            return False
+        return self.reserved_count >= self.max_participants
+
+    def promote_waitlist(self):
+        """Move waitlisted registrations into free seats, oldest first.
+
+        Must be called inside a transaction holding the event row lock.
+        """
+        self.refresh_from_db(fields=['reserved_count'])
+        waitlist = self.seat_registrations().filter(status='waitlisted').order_by('registration_date', 'id')
+        if self.max_participants is not None:
+            free_seats = self.max_participants - self.reserved_count
+            if free_seats <= 0:
+                return []
+            waitlist = waitlist[:free_seats]
+        promoted = list(waitlist)
+        for registration in promoted:
+            registration.status = 'pending'
+            registration.save(update_fields=['status'])
+        return promoted
+
+    def change_status(self, registrations, new_status):
+        """Move some of this holder's registrations to new_status in one UPDATE.
+
+        Registrations that do not hold a seat only get one while seats are
+        free, oldest first; the others keep their status. Returns the
+        registrations updated. Must be called inside a transaction holding the
+        event row lock; the caller bumps the events version.
+        """
+        seat_statuses = EventRegistration.SEAT_STATUSES
+        self.refresh_from_db(fields=['confirmed_count', 'reserved_count'])
+        registrations = sorted(
+            (registration for registration in registrations if registration.status != new_status),
+            key=lambda registration: (registration.registration_date, registration.pk),
+        )
+        if new_status in seat_statuses and self.max_participants is not None:
+            free_seats = self.max_participants - self.reserved_count
+            granted = []
+            for registration in registrations:
+                if registration.status not in seat_statuses:
+                    if free_seats <= 0:
+                        continue
+                    free_seats -= 1
+                granted.append(registration)
+            registrations = granted
+        if not registrations:
+            return []
+
+        EventRegistration.objects.filter(pk__in=[registration.pk for registration in registrations]).update(status=new_status)
+        # The UPDATE bypasses the registration signals: apply their counter changes
+        previous = [registration.status for registration in registrations]
+        type(self).objects.filter(pk=self.pk).update(
+            confirmed_count=F('confirmed_count') + sum(int(new_status == 'confirmed') - int(status == 'confirmed') for status in previous),
+            reserved_count=F('reserved_count') + sum(int(new_status in seat_statuses) - int(status in seat_statuses) for status in previous),
+        )
+        add_to_counter(PENDING_REGISTRATIONS, sum(int(new_status == 'pending') - int(status == 'pending') for status in previous))
+        for registration in registrations:
+            registration.status = registration._original_status = new_status
+        return registrations
+
+class Event(SeatHolderMixin, models.Model):
     EVENT_TYPES = [
         ('conference', 'Conférence'),
         ('seminar', 'Séminaire'),
@@ -188,7 +319,15 @@ class Event(models.Model):
     location = models.CharField(max_length=255)
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
+    # RRULE subset (see recurrence.py); start_date/end_date are then the first occurrence
+    recurrence_rule = models.CharField(max_length=255, blank=True, default='')
+    # End of the last occurrence, derived on save; null for open-ended series
+    recurrence_end = models.DateTimeField(null=True, blank=True)
     max_participants = models.PositiveIntegerField(null=True, blank=True)
+    # Maintained by the EventRegistration signals below, never set directly.
+    # For recurring events each occurrence keeps its own counters.
+    confirmed_count = models.PositiveIntegerField(default=0)
+    reserved_count = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_events')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -196,28 +335,150 @@ class Event(models.Model):
     
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Window queries filter on start_date < end AND end_date > start;
+            # either column may be the selective one depending on the window
+            models.Index(fields=['start_date', 'end_date'], name='event_start_end_idx'),
+            models.Index(fields=['end_date', 'start_date'], name='event_end_start_idx'),
+        ]
     
     def __str__(self):
         return self.title
-    
+
+    def save(self, *args, **kwargs):
+        if self.recurrence_rule:
+            rule = RecurrenceRule.parse(self.recurrence_rule)
+            self.recurrence_end = rule.series_end(self.start_date, self.end_date - self.start_date)
+        else:
+            self.recurrence_end = None
+        super().save(*args, **kwargs)
+
     @property
-    def registered_count(self):
-        return self.registrations.filter(status='confirmed').count()
+    def is_recurring(self):
+        return bool(self.recurrence_rule)
+
+    def seat_registrations(self):
+        return self.registrations.filter(occurrence__isnull=True)
+
+    def get_occurrence(self, original_start):
+        """Return the EventOccurrence row for one occurrence of the series, creating it on first use.
+
+        Returns None when original_start is not an occurrence of the rule.
+        """
+        rule = RecurrenceRule.parse(self.recurrence_rule)
+        starts = rule.occurrences(self.start_date, self.end_date - self.start_date, original_start, original_start + timedelta(seconds=1))
+        if original_start not in starts:
+            return None
+        occurrence, _ = EventOccurrence.objects.get_or_create(event=self, original_start=original_start)
+        return occurrence
+
+    def occurrence_instance(self, original_start, override=None):
+        """Copy of this event standing for one occurrence, with overrides and counters applied"""
+        occurrence = copy.copy(self)
+        occurrence.occurrence_start = original_start
+        occurrence.start_date = original_start
+        occurrence.end_date = original_start + (self.end_date - self.start_date)
+        occurrence.confirmed_count = occurrence.reserved_count = 0
+        if override is not None:
+            occurrence.start_date = override.start_date or occurrence.start_date
+            occurrence.end_date = override.end_date or occurrence.end_date
+            occurrence.title = override.title or self.title
+            occurrence.location = override.location or self.location
+            occurrence.confirmed_count = override.confirmed_count
+            occurrence.reserved_count = override.reserved_count
+        return occurrence
+
+    def expand(self, window_start, window_end=None, overrides=()):
+        """Yield occurrence instances overlapping [window_start, window_end).
+
+        Only the occurrences inside the window are computed. ``overrides`` are
+        this event's EventOccurrence rows for the window (see occurrence_overrides).
+        """
+        def overlaps(occurrence):
+            return (occurrence.end_date > window_start
+                    and (window_end is None or occurrence.start_date < window_end))
+
+        overrides = {override.original_start: override for override in overrides}
+        rule = RecurrenceRule.parse(self.recurrence_rule)
+        for original_start in rule.occurrences(self.start_date, self.end_date - self.start_date, window_start, window_end):
+            override = overrides.pop(original_start, None)
+            if override is not None and override.cancelled:
+                continue
+            occurrence = self.occurrence_instance(original_start, override)
+            if overlaps(occurrence):
+                yield occurrence
+        # Occurrences rescheduled into the window from outside it
+        for override in overrides.values():
+            if not override.cancelled and override.start_date:
+                occurrence = self.occurrence_instance(override.original_start, override)
+                if overlaps(occurrence):
+                    yield occurrence
+
+class EventOccurrence(SeatHolderMixin, models.Model):
+    """One occurrence of a recurring event, materialized only when it is cancelled,
+    rescheduled or edited, or when someone registers for it"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='occurrences')
+    original_start = models.DateTimeField()
+    cancelled = models.BooleanField(default=False)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    title = models.CharField(max_length=255, blank=True, default='')
+    location = models.CharField(max_length=255, blank=True, default='')
+    confirmed_count = models.PositiveIntegerField(default=0)
+    reserved_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['original_start']
+        unique_together = ['event', 'original_start']
     
+    def __str__(self):
+        return f"{self.event.title} - {self.original_start:%Y-%m-%d %H:%M}"
+
     @property
-    def is_full(self):
-        if self.max_participants is None:
-            return False
-        return self.registered_count >= self.max_participants
+    def max_participants(self):
+        return self.event.max_participants
+
+    def seat_registrations(self):
+        return self.registrations.all()
+
+def occurrence_overrides(events, window_start, window_end=None):
+    """EventOccurrence rows relevant to a window for the given recurring events, by event id, in one query"""
+    events = [event for event in events if event.is_recurring]
+    if not events:
+        return {}
+    longest = max(event.end_date - event.start_date for event in events)
+    in_window = Q(original_start__gte=window_start - longest)
+    moved_in = Q(end_date__gt=window_start)
+    if window_end is not None:
+        in_window &= Q(original_start__lt=window_end)
+        moved_in &= Q(start_date__lt=window_end)
+    overrides = {}
+    for override in EventOccurrence.objects.filter(event__in=events).filter(in_window | moved_in):
+        overrides.setdefault(override.event_id, []).append(override)
+    return overrides
 
 class EventRegistration(models.Model):
     STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('confirmed', 'Confirmé'),
+        ('waitlisted', 'Liste d\'attente'),
         ('cancelled', 'Annulé'),
     ]
+    # Statuses holding one of the event's max_participants seats
+    SEAT_STATUSES = ('pending', 'confirmed')
     
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='registrations')
+    # Set for registrations to one occurrence of a recurring event
+    occurrence = models.ForeignKey(EventOccurrence, on_delete=models.CASCADE, null=True, blank=True, related_name='registrations')
+    # occurrence_id, or 0 for a registration to the event itself. The unique constraint
+    # uses it because NULLs are distinct in unique indexes, and MySQL has no partial
+    # index to cover the NULL rows separately.
+    occurrence_key = models.GeneratedField(
+        expression=Coalesce(F('occurrence'), Value(0)),
+        output_field=models.BigIntegerField(),
+        db_persist=True,
+        serialize=False,
+    )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='event_registrations')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     registration_date = models.DateTimeField(auto_now_add=True)
@@ -225,11 +486,104 @@ class EventRegistration(models.Model):
     
     class Meta:
         ordering = ['-registration_date']
-        unique_together = ['event', 'user']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'occurrence_key', 'user'], name='eventreg_unique_user'),
+        ]
+        indexes = [
+            models.Index(fields=['event', 'status', 'registration_date'], name='eventreg_event_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.event.title}"
 
+    def save(self, *args, **kwargs):
+        # Keep the row write and the seat counter update in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @property
+    def seat_holder(self):
+        """The Event or EventOccurrence whose seats this registration counts against"""
+        return self.occurrence if self.occurrence_id else self.event
+
+class EventReminder(models.Model):
+    """Record of a reminder sent for a registration, so reminders are sent once"""
+    registration = models.ForeignKey(EventRegistration, on_delete=models.CASCADE, related_name='reminders')
+    hours_before = models.PositiveIntegerField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+    # Token of the send_event_reminders run that inserted the row: concurrent runs
+    # each send only the reminders they claimed
+    dispatch = models.CharField(max_length=32, blank=True, default='', editable=False)
+    
+    class Meta:
+        unique_together = ['registration', 'hours_before']
+    
+    def __str__(self):
+        return f"{self.registration} - {self.hours_before}h"
+
+def _update_seat_counters(registration, previous_status, new_status):
+    confirmed_delta = int(new_status == 'confirmed') - int(previous_status == 'confirmed')
+    reserved_delta = (int(new_status in EventRegistration.SEAT_STATUSES)
+                      - int(previous_status in EventRegistration.SEAT_STATUSES))
+    counters = {}
+    if confirmed_delta:
+        counters['confirmed_count'] = F('confirmed_count') + confirmed_delta
+    if reserved_delta:
+        counters['reserved_count'] = F('reserved_count') + reserved_delta
+    if not counters:
+        return
+    if registration.occurrence_id:
+        EventOccurrence.objects.filter(pk=registration.occurrence_id).update(**counters)
+    else:
+        Event.objects.filter(pk=registration.event_id).update(**counters)
+
+# Signals keeping the seat counters in sync with registrations
+@receiver(post_init, sender=EventRegistration)
+def remember_registration_status(sender, instance, **kwargs):
+    instance._original_status = instance.__dict__.get('status') if instance.pk else None
+
+@receiver(post_save, sender=EventRegistration)
+def update_seat_counters_on_save(sender, instance, created, **kwargs):
+    previous = None if created else instance._original_status
+    _update_seat_counters(instance, previous, instance.status)
+    add_to_counter(PENDING_REGISTRATIONS, int(instance.status == 'pending') - int(previous == 'pending'))
+    instance._original_status = instance.status
+
+@receiver(post_delete, sender=EventRegistration)
+def update_seat_counters_on_delete(sender, instance, **kwargs):
+    _update_seat_counters(instance, instance._original_status, None)
+    add_to_counter(PENDING_REGISTRATIONS, -int(instance._original_status == 'pending'))
+
+# Invalidate cached event feeds whenever events, occurrences or registrations change
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=EventOccurrence)
+@receiver(post_delete, sender=EventOccurrence)
+@receiver(post_save, sender=EventRegistration)
+@receiver(post_delete, sender=EventRegistration)
+def bump_events_version(sender, **kwargs):
+    bump_version('events')
+
+# Invalidate the cached site content in every worker
+@receiver(post_save, sender=SiteContent)
+@receiver(post_delete, sender=SiteContent)
+def bump_site_content_version(sender, created=False, **kwargs):
+    # Creating the default row changes nothing readers could have cached
+    if not created:
+        bump_version('site_content')
+
+# Invalidate the cached team directory and authenticated user whenever users or their profiles change
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def bump_user_versions(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which neither cache relies on
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_version('team')
+    bump_user_version(instance.user_id if sender is UserProfile else instance.pk)
+
 class Project(models.Model):
     STATUS_CHOICES = (
         ('planning', 'En Planification'),
@@ -278,4 +632,324 @@ class ProjectDocument(models.Model):
         ordering = ['-uploaded_at']
     
     def __str__(self):
-        return f"{self.name} - {self.project.title}"
\ No newline at end of file
+        return f"{self.name} - {self.project.title}"
+class UserDeletion(models.Model):
+    """Background deletion of a user account and everything it owns, processed in batches
+    by the process_user_deletions command"""
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+    
+    # Not a foreign key: the job outlives the user it deletes
+    target_user_id = models.IntegerField()
+    username = models.CharField(max_length=150)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    step = models.CharField(max_length=50, blank=True, default='')
+    # Rows deleted so far, by step
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='userdeletion_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Suppression de {self.username} ({self.get_status_display()})"
+
+# Names of the global NotificationCounter rows
+NEW_CONTACT_MESSAGES = 'contact_messages_new'
+PENDING_ACCOUNT_REQUESTS = 'account_requests_pending'
+PENDING_REGISTRATIONS = 'event_registrations_pending'
+
+class NotificationCounter(models.Model):
+    """Count of rows in a given status, kept up to date after every write so badges never COUNT(*) (see add_to_counter)"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+class UnreadMessageCounter(models.Model):
+    """Unread internal messages from sender to user, updated in the writer's transaction: one row per pair is no hot spot"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='unread_counters')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['user', 'sender']
+    
+    def __str__(self):
+        return f"{self.sender_id} -> {self.user_id}: {self.count}"
+
+def add_to_counter(name, delta):
+    """Add delta to a NotificationCounter once the caller's transaction commits.
+
+    Each counter is a single row every writer of its status goes through:
+    updated inside the caller's transaction, its lock would be held until that
+    commits and serialize all of them (registrations hold event locks meanwhile).
+    Applied after the commit, it is held for one autocommit UPDATE. A crash in
+    between leaves the counter off by delta until recount_notification_counters
+    runs; a rollback leaves it untouched.
+    """
+    if delta:
+        transaction.on_commit(lambda: _apply_to_counter(name, delta))
+
+def _apply_to_counter(name, delta):
+    if not NotificationCounter.objects.filter(name=name).update(value=F('value') + delta):
+        NotificationCounter.objects.get_or_create(name=name)
+        NotificationCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+def add_unread(user_id, sender_id, delta):
+    """Add delta to the unread messages user_id has from sender_id"""
+    counters = UnreadMessageCounter.objects.filter(user_id=user_id, sender_id=sender_id)
+    # A missing row is only created to add to: when decrementing it may be going away with its user
+    if delta and not counters.update(count=F('count') + delta) and delta > 0:
+        UnreadMessageCounter.objects.get_or_create(user_id=user_id, sender_id=sender_id)
+        counters.update(count=F('count') + delta)
+
+def recount_notification_counters():
+    """Recompute every counter from the tables, to repair drift"""
+    with transaction.atomic():
+        for name, queryset in (
+            (NEW_CONTACT_MESSAGES, ContactMessage.objects.filter(status='new')),
+            (PENDING_ACCOUNT_REQUESTS, AccountRequest.objects.filter(status='pending')),
+            (PENDING_REGISTRATIONS, EventRegistration.objects.filter(status='pending')),
+        ):
+            NotificationCounter.objects.update_or_create(name=name, defaults={'value': queryset.count()})
+        UnreadMessageCounter.objects.all().delete()
+        UnreadMessageCounter.objects.bulk_create([
+            UnreadMessageCounter(user_id=row['receiver_id'], sender_id=row['sender_id'], count=row['count'])
+            for row in InternalMessage.objects.filter(status='unread').values('receiver_id', 'sender_id').annotate(count=Count('pk')).order_by()
+        ], batch_size=1000)
+
+class ChangeLogEntry(models.Model):
+    """Append-only log of changes to the collections clients sync incrementally (see change_views.py).
+
+    Entries with a recipient_id are only shown to that user; the others to
+    every reader of the collection. The compact_change_log command drops
+    superseded and expired entries.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Création'),
+        ('updated', 'Modification'),
+        ('deleted', 'Suppression'),
+    ]
+    
+    collection = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Not a foreign key: entries must outlive the users they were meant for
+    recipient_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['collection', 'id'], name='changelog_collection_idx'),
+            models.Index(fields=['collection', 'object_id', 'id'], name='changelog_object_idx'),
+            models.Index(fields=['created_at'], name='changelog_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.collection} {self.object_id} {self.action}"
+
+def record_changes(collection, object_ids, action, recipients=None):
+    """Append change log entries for object_ids, visible to recipients only when given.
+
+    recipients is a set of user ids, or a dict of sets by object id. The
+    entries are inserted once the surrounding transaction commits: their ids
+    then follow commit order, so the feed cursor cannot move past an entry a
+    long transaction has yet to commit. A crash between the commit and the
+    insert loses those entries; clients catch up on the next change of the
+    objects, or by reloading the collection.
+    """
+    entries = []
+    for object_id in object_ids:
+        users = recipients.get(object_id, ()) if isinstance(recipients, dict) else recipients
+        if users is None:
+            entries.append(ChangeLogEntry(collection=collection, object_id=object_id, action=action))
+        else:
+            entries.extend(
+                ChangeLogEntry(collection=collection, object_id=object_id, action=action, recipient_id=user_id)
+                for user_id in users
+            )
+    if entries:
+        transaction.on_commit(lambda: ChangeLogEntry.objects.bulk_create(entries))
+
+# Per-model versions for conditional GETs (see conditional.py). Queryset update() and
+# bulk_create() send no signals, so their callers bump with bump_model_version.
+# Reminders and deletion jobs are internal bookkeeping no client reads.
+VERSIONED_MODELS = [
+    User, SiteContent, exterieurs, UserProfile, UserFile, Publication, ContactMessage, AccountRequest,
+    InternalMessage, Event, EventOccurrence, EventRegistration, Project, ProjectDocument,
+]
+
+def bump_model_version_on_change(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_model_version(sender)
+
+def bump_model_versions_on_m2m_change(sender, instance, action, model, **kwargs):
+    # Each side of the relation lists the other one
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_model_version(type(instance))
+        bump_model_version(model)
+
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version_on_change, sender=versioned_model, dispatch_uid=f'model_version_save_{versioned_model._meta.label_lower}')
+    post_delete.connect(bump_model_version_on_change, sender=versioned_model, dispatch_uid=f'model_version_delete_{versioned_model._meta.label_lower}')
+
+for through in (
+    Publication.tagged_members.through, Publication.tagged_externals.through,
+    Publication.attached_files.through, Project.files.through, Project.team_members.through,
+):
+    m2m_changed.connect(bump_model_versions_on_m2m_change, sender=through, dispatch_uid=f'model_version_m2m_{through._meta.label_lower}')
+
+# Change log of the synced collections. Messages and projects are private, so
+# their entries go to the users who can see them.
+CHANGE_FEED_COLLECTIONS = {
+    UserFile: 'files',
+    Publication: 'publications',
+    Event: 'events',
+    Project: 'projects',
+    InternalMessage: 'messages',
+}
+
+def project_audiences(project_ids):
+    """{project id: ids of the users who can see it}: its creator and team members"""
+    audiences = {project_id: set() for project_id in project_ids}
+    for project_id, created_by_id in Project.objects.filter(pk__in=project_ids).values_list('pk', 'created_by_id'):
+        audiences[project_id].add(created_by_id)
+    for project_id, user_id in Project.team_members.through.objects.filter(project_id__in=project_ids).values_list('project_id', 'user_id'):
+        audiences[project_id].add(user_id)
+    return audiences
+
+def _change_recipients(instance):
+    if isinstance(instance, InternalMessage):
+        return {instance.sender_id, instance.receiver_id}
+    if isinstance(instance, Project):
+        # Deleted projects lost their team before post_delete, see remember_project_audience
+        return getattr(instance, '_change_audience', None) or project_audiences([instance.pk])[instance.pk]
+    return None
+
+@receiver(post_save, sender=UserFile)
+@receiver(post_save, sender=Publication)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=InternalMessage)
+def record_saved(sender, instance, created, **kwargs):
+    record_changes(CHANGE_FEED_COLLECTIONS[sender], [instance.pk], 'created' if created else 'updated', _change_recipients(instance))
+
+@receiver(pre_delete, sender=Project)
+def remember_project_audience(sender, instance, **kwargs):
+    instance._change_audience = project_audiences([instance.pk])[instance.pk]
+
+@receiver(pre_delete, sender=UserFile)
+def record_attaching_publications(sender, instance, **kwargs):
+    # The attachment rows go with the file, without m2m_changed
+    record_changes('publications', list(instance.publications.values_list('pk', flat=True)), 'updated')
+
+@receiver(post_delete, sender=UserFile)
+@receiver(post_delete, sender=Publication)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=InternalMessage)
+def record_deleted(sender, instance, **kwargs):
+    record_changes(CHANGE_FEED_COLLECTIONS[sender], [instance.pk], 'deleted', _change_recipients(instance))
+
+# Occurrences and registrations change what an event shows (counters, own registration)
+@receiver(post_save, sender=EventOccurrence)
+@receiver(post_delete, sender=EventOccurrence)
+@receiver(post_save, sender=EventRegistration)
+@receiver(post_delete, sender=EventRegistration)
+def record_event_children(sender, instance, **kwargs):
+    record_changes('events', [instance.event_id], 'updated')
+
+@receiver(post_save, sender=ProjectDocument)
+@receiver(post_delete, sender=ProjectDocument)
+def record_project_documents(sender, instance, **kwargs):
+    record_changes('projects', [instance.project_id], 'updated', project_audiences([instance.project_id]))
+
+@receiver(m2m_changed, sender=Publication.tagged_members.through)
+@receiver(m2m_changed, sender=Publication.tagged_externals.through)
+@receiver(m2m_changed, sender=Publication.attached_files.through)
+def record_publication_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        record_changes('publications', pk_set if reverse else [instance.pk], 'updated')
+    elif action == 'pre_clear' and reverse:
+        record_changes('publications', list(sender.objects.filter(**{_m2m_source(sender, instance): instance}).values_list('publication_id', flat=True)), 'updated')
+    elif action == 'post_clear' and not reverse:
+        record_changes('publications', [instance.pk], 'updated')
+
+@receiver(m2m_changed, sender=Project.team_members.through)
+@receiver(m2m_changed, sender=Project.files.through)
+def record_project_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Remember who loses access before the rows are gone
+        instance._change_cleared = (
+            project_audiences([instance.pk])[instance.pk] if not reverse
+            else set(sender.objects.filter(**{_m2m_source(sender, instance): instance}).values_list('project_id', flat=True))
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    project_ids = list(pk_set) if reverse and pk_set else ([instance.pk] if not reverse else list(getattr(instance, '_change_cleared', ())))
+    audiences = project_audiences(project_ids)
+    if sender is Project.team_members.through and action != 'post_add':
+        # Removed members are told, so their copy drops the project
+        removed = {instance.pk} if reverse else (set(pk_set) if pk_set else getattr(instance, '_change_cleared', set()))
+        for audience in audiences.values():
+            audience |= removed
+    record_changes('projects', project_ids, 'updated', audiences)
+
+def _m2m_source(through, instance):
+    """Name of the through model's foreign key to instance's model"""
+    return next(field.name for field in through._meta.fields if field.related_model is type(instance))
+
+# Notification counters. Queryset update() sends no signals: its callers adjust the counters.
+COUNTED_STATUSES = {
+    ContactMessage: (NEW_CONTACT_MESSAGES, 'new'),
+    AccountRequest: (PENDING_ACCOUNT_REQUESTS, 'pending'),
+}
+
+@receiver(post_init, sender=ContactMessage)
+@receiver(post_init, sender=AccountRequest)
+@receiver(post_init, sender=InternalMessage)
+def remember_counted_status(sender, instance, **kwargs):
+    instance._original_status = instance.__dict__.get('status') if instance.pk else None
+    if sender is InternalMessage:
+        instance._original_pair = (instance.__dict__.get('receiver_id'), instance.__dict__.get('sender_id'))
+
+def _count_status_change(instance, previous, new):
+    if isinstance(instance, InternalMessage):
+        if previous == 'unread':
+            add_unread(*instance._original_pair, -1)
+        if new == 'unread':
+            add_unread(instance.receiver_id, instance.sender_id, 1)
+        return
+    name, counted = COUNTED_STATUSES[type(instance)]
+    add_to_counter(name, int(new == counted) - int(previous == counted))
+
+@receiver(post_save, sender=ContactMessage)
+@receiver(post_save, sender=AccountRequest)
+@receiver(post_save, sender=InternalMessage)
+def update_notification_counters_on_save(sender, instance, created, **kwargs):
+    _count_status_change(instance, None if created else instance._original_status, instance.status)
+    instance._original_status = instance.status
+    if sender is InternalMessage:
+        instance._original_pair = (instance.receiver_id, instance.sender_id)
+
+@receiver(post_delete, sender=ContactMessage)
+@receiver(post_delete, sender=AccountRequest)
+@receiver(post_delete, sender=InternalMessage)
+def update_notification_counters_on_delete(sender, instance, **kwargs):
+    _count_status_change(instance, instance._original_status, None)
@@ -0,0 +1,156 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor holds the ordering values of the last row of a page; the next page
+starts strictly after it, so every page is an index range scan whatever its
+depth, and rows inserted meanwhile never shift or duplicate results.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder truncates to milliseconds, which would skip or repeat rows
+        if isinstance(o, date):
+            return o.isoformat()
+        return super().default(o)
+
+def encode_cursor(values):
+    data = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(token, size):
+    try:
+        values = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise serializers.ValidationError({'cursor': 'Curseur invalide'})
+    if not isinstance(values, list) or len(values) != size:
+        raise serializers.ValidationError({'cursor': 'Curseur invalide'})
+    return values
+
+def keyset_filter(ordering, values):
+    """Q selecting the rows after ``values`` for an ordering such as ['-date_joined', 'id']"""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    # The OR alone makes the database walk the index from its start, like an
+    # OFFSET would: bounding the leading column turns it into a range seek
+    first, value = ordering[0], values[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": value})
+    return bound & condition
+
+def _page_queryset(queryset, ordering, cursor, page_size):
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        try:
+            queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, len(ordering))))
+        except (ValueError, TypeError, DjangoValidationError):
+            # Well-formed JSON whose values do not fit the ordering fields
+            raise serializers.ValidationError({'cursor': 'Curseur invalide'})
+    # One extra row tells whether there is a next page
+    return queryset[:page_size + 1]
+
+def _page(rows, ordering, page_size, key):
+    key = key or (lambda row: [row[field.lstrip('-')] for field in ordering])
+    next_cursor = encode_cursor(key(rows[page_size - 1])) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+def keyset_page(queryset, ordering, cursor=None, page_size=50, key=None):
+    """Return (rows, next_cursor) for one page of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` must end with a unique field so the order is total. ``key``
+    extracts the ordering values from a row and defaults to dict lookups, for
+    querysets projected with values().
+    """
+    rows = list(_page_queryset(queryset, ordering, cursor, page_size))
+    return _page(rows, ordering, page_size, key)
+
+async def akeyset_page(queryset, ordering, cursor=None, page_size=50, key=None):
+    """keyset_page() for async views"""
+    rows = [row async for row in _page_queryset(queryset, ordering, cursor, page_size)]
+    return _page(rows, ordering, page_size, key)
+
+class KeysetPagination(BasePagination):
+    """Default pagination for list endpoints.
+
+    Pages follow the queryset ordering (or the model's Meta.ordering) with the
+    primary key as tie-breaker. The body stays a plain list, as before
+    pagination existed; the next page is announced in the Link header
+    (rel="next") and in X-Next-Cursor.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, queryset, view=None):
+        ordering = [field for field in (queryset.query.order_by or queryset.model._meta.ordering) if isinstance(field, str)]
+        if not any(field.lstrip('-') in ('pk', queryset.model._meta.pk.name) for field in ordering):
+            ordering.append('-pk' if ordering and ordering[0].startswith('-') else 'pk')
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, settings.REST_FRAMEWORK['PAGE_SIZE']))
+        except ValueError:
+            raise serializers.ValidationError({self.page_size_query_param: 'Nombre invalide'})
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(queryset, view)
+        rows, self.next_cursor = keyset_page(
+            queryset,
+            ordering,
+            request.query_params.get(self.cursor_query_param),
+            self.get_page_size(request),
+            key=self.get_key(ordering),
+        )
+        return rows
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views"""
+        self.request = request
+        ordering = self.get_ordering(queryset, view)
+        rows, self.next_cursor = await akeyset_page(
+            queryset,
+            ordering,
+            request.query_params.get(self.cursor_query_param),
+            self.get_page_size(request),
+            key=self.get_key(ordering),
+        )
+        return rows
+
+    def get_key(self, ordering):
+        names = [field.lstrip('-') for field in ordering]
+
+        def key(row):
+            # Rows are model instances, or dicts for querysets projected with values()
+            if isinstance(row, dict):
+                return [row[name] for name in names]
+            return [getattr(row, name) for name in names]
+        return key
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        if self.next_cursor is not None:
+            response['Link'] = f'<{self.get_next_link()}>; rel="next"'
+            response['X-Next-Cursor'] = self.next_cursor
+        return response
@@ -3,6 +3,10 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth.models import User
 from .models import Publication, exterieurs, UserFile
+from .fieldsets import SparseFieldsetMixin, SparseQuerysetMixin
+from .conditional import ConditionalGetMixin
+from .db_router import ReplicaReadMixin
+from .read_serializers import Computed, ReadPlan, Related, file_url
 from rest_framework import serializers
 from django.db import models
 import logging
@@ -38,7 +42,7 @@ class TaggedExternalSerializer(serializers.ModelSerializer):
         model = exterieurs
         fields = ['id', 'name', 'email']
 
-class ExternalMemberSerializer(serializers.ModelSerializer):
+class ExternalMemberSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     cv = serializers.SerializerMethodField()
     profile_pic = serializers.SerializerMethodField()
     
@@ -78,7 +82,7 @@ class UserFileSerializer(serializers.ModelSerializer):
             return obj.file.url
         return None
 
-class PublicationSerializer(serializers.ModelSerializer):
+class PublicationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     posted_by = PostedBySerializer(read_only=True)
     tagged_members = TaggedMemberSerializer(many=True, read_only=True)
     tagged_externals = TaggedExternalSerializer(many=True, read_only=True)
@@ -89,8 +93,35 @@ class PublicationSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'abstract', 'posted_by', 'posted_at', 'tagged_members', 'tagged_externals', 'attached_files', 'keywords']
         read_only_fields = ['posted_by', 'posted_at']
 
-class PublicationViewSet(viewsets.ModelViewSet):
+def _tagged_member(user_id, username, first_name, last_name):
+    return {
+        'id': str(user_id),
+        'name': f"{first_name} {last_name}".strip() or username,
+        'username': username
+    }
+
+def _attached_file(context, file_id, name, file, file_type, size):
+    return {
+        'id': file_id,
+        'name': name,
+        'file': file_url(UserFile._meta.get_field('file').storage, file, context),
+        'file_type': file_type,
+        'size': size
+    }
+
+# Same output as PublicationSerializer, for the list
+PUBLICATION_READ_PLAN = ReadPlan(
+    PublicationSerializer,
+    posted_by=Computed(['posted_by', 'posted_by__username'], lambda user_id, username: {'id': str(user_id), 'name': username}),
+    tagged_members=Related('tagged_members', ['id', 'username', 'first_name', 'last_name'], _tagged_member),
+    tagged_externals=Related('tagged_externals', ['id', 'name', 'email'], lambda external_id, name, email: {'id': external_id, 'name': name, 'email': email}),
+    attached_files=Related('attached_files', ['id', 'name', 'file', 'file_type', 'size'], _attached_file, uses_context=True),
+)
+
+class PublicationViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = PublicationSerializer
+    version_names = (Publication, UserFile, exterieurs, 'team')
+    replica_actions = ('list', 'retrieve', 'search_members', 'search_externals')
 
     def get_permissions(self):
         """
@@ -143,8 +174,9 @@ class PublicationViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """List publications with proper file URLs"""
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        context = self.get_serializer_context()
+        rows = self.paginate_queryset(PUBLICATION_READ_PLAN.values(queryset, context, self.paginator.get_ordering(queryset)))
+        return self.get_paginated_response(PUBLICATION_READ_PLAN.render(rows, context))
             
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -203,10 +235,11 @@ class PublicationViewSet(viewsets.ModelViewSet):
         logger.info(f"Returning {len(serializer.data)} externals")
         return Response(serializer.data)
 
-class ExternalMemberViewSet(viewsets.ModelViewSet):
+class ExternalMemberViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = exterieurs.objects.all()
     serializer_class = ExternalMemberSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_names = (exterieurs,)
 
     def create(self, request, *args, **kwargs):
         """Create a new external member with file uploads"""
@@ -236,6 +269,6 @@ class ExternalMemberViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         """List external members with proper file URLs"""
-        queryset = self.filter_queryset(self.get_queryset())
+        queryset = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
         serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,261 @@
+"""Read-only serialization compiled once per serializer class.
+
+A ReadPlan renders rows exactly like ``serializer_class(many=True).data`` but
+reads them with values() and builds the output dicts directly: the field list,
+lookups and formatters are worked out once per plan, never per row. Plain
+model fields, files and nested model serializers are compiled from the
+serializer; SerializerMethodFields, properties and serializers with their own
+to_representation need an override:
+
+Computed: computed from columns of the same row
+Related: a many-to-many list, read with one query per page
+
+arender() and aserialize() are the same for async views, reading with the
+async ORM.
+"""
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+from .fieldsets import requested_fields
+
+def _model_field(model, lookup):
+    field = None
+    for name in lookup.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return field
+
+def file_url(storage, name, context):
+    """What FileField.to_representation returns for a stored file name"""
+    if not name:
+        return None
+    url = storage.url(name)
+    request = context.get('request')
+    return request.build_absolute_uri(url) if request is not None else url
+
+def _formatter(field):
+    """A callable equivalent to field.to_representation for non-null database values"""
+    if isinstance(field, serializers.ChoiceField):
+        return field.to_representation
+    if isinstance(field, serializers.CharField):
+        return str
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, serializers.BooleanField):
+        return bool
+    if isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+        # values() already returns the related primary key
+        return lambda value: value
+    return field.to_representation
+
+class Column:
+    def __init__(self, lookup, formatter):
+        self.lookup = lookup
+        self.formatter = formatter
+
+    def bind(self, model):
+        pass
+
+    def columns(self, prefix=''):
+        return [prefix + self.lookup]
+
+    def getter(self, context, rows, prefix=''):
+        key, formatter = prefix + self.lookup, self.formatter
+
+        def get(row):
+            value = row[key]
+            return None if value is None else formatter(value)
+        return get
+
+class FileColumn(Column):
+    def __init__(self, lookup):
+        super().__init__(lookup, None)
+
+    def bind(self, model):
+        self.storage = _model_field(model, self.lookup).storage
+
+    def getter(self, context, rows, prefix=''):
+        key, storage = prefix + self.lookup, self.storage
+        return lambda row: file_url(storage, row[key], context)
+
+class Computed:
+    """A field computed by ``function(*values)`` from columns of the row.
+
+    With uses_context the serializer context is passed first.
+    """
+    def __init__(self, columns, function, uses_context=False):
+        self.lookups = list(columns)
+        self.function = function
+        self.uses_context = uses_context
+
+    def bind(self, model):
+        pass
+
+    def columns(self, prefix=''):
+        return [prefix + lookup for lookup in self.lookups]
+
+    def getter(self, context, rows, prefix=''):
+        function = partial(self.function, context) if self.uses_context else self.function
+        keys = self.columns(prefix)
+        if len(keys) == 1:
+            key = keys[0]
+            return lambda row: function(row[key])
+        return lambda row: function(*[row[key] for key in keys])
+
+class Nested:
+    """A nested ModelSerializer over a foreign key or one-to-one relation"""
+    def __init__(self, relation, plan):
+        self.relation = relation
+        self.plan = plan
+
+    def bind(self, model):
+        related_model = _model_field(model, self.relation).related_model
+        self.key = f'{self.relation}__{related_model._meta.pk.name}'
+
+    def columns(self, prefix=''):
+        inner = f'{prefix}{self.relation}__'
+        return [prefix + self.key, *(column for _, spec in self.plan.specs for column in spec.columns(inner))]
+
+    def getter(self, context, rows, prefix=''):
+        key = prefix + self.key
+        getters = [(name, spec.getter(context, rows, f'{prefix}{self.relation}__')) for name, spec in self.plan.specs]
+
+        def get(row):
+            if row[key] is None:
+                return None
+            return {name: get_value(row) for name, get_value in getters}
+        return get
+
+class Related:
+    """A list from a many-to-many field, each item built by ``function(*values)``.
+
+    Items follow the related model's Meta.ordering, then its primary key, like
+    relation.all() does.
+    """
+    def __init__(self, relation, columns, function, uses_context=False):
+        self.relation = relation
+        self.lookups = list(columns)
+        self.function = function
+        self.uses_context = uses_context
+
+    def bind(self, model):
+        field = model._meta.get_field(self.relation)
+        self.through = field.remote_field.through
+        self.source = field.m2m_field_name()
+        self.target = field.m2m_reverse_field_name()
+        ordering = [
+            f'-{self.target}__{name[1:]}' if name.startswith('-') else f'{self.target}__{name}'
+            for name in field.related_model._meta.ordering
+        ]
+        self.ordering = [*ordering, f'{self.target}__pk']
+
+    def columns(self, prefix=''):
+        if prefix:
+            raise ImproperlyConfigured("Related fields are only supported at the top level of a ReadPlan")
+        return []
+
+    def pairs(self, rows):
+        """(row pk, *related values) of the items of every row, in item order"""
+        return (
+            self.through.objects.filter(**{f'{self.source}__in': [row['pk'] for row in rows]})
+            .order_by(*self.ordering)
+            .values_list(self.source, *[f'{self.target}__{lookup}' for lookup in self.lookups])
+        )
+
+    def getter(self, context, rows, prefix='', pairs=None):
+        function = partial(self.function, context) if self.uses_context else self.function
+        items = {}
+        for pk, *values in (self.pairs(rows) if pairs is None else pairs):
+            items.setdefault(pk, []).append(function(*values))
+        return lambda row: items.get(row['pk'], [])
+
+class ReadPlan:
+    """Compiled read-only rendering of serializer_class, overrides given by field name"""
+    def __init__(self, serializer_class, **overrides):
+        self.serializer_class = serializer_class
+        self.overrides = overrides
+        self._specs = None
+
+    @property
+    def specs(self):
+        # Compiled on first use, once the app registry is ready
+        if self._specs is None:
+            self._specs = self.compile()
+        return self._specs
+
+    def compile(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        specs = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            spec = self.overrides.get(name) or self.compile_field(model, name, field)
+            spec.bind(model)
+            specs.append((name, spec))
+        return specs
+
+    def compile_field(self, model, name, field):
+        unsupported = ImproperlyConfigured(
+            f"{self.serializer_class.__name__}.{name} cannot be compiled, give the ReadPlan an override for it"
+        )
+        if field.source == '*' or isinstance(field, (serializers.SerializerMethodField, ManyRelatedField)):
+            raise unsupported
+        lookup = field.source.replace('.', '__')
+        try:
+            model_field = _model_field(model, lookup)
+        except FieldDoesNotExist:
+            raise unsupported
+        if isinstance(field, serializers.ModelSerializer):
+            if type(field).to_representation is not serializers.Serializer.to_representation:
+                raise unsupported
+            return Nested(lookup, ReadPlan(type(field)))
+        if isinstance(field, serializers.BaseSerializer) or model_field.many_to_many or model_field.one_to_many:
+            raise unsupported
+        if isinstance(field, serializers.FileField):
+            return FileColumn(lookup)
+        return Column(lookup, _formatter(field))
+
+    def selected(self, context):
+        """The compiled fields left after ?fields= and ?exclude= (see fieldsets.py)"""
+        fields, exclude = requested_fields((context or {}).get('request'))
+        return [
+            (name, spec) for name, spec in self.specs
+            if (fields is None or name in fields) and (exclude is None or name not in exclude)
+        ]
+
+    def values(self, queryset, context=None, ordering=()):
+        """queryset.values() with the columns the plan reads, plus the ordering fields for pagination"""
+        columns = ['pk', *(field.lstrip('-') for field in ordering)]
+        for _, spec in self.selected(context):
+            columns.extend(spec.columns())
+        return queryset.values(*dict.fromkeys(columns))
+
+    def render(self, rows, context=None):
+        """The list ``serializer_class(objects, many=True, context=context).data`` would give"""
+        context = context or {}
+        rows = list(rows)
+        getters = [(name, spec.getter(context, rows)) for name, spec in self.selected(context)]
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+    async def arender(self, rows, context=None):
+        """render() for async views; ``rows`` is a values() queryset or a list"""
+        context = context or {}
+        rows = [row async for row in rows] if hasattr(rows, '__aiter__') else list(rows)
+        getters = []
+        for name, spec in self.selected(context):
+            if isinstance(spec, Related):
+                # The only spec reading the database itself
+                getters.append((name, spec.getter(context, rows, pairs=[pair async for pair in spec.pairs(rows)])))
+            else:
+                getters.append((name, spec.getter(context, rows)))
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+    def serialize(self, queryset, context=None):
+        return self.render(self.values(queryset, context), context)
+
+    async def aserialize(self, queryset, context=None):
+        return await self.arender(self.values(queryset, context), context)
@@ -0,0 +1,152 @@
+"""Subset of RFC 5545 recurrence rules used by recurring events.
+
+Supported: FREQ=DAILY|WEEKLY|MONTHLY, INTERVAL, BYDAY (weekly only), COUNT, UNTIL.
+Occurrences are computed arithmetically from the series start, so expanding a
+window costs O(occurrences in the window) whatever the length of the series.
+Arithmetic is done on local wall-clock time so a 10:00 seminar stays at 10:00
+across DST changes.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+FREQUENCIES = ['DAILY', 'WEEKLY', 'MONTHLY']
+
+def _parse_until(value):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%d'):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            pass
+    raise ValueError(f"UNTIL invalide: {value}")
+
+class RecurrenceRule:
+    def __init__(self, freq, interval=1, byday=None, count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        self.byday = byday
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, value):
+        """Parse an RRULE value such as 'FREQ=WEEKLY;BYDAY=MO,WE;COUNT=20', raising ValueError"""
+        parts = {}
+        for part in value.upper().removeprefix('RRULE:').split(';'):
+            if not part:
+                continue
+            name, _, part_value = part.partition('=')
+            if not part_value:
+                raise ValueError(f"Partie de règle invalide: {part}")
+            parts[name] = part_value
+
+        unsupported = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'COUNT', 'UNTIL', 'WKST'}
+        if unsupported:
+            raise ValueError(f"Parties de règle non supportées: {', '.join(sorted(unsupported))}")
+        if parts.get('FREQ') not in FREQUENCIES:
+            raise ValueError("FREQ doit être DAILY, WEEKLY ou MONTHLY")
+        if 'COUNT' in parts and 'UNTIL' in parts:
+            raise ValueError("COUNT et UNTIL ne peuvent pas être combinés")
+
+        try:
+            interval = int(parts.get('INTERVAL', 1))
+            count = int(parts['COUNT']) if 'COUNT' in parts else None
+        except ValueError:
+            raise ValueError("INTERVAL et COUNT doivent être des entiers")
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL et COUNT doivent être positifs")
+
+        byday = None
+        if 'BYDAY' in parts:
+            if parts['FREQ'] != 'WEEKLY':
+                raise ValueError("BYDAY n'est supporté qu'avec FREQ=WEEKLY")
+            days = parts['BYDAY'].split(',')
+            if any(day not in WEEKDAYS for day in days):
+                raise ValueError(f"BYDAY invalide: {parts['BYDAY']}")
+            byday = sorted({WEEKDAYS.index(day) for day in days})
+
+        until = _parse_until(parts['UNTIL']) if 'UNTIL' in parts else None
+        return cls(parts['FREQ'], interval, byday, count, until)
+
+    def validate_start(self, dtstart):
+        if self.freq == 'MONTHLY' and timezone.localtime(dtstart).day > 28:
+            raise ValueError("Les séries mensuelles doivent commencer entre le 1er et le 28 du mois")
+
+    # Each period (a day, a week or a month, times INTERVAL) holds a fixed set of slots
+
+    def _slots(self, base):
+        if self.freq == 'WEEKLY':
+            return [day - base.weekday() for day in (self.byday or [base.weekday()])]
+        return [0]
+
+    def _period_start(self, base, period):
+        if self.freq == 'DAILY':
+            return base + timedelta(days=period * self.interval)
+        if self.freq == 'WEEKLY':
+            return base + timedelta(weeks=period * self.interval)
+        years, month = divmod(base.month - 1 + period * self.interval, 12)
+        return base.replace(year=base.year + years, month=month + 1)
+
+    def _first_period(self, base, lower):
+        """Index of the last period starting at or before ``lower``"""
+        if lower <= base:
+            return 0
+        if self.freq == 'MONTHLY':
+            months = (lower.year - base.year) * 12 + lower.month - base.month
+            return max(months // self.interval - 1, 0)
+        length = timedelta(days=self.interval * (7 if self.freq == 'WEEKLY' else 1))
+        # Back off one period so BYDAY slots before the base weekday are not missed
+        return max((lower - base) // length - 1, 0)
+
+    def _ordinal(self, base, period, slot_index):
+        slots = self._slots(base)
+        first = sum(1 for offset in slots if offset >= 0)
+        if period == 0:
+            return slot_index - (len(slots) - first)
+        return first + (period - 1) * len(slots) + slot_index
+
+    def occurrences(self, dtstart, duration, window_start=None, window_end=None):
+        """Yield the start of each occurrence overlapping [window_start, window_end), in order"""
+        tz = timezone.get_current_timezone()
+        base = timezone.localtime(dtstart, tz).replace(tzinfo=None)
+        slots = self._slots(base)
+        lower = None
+        if window_start is not None:
+            lower = timezone.localtime(window_start - duration, tz).replace(tzinfo=None)
+        period = self._first_period(base, lower) if lower is not None else 0
+
+        while True:
+            period_start = self._period_start(base, period)
+            for slot_index, offset in enumerate(slots):
+                local_start = period_start + timedelta(days=offset)
+                if local_start < base:
+                    continue
+                if self.count is not None and self._ordinal(base, period, slot_index) >= self.count:
+                    return
+                start = timezone.make_aware(local_start, tz)
+                if self.until is not None and start > self.until:
+                    return
+                if window_end is not None and start >= window_end:
+                    return
+                if window_start is None or start + duration > window_start:
+                    yield start
+            period += 1
+
+    def series_end(self, dtstart, duration):
+        """End of the last occurrence, or None for an open-ended series"""
+        if self.until is not None:
+            return self.until + duration
+        if self.count is None:
+            return None
+        tz = timezone.get_current_timezone()
+        base = timezone.localtime(dtstart, tz).replace(tzinfo=None)
+        slots = self._slots(base)
+        first = sum(1 for offset in slots if offset >= 0)
+        if self.count <= first:
+            period, slot_index = 0, len(slots) - first + self.count - 1
+        else:
+            period, slot_index = divmod(self.count - first - 1, len(slots))
+            period += 1
+        local_start = self._period_start(base, period) + timedelta(days=slots[slot_index])
+        return timezone.make_aware(local_start, tz) + duration
@@ -0,0 +1,46 @@
+"""JSON renderer and parser backed by orjson, falling back to DRF's stdlib ones.
+
+orjson encodes datetimes, dates, times and UUIDs natively, in C; anything else
+(Decimals, lazy translations, querysets...) goes through DRF's JSONEncoder
+hook, so the output matches JSONRenderer. Both classes are selected in
+REST_FRAMEWORK (DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES); when orjson
+is not installed they behave exactly like the stdlib classes.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONRenderer(JSONRenderer):
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # orjson only writes compact UTF-8 and only indents by two spaces
+        if orjson is None or self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # orjson writes NaN and Infinity as null where the stdlib writes invalid JSON or raises (strict)
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=self.options)
+        # Same JavaScript-safe escaping as JSONRenderer
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding') or 'utf-8'
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # Rejects NaN and Infinity, like JSONParser in strict mode
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'laboissim.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'social_django.middleware.SocialAuthExceptionMiddleware',
@@ -88,6 +90,51 @@ DATABASES = {
     }
 }
 
+# Read replicas of 'default' (see db_router.py): DATABASES aliases that safe API
+# reads may use. Empty means every query goes to the primary.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['laboissim.db_router.ReplicaRouter']
+# Seconds a user reads from the primary after writing, and a collection after changing;
+# keep it above the replication lag
+REPLICA_STICKY_SECONDS = 5
+
+# Local stand-in for a primary and its replica: two SQLite files, the replica
+# refreshed from the primary with `manage.py sync_sqlite_replica`. Also what
+# `manage.py test` runs on without a MySQL server.
+if os.environ.get('LABOISSIM_SQLITE_REPLICA'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'primary.sqlite3',
+            # SQLite has no row locks: writers take the database lock up front and
+            # wait for it, which serializes them like select_for_update on MySQL
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 60},
+            # A file rather than shared memory, for the tests running threads
+            'TEST': {'NAME': BASE_DIR / 'test_primary.sqlite3'},
+        },
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'replica.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+    DATABASE_REPLICAS = ['replica']
+
+# Cache
+# Version counters and cached payloads must be shared by all worker processes,
+# so use a shared backend (file, Redis, Memcached) rather than per-process locmem.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# Email
+# Development prints emails to the console; configure SMTP settings in production
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'LABOISSIM <no-reply@laboissim.local>'
+
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = ["http://localhost:3000"]
 SESSION_COOKIE_SAMESITE = "Lax"
@@ -135,15 +182,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'laboissim.auth_backend.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
+    # orjson-backed JSON, with the stdlib as fallback (see renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'laboissim.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'laboissim.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'laboissim.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
 
+# Seconds an authenticated user stays in process memory (0 disables it)
+AUTH_USER_CACHE_TTL = 30
+
+# Serve the busiest public reads from async views (see async_views.py); asgi.py turns it on
+ASYNC_READ_VIEWS = os.environ.get('LABOISSIM_ASYNC_READS') == '1'
+
+# Days the change feed keeps its log (see compact_change_log); older cursors get 410 Gone
+CHANGE_LOG_RETENTION_DAYS = 30
+
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
+# Pagination cursors of list endpoints (see pagination.KeysetPagination)
+CORS_EXPOSE_HEADERS = ['Link', 'X-Next-Cursor']
 SESSION_COOKIE_SAMESITE = "Lax"
 SESSION_COOKIE_SECURE = False
 AUTHENTICATION_BACKENDS = [
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from .models import get_user_by_email
 
 User = get_user_model()
 
@@ -19,12 +20,7 @@ def save_profile(backend, user, response, *args, **kwargs):
     return 
 
 def prevent_duplicate_email(strategy, details, backend, uid, user=None, *args, **kwargs):
-    email = details.get('email')
-    if email:
-        User = get_user_model()
-        try:
-            existing_user = User.objects.get(email=email)
-            return {'user': existing_user}
-        except User.DoesNotExist:
-            pass
+    existing_user = get_user_by_email(details.get('email'))
+    if existing_user is not None:
+        return {'user': existing_user}
     return {} 
\ No newline at end of file
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from ..models import AccountRequest
+from .utils import isolated_cache, reset_caches
+
+URL = '/api/messages/account-requests/bulk_review/'
+
+def account_request(name, email):
+    return AccountRequest.objects.create(name=name, email=email, password='secret-password', reason='')
+
+@isolated_cache
+class BulkReviewTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def review(self, account_requests, new_status='approved'):
+        response = self.client.post(URL, {'status': new_status, 'ids': [request.pk for request in account_requests]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return {result['id']: result for result in response.data['results']}
+
+    def test_usernames_differing_only_in_case_are_taken(self):
+        User.objects.create_user('Alice Martin', 'alice@example.com')
+        taken = account_request('alice martin', 'alice.martin@example.com')
+        first = account_request('Bob Durand', 'bob@example.com')
+        second = account_request('BOB DURAND', 'bob.durand@example.com')
+
+        results = self.review([taken, first, second])
+
+        self.assertEqual(results[taken.pk]['error'], 'A user with this username already exists')
+        self.assertEqual(results[first.pk]['status'], 'approved')
+        self.assertEqual(results[second.pk]['error'], 'A user with this username already exists')
+        self.assertEqual(User.objects.filter(username__iexact='bob durand').count(), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'pending')
+
+    def test_reviewed_requests_are_not_approved_again(self):
+        pending = account_request('Claire Petit', 'claire@example.com')
+        self.review([pending])
+        results = self.review([pending])
+
+        self.assertEqual(results[pending.pk]['error'], 'Pending account request not found')
+        self.assertEqual(User.objects.filter(username='Claire Petit').count(), 1)
+
+@isolated_cache
+class ConcurrentBulkReviewTests(TransactionTestCase):
+    def setUp(self):
+        reset_caches()
+        self.admins = [User.objects.create_user(f'admin{index}', is_staff=True) for index in range(4)]
+        self.requests = [account_request(f'Membre {index}', f'membre{index}@example.com') for index in range(3)]
+
+    def review(self, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        try:
+            return client.post(URL, {'status': 'approved', 'ids': [request.pk for request in self.requests]}, format='json')
+        finally:
+            connection.close()
+
+    def test_admins_approving_at_once_create_each_account_once(self):
+        with ThreadPoolExecutor(max_workers=len(self.admins)) as pool:
+            responses = list(pool.map(self.review, self.admins))
+
+        self.assertEqual([response.status_code for response in responses], [200] * len(self.admins))
+        for request in self.requests:
+            self.assertEqual(User.objects.filter(username=request.name).count(), 1)
+            approvals = [
+                result for response in responses for result in response.data['results']
+                if result['id'] == request.pk and result['status'] == 'approved'
+            ]
+            self.assertEqual(len(approvals), 1)
+        self.assertFalse(AccountRequest.objects.filter(status='pending').exists())
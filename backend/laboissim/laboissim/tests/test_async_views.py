@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import URLPattern, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .. import urls
+from ..async_views import AsyncEventList, AsyncPublicationList, AsyncSiteContent, AsyncTeamMembers
+from ..models import EventRegistration, Publication
+from .test_event_registrations import create_event
+from .utils import isolated_cache, reset_caches
+
+ASYNC_ROUTES = {
+    'publication-list': AsyncPublicationList,
+    'event-list': AsyncEventList,
+    'team-members': AsyncTeamMembers,
+    'site-content': AsyncSiteContent,
+}
+
+# The project's routes as asgi.py serves them (settings.ASYNC_READ_VIEWS)
+ASYNC_VIEWS = {}
+urlpatterns = []
+for pattern in urls.urlpatterns:
+    if isinstance(pattern, URLPattern) and pattern.name in ASYNC_ROUTES:
+        ASYNC_VIEWS[pattern.name] = ASYNC_ROUTES[pattern.name](pattern.callback)
+        pattern = URLPattern(pattern.pattern, ASYNC_VIEWS[pattern.name], pattern.default_args, pattern.name)
+    urlpatterns.append(pattern)
+
+# What a client sees of a response
+COMPARED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link', 'Vary', 'Allow', 'Cache-Control')
+
+@isolated_cache
+class AsyncReadParityTests(TestCase):
+    """The async views answer exactly as the sync views they wrap"""
+
+    def setUp(self):
+        reset_caches()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'secret', first_name='Ada')
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+        for index in range(3):
+            event = create_event(self.owner)
+            Publication.objects.create(title=f'Article {index}', abstract='...', posted_by=self.owner)
+        EventRegistration.objects.create(event=event, user=self.member)
+        create_event(self.owner, recurrence_rule='FREQ=WEEKLY')
+
+    def get(self, path, data=None, client=None, **headers):
+        """(sync response, async response, whether the async view handed over to the sync one)"""
+        client = client or APIClient()
+        sync_response = client.get(path, data, **headers)
+        view = ASYNC_VIEWS[resolve(path).url_name]
+        with (
+            override_settings(ROOT_URLCONF=__name__),
+            mock.patch.object(view, 'serve', wraps=view.serve) as serve,
+            mock.patch.object(view, 'run_sync', wraps=view.run_sync) as run_sync,
+        ):
+            async_response = client.get(path, data, **headers)
+        self.assertTrue(serve.called)
+        return sync_response, async_response, run_sync.called
+
+    def assertSameResponse(self, sync_response, async_response):
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        for header in COMPARED_HEADERS:
+            self.assertEqual(async_response.get(header), sync_response.get(header), header)
+
+    def assertServedAsync(self, path, data=None, client=None, **headers):
+        sync_response, async_response, handed_over = self.get(path, data, client, **headers)
+        self.assertSameResponse(sync_response, async_response)
+        self.assertFalse(handed_over)
+        return sync_response
+
+    def assertHandedOver(self, path, data=None, client=None, **headers):
+        sync_response, async_response, handed_over = self.get(path, data, client, **headers)
+        self.assertSameResponse(sync_response, async_response)
+        self.assertTrue(handed_over)
+        return sync_response
+
+    def test_anonymous_reads(self):
+        for path in ('/api/events/', '/api/publications/', '/api/team-members/'):
+            with self.subTest(path=path):
+                response = self.assertServedAsync(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('ETag', response)
+
+    def test_site_content(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.owner)}')
+        response = self.assertServedAsync('/api/site-content/', client=client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.assertServedAsync('/api/site-content/', client=client, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_jwt_reads_show_the_callers_registrations(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.member)}')
+        response = self.assertServedAsync('/api/events/', client=client)
+        self.assertIn('Authorization', response['Vary'])
+        self.assertTrue(any(event['user_registration'] for event in response.data))
+
+    def test_pages_link_to_the_next_one(self):
+        for path in ('/api/events/', '/api/publications/'):
+            with self.subTest(path=path):
+                response = self.assertServedAsync(path, {'page_size': 2})
+                self.assertIn('rel="next"', response['Link'])
+                cursor = response['X-Next-Cursor']
+                self.assertServedAsync(path, {'page_size': 2, 'cursor': cursor})
+
+    def test_not_modified(self):
+        for path in ('/api/events/', '/api/publications/', '/api/team-members/'):
+            with self.subTest(path=path):
+                etag = self.assertServedAsync(path)['ETag']
+                self.assertEqual(self.assertServedAsync(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_sparse_fields(self):
+        self.assertServedAsync('/api/publications/', {'fields': 'id,title'})
+
+    def test_session_callers_go_to_the_sync_view(self):
+        client = APIClient()
+        client.force_login(self.member)
+        response = self.assertHandedOver('/api/events/', client=client)
+        self.assertTrue(any(event['user_registration'] for event in response.data))
+
+    def test_upcoming_and_calendar_windows_go_to_the_sync_view(self):
+        now = timezone.now()
+        self.assertHandedOver('/api/events/', {'upcoming': 5})
+        self.assertHandedOver('/api/events/', {'start': now.isoformat(), 'end': (now + timedelta(days=30)).isoformat()})
+
+    def test_other_renderers_go_to_the_sync_view(self):
+        for path, data, headers in (
+            ('/api/publications/', {'format': 'api'}, {}),
+            ('/api/team-members/', None, {'HTTP_ACCEPT': 'text/html'}),
+        ):
+            with self.subTest(path=path):
+                sync_response, async_response, handed_over = self.get(path, data, **headers)
+                self.assertTrue(handed_over)
+                # The browsable API embeds a fresh CSRF token in each page
+                self.assertEqual(async_response.status_code, sync_response.status_code)
+                self.assertEqual(async_response['Content-Type'], sync_response['Content-Type'])
+                self.assertTrue(async_response['Content-Type'].startswith('text/html'))
+
+    def test_errors_go_to_the_sync_view(self):
+        response = self.assertHandedOver('/api/publications/', {'page_size': 'beaucoup'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..auth_backend import CachedJWTAuthentication, api_settings
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+@override_settings(AUTH_USER_CACHE_TTL=300)
+class CachedUserInvalidationTests(TestCase):
+    """A user cached by CachedJWTAuthentication is reloaded once its version is bumped"""
+
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.member)}')
+        self.admin = APIClient()
+        self.admin.force_authenticate(self.staff)
+
+    def current_user(self):
+        return self.client.get('/api/user/')
+
+    def assertCached(self):
+        response = self.current_user()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(str(self.member.pk), CachedJWTAuthentication._users)
+        return response
+
+    def test_banned_user_is_refused_at_once(self):
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.admin.post(f'/api/admin/ban-user/{self.member.pk}/').status_code, 200)
+
+        self.assertEqual(self.current_user().status_code, 401)
+
+    def test_role_change_applies_at_once(self):
+        self.assertFalse(self.assertCached().data['is_staff'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin.post(f'/api/admin/update-user-role/{self.member.pk}/', {'role': 'admin'}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(self.current_user().data['is_staff'])
+
+    # simplejwt reads SIMPLE_JWT once, so the setting is patched on its settings object
+    @mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_password_change_revokes_tokens_at_once(self):
+        # Tokens then carry a hash of the password they were issued for
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.member)}')
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.set_password('new-secret')
+            self.member.save()
+
+        response = self.current_user()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'password_changed')
+
+    def test_unchanged_user_is_served_from_memory(self):
+        self.assertCached()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.current_user().status_code, 200)
@@ -0,0 +1,114 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..auth_backend import CachedJWTAuthentication
+from ..batch_views import BatchView
+from .test_event_registrations import create_event
+from .utils import isolated_cache, reset_caches
+
+def batch(client, *requests):
+    return client.post('/api/batch/', {'requests': list(requests)}, format='json')
+
+@isolated_cache
+class ConcurrentBatchTests(TransactionTestCase):
+    """Consecutive GETs run on worker threads, which needs a database they can share"""
+
+    def setUp(self):
+        reset_caches()
+        self.user = User.objects.create_user('user', 'user@example.com', 'secret')
+        self.other = User.objects.create_user('other', 'other@example.com', 'secret')
+        create_event(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_consecutive_reads_run_concurrently(self):
+        threads = []
+        run_in_thread = BatchView.run_in_thread
+
+        def record(view, request, item):
+            threads.append(threading.get_ident())
+            return run_in_thread(view, request, item)
+
+        with mock.patch.object(BatchView, 'run_in_thread', autospec=True, side_effect=record):
+            response = batch(
+                self.client,
+                {'path': '/api/events/'},
+                {'path': '/api/user/'},
+                {'path': '/api/messages/internal/unread_count/'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.get_ident(), threads)
+        responses = response.data['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200, 200])
+        self.assertEqual(responses[0]['body'][0]['title'], 'Séminaire')
+        self.assertEqual(responses[1]['body']['username'], 'user')
+
+    def test_reads_after_a_write_see_it(self):
+        message = {'receiver': self.other.pk, 'subject': 'Bonjour', 'message': '...'}
+        response = batch(
+            self.client,
+            {'path': '/api/messages/internal/'},
+            {'path': '/api/messages/internal/'},
+            {'method': 'POST', 'path': '/api/messages/internal/', 'body': message},
+            {'path': '/api/messages/internal/'},
+            {'path': '/api/events/'},
+        )
+        responses = response.data['responses']
+        self.assertEqual([item['status'] for item in responses], [200, 200, 201, 200, 200])
+        self.assertEqual(responses[0]['body'], [])
+        self.assertEqual(responses[1]['body'], [])
+        self.assertEqual([item['subject'] for item in responses[3]['body']], ['Bonjour'])
+
+@isolated_cache
+class BatchTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.user = User.objects.create_user('user', 'user@example.com', 'secret')
+        self.client = APIClient()
+
+    def test_sub_requests_reuse_the_batch_authentication(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        authenticate = CachedJWTAuthentication.authenticate
+        with mock.patch.object(CachedJWTAuthentication, 'authenticate', autospec=True, side_effect=authenticate) as calls:
+            response = batch(self.client, {'path': '/api/user/'}, {'path': '/api/user/profile/'}, {'path': '/api/user/'})
+        self.assertEqual([item['status'] for item in response.data['responses']], [200, 200, 200])
+        self.assertEqual(response.data['responses'][0]['body']['username'], 'user')
+        self.assertEqual(calls.call_count, 1)
+
+    def test_anonymous_sub_requests_stay_anonymous(self):
+        response = batch(self.client, {'path': '/api/user/'}, {'path': '/api/events/'})
+        self.assertEqual([item['status'] for item in response.data['responses']], [401, 200])
+
+    def test_sub_requests_cannot_bring_their_own_credentials(self):
+        other = User.objects.create_user('other', 'other@example.com', 'secret')
+        response = batch(self.client, {
+            'path': '/api/user/', 'headers': {'Authorization': f'Bearer {AccessToken.for_user(other)}'},
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_paths_outside_the_api_are_refused(self):
+        for path in ('/admin/', 'https://example.com/api/user/', '/api/batch/'):
+            with self.subTest(path=path):
+                self.assertEqual(batch(self.client, {'path': path}).status_code, 400)
+
+    def test_non_json_endpoints_answer_not_acceptable(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        event = create_event(admin)
+        self.client.force_authenticate(admin)
+        response = batch(
+            self.client,
+            # A plain Django view
+            {'path': '/api/events/calendar.ics'},
+            # Streamed CSV, then a file download
+            {'path': f'/api/events/{event.pk}/export_registrations/'},
+            {'path': f'/api/events/{event.pk}/export_registrations/?type=xlsx'},
+            {'path': '/api/nowhere/'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data['responses']], [406, 406, 406, 404])
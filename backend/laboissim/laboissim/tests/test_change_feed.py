@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import ChangeLogEntry, InternalMessage, Publication
+from ..pagination import encode_cursor
+from .utils import isolated_cache, reset_caches
+
+def settled():
+    """As if every entry in the log were old enough to be served"""
+    return mock.patch('laboissim.change_views.CHANGE_FEED_SETTLE', timedelta(0))
+
+@isolated_cache
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.author = User.objects.create_user('author', 'author@example.com', 'secret')
+        self.client = APIClient()
+
+    def publish(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Publication.objects.create(title=title, abstract='', posted_by=self.author)
+
+    def poll(self, cursor=None, collection='publications'):
+        params = {'cursor': cursor} if cursor else {}
+        with settled():
+            response = self.client.get(f'/api/changes/{collection}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_entries_are_recorded_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Publication.objects.create(title='Brouillon', abstract='', posted_by=self.author)
+            self.assertFalse(ChangeLogEntry.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(list(ChangeLogEntry.objects.values_list('collection', 'action')), [('publications', 'created')])
+
+    def test_a_long_transaction_is_not_skipped(self):
+        cursor = self.poll()['cursor']
+        # Written first, committed last
+        with self.captureOnCommitCallbacks() as slow:
+            Publication.objects.create(title='Lente', abstract='', posted_by=self.author)
+        self.publish('Rapide')
+
+        page = self.poll(cursor)
+        self.assertEqual([change['object']['title'] for change in page['changes']], ['Rapide'])
+
+        for callback in slow:
+            callback()
+        page = self.poll(page['cursor'])
+        self.assertEqual([change['object']['title'] for change in page['changes']], ['Lente'])
+
+    def test_fresh_entries_are_held_back(self):
+        cursor = self.poll()['cursor']
+        self.publish('Récente')
+        response = self.client.get('/api/changes/publications/', {'cursor': cursor})
+        self.assertEqual(response.data['changes'], [])
+        self.assertEqual([change['action'] for change in self.poll(response.data['cursor'])['changes']], ['created'])
+
+    def test_one_change_per_object(self):
+        cursor = self.poll()['cursor']
+        kept = self.publish('Gardée')
+        removed = self.publish('Retirée')
+        removed_id = removed.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            kept.title = 'Renommée'
+            kept.save()
+            removed.delete()
+
+        changes = self.poll(cursor)['changes']
+        self.assertEqual([(change['id'], change['action']) for change in changes], [(kept.pk, 'updated'), (removed_id, 'deleted')])
+        self.assertEqual(changes[0]['object']['title'], 'Renommée')
+        self.assertIsNone(changes[1]['object'])
+
+    def test_private_collections_reach_their_recipients_only(self):
+        receiver = User.objects.create_user('receiver', 'receiver@example.com', 'secret')
+        outsider = User.objects.create_user('outsider', 'outsider@example.com', 'secret')
+        self.client.force_authenticate(receiver)
+        cursor = self.poll(collection='messages')['cursor']
+        with self.captureOnCommitCallbacks(execute=True):
+            message = InternalMessage.objects.create(sender=self.author, receiver=receiver, subject='Salut', message='Bonjour')
+
+        self.assertEqual([change['id'] for change in self.poll(cursor, 'messages')['changes']], [message.pk])
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.poll(cursor, 'messages')['changes'], [])
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/changes/messages/', {'cursor': cursor}).status_code, 401)
+
+    def test_expired_cursor_is_gone(self):
+        issued_at = timezone.now() - timedelta(days=31)
+        response = self.client.get('/api/changes/publications/', {'cursor': encode_cursor([0, issued_at.timestamp()])})
+        self.assertEqual(response.status_code, 410)
+
+    def test_unknown_collection(self):
+        self.assertEqual(self.client.get('/api/changes/users/').status_code, 404)
+
+class CompactChangeLogTests(TestCase):
+    def entry(self, object_id, action='updated', recipient_id=None):
+        return ChangeLogEntry.objects.create(collection='projects', object_id=object_id, action=action, recipient_id=recipient_id)
+
+    def compact(self):
+        call_command('compact_change_log', batch_size=2, stdout=StringIO())
+        return set(ChangeLogEntry.objects.values_list('pk', flat=True))
+
+    def test_newer_entries_replace_older_ones_per_reader(self):
+        self.entry(1, 'created')
+        shared_new = self.entry(1)
+        self.entry(2, recipient_id=10)
+        second = self.entry(2, recipient_id=20)
+        first_new = self.entry(2, 'deleted', recipient_id=10)
+        other_object = self.entry(3)
+        # A shared entry says nothing about what a private reader was told, and the reverse
+        private_then_shared = self.entry(4, recipient_id=10), self.entry(4)
+
+        self.assertEqual(
+            self.compact(),
+            {shared_new.pk, second.pk, first_new.pk, other_object.pk, *[entry.pk for entry in private_then_shared]},
+        )
+
+    def test_expired_entries_are_dropped(self):
+        old, recent = self.entry(1), self.entry(2)
+        ChangeLogEntry.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(self.compact(), {recent.pk})
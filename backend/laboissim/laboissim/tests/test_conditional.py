@@ -0,0 +1,60 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Event
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class TimeDependentListTests(TestCase):
+    """?upcoming= lists change as time passes, without any version being bumped"""
+
+    def setUp(self):
+        reset_caches()
+        # A few seconds into a minute, the time slice of ?upcoming= lists
+        self.now = timezone.now().replace(second=5, microsecond=0)
+        owner = User.objects.create_user('owner', 'owner@example.com', 'secret')
+        for title, start in (('Bientôt', self.now + timedelta(minutes=10)), ('Demain', self.now + timedelta(days=1))):
+            Event.objects.create(
+                title=title, description='', location='Salle 1', start_date=start,
+                end_date=start + timedelta(minutes=30), created_by=owner,
+            )
+        self.client = APIClient()
+
+    def get(self, at, **headers):
+        with mock.patch('django.utils.timezone.now', return_value=at):
+            return self.client.get('/api/events/', {'upcoming': 5}, **headers)
+
+    def test_unchanged_within_the_time_slice(self):
+        response = self.get(self.now)
+        self.assertEqual([event['title'] for event in response.data], ['Bientôt', 'Demain'])
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.get(self.now + timedelta(seconds=30), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_no_stale_not_modified_once_an_event_has_ended(self):
+        response = self.get(self.now)
+        etag = response['ETag']
+
+        later = self.now + timedelta(hours=1)
+        response = self.get(later, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event['title'] for event in response.data], ['Demain'])
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.get(later, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_if_modified_since_alone_never_answers_not_modified(self):
+        self.get(self.now)
+        response = self.get(self.now + timedelta(hours=1), HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_plain_list_does_not_depend_on_the_time(self):
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            etag = self.client.get('/api/events/')['ETag']
+        with mock.patch('django.utils.timezone.now', return_value=self.now + timedelta(hours=1)):
+            self.assertEqual(self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
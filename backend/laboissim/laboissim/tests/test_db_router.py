@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..db_router import ReplicaRouter, reset_routing, set_read_intent
+from ..models import Event
+from .test_event_registrations import create_event
+from .utils import isolated_cache, reset_caches
+
+def later():
+    """As if the collections read had last changed long ago"""
+    return mock.patch('laboissim.db_router.changed_recently', return_value=False)
+
+@isolated_cache
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing between the primary and its replica, two SQLite files here (LABOISSIM_SQLITE_REPLICA)"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        if 'replica' not in connections.settings:
+            self.skipTest("Needs the replica database of LABOISSIM_SQLITE_REPLICA")
+        reset_caches()
+        reset_routing()
+        self.writer = User.objects.create_user('writer', 'writer@example.com', 'secret')
+        self.reader = User.objects.create_user('reader', 'reader@example.com', 'secret')
+        create_event(self.writer)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def queries(self, request):
+        """(response, queries on the primary, queries on the replica)"""
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+            response = request()
+        return response, len(primary), len(replica)
+
+    def test_safe_reads_go_to_the_replica(self):
+        with later():
+            response, primary, replica = self.queries(lambda: self.client_for().get('/api/events/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_writes_use_the_primary(self):
+        with later():
+            response, primary, replica = self.queries(lambda: self.client_for().post('/api/messages/contact/', {
+                'name': 'Visiteur', 'email': 'visiteur@example.com', 'subject': 'Question', 'category': 'general', 'message': 'Bonjour',
+            }, format='json'))
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_writers_read_from_the_primary_for_a_while(self):
+        response = self.client_for(self.writer).post('/api/messages/internal/', {
+            'receiver': self.reader.pk, 'subject': 'Bonjour', 'message': '...',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        with later():
+            _, primary, replica = self.queries(lambda: self.client_for(self.writer).get('/api/events/'))
+            self.assertGreater(primary, 0)
+            self.assertEqual(replica, 0)
+            # Other callers are not affected
+            _, primary, replica = self.queries(lambda: self.client_for(self.reader).get('/api/events/'))
+            self.assertGreater(replica, 0)
+
+        # Once the sticky window is over
+        reset_caches()
+        with later():
+            _, primary, replica = self.queries(lambda: self.client_for(self.writer).get('/api/events/'))
+        self.assertGreater(replica, 0)
+
+    def test_recently_changed_collections_are_read_from_the_primary(self):
+        # The event created in setUp bumped the 'events' version just now
+        _, primary, replica = self.queries(lambda: self.client_for().get('/api/events/'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_everything_uses_the_primary_without_replicas(self):
+        with override_settings(DATABASE_REPLICAS=[]), later():
+            response, primary, replica = self.queries(lambda: self.client_for().get('/api/events/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_router_rules(self):
+        router = ReplicaRouter()
+        # setUp wrote
+        reset_routing()
+        self.assertEqual(router.db_for_read(Event), 'default')
+
+        set_read_intent(True)
+        self.assertEqual(router.db_for_read(Event), 'replica')
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Event), 'default')
+        self.assertEqual(router.db_for_write(Event), 'default')
+        # Once the request wrote, its reads stay on the primary
+        self.assertEqual(router.db_for_read(Event), 'default')
+
+        reset_routing()
+        self.assertEqual(router.db_for_read(Event), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'laboissim'))
+        self.assertIsNone(router.allow_migrate('default', 'laboissim'))
+
+    def test_routing_is_reset_after_each_request(self):
+        with later():
+            self.client_for().get('/api/events/')
+        self.assertEqual(ReplicaRouter().db_for_read(Event), 'default')
@@ -0,0 +1,165 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from ..models import Event
+from ..recurrence import RecurrenceRule
+from .utils import isolated_cache, reset_caches
+
+class CalendarTestCase(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'secret', is_staff=True)
+        # Midnight a week from now: far enough that nothing below has ended
+        self.base = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=7)
+        self.client = APIClient()
+
+    def event(self, title, start, hours=2, **fields):
+        return Event.objects.create(
+            title=title, description='', location='Salle 1', start_date=start,
+            end_date=start + timedelta(hours=hours), created_by=self.owner, **fields
+        )
+
+    def get(self, **params):
+        for name in ('start', 'end'):
+            if name in params:
+                params[name] = params[name].isoformat()
+        response = self.client.get('/api/events/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def titles(self, **params):
+        return [event['title'] for event in self.get(**params)]
+
+@isolated_cache
+class CalendarWindowTests(CalendarTestCase):
+    def setUp(self):
+        super().setUp()
+        day = timedelta(days=1)
+        self.event('Avant', self.base - 2 * day)
+        self.event('À cheval', self.base - timedelta(hours=1))
+        self.event('Dedans', self.base + day, event_type='seminar')
+        self.event('Atelier', self.base + 2 * day, event_type='workshop')
+        self.event('Inactif', self.base + 3 * day, is_active=False)
+        self.event('Après', self.base + 10 * day)
+        self.window = {'start': self.base, 'end': self.base + 7 * day}
+
+    def test_window_returns_the_overlapping_events(self):
+        self.assertEqual(sorted(self.titles(**self.window)), ['Atelier', 'Dedans', 'À cheval'])
+
+    def test_open_ended_windows(self):
+        self.assertEqual(sorted(self.titles(start=self.base)), ['Après', 'Atelier', 'Dedans', 'À cheval'])
+        self.assertEqual(sorted(self.titles(end=self.base)), ['Avant', 'À cheval'])
+
+    def test_event_type(self):
+        self.assertEqual(self.titles(event_type='seminar', **self.window), ['Dedans'])
+
+    def test_is_active_is_for_staff_only(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.titles(is_active='false', **self.window), ['Inactif'])
+        self.client.force_authenticate(User.objects.create_user('member'))
+        self.assertEqual(sorted(self.titles(is_active='false', **self.window)), ['Atelier', 'Dedans', 'À cheval'])
+
+    def test_upcoming_lists_the_next_events_soonest_first(self):
+        Event.objects.filter(title='Avant').update(start_date=timezone.now() - timedelta(hours=1), end_date=timezone.now() + timedelta(hours=1))
+        # In progress events are still upcoming
+        self.assertEqual(self.titles(upcoming=3), ['Avant', 'À cheval', 'Dedans'])
+
+    def test_invalid_boundaries(self):
+        response = self.client.get('/api/events/', {'start': 'demain', 'end': self.base.isoformat()})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start', response.data)
+        self.assertEqual(self.client.get('/api/events/', {'upcoming': 'trois'}).status_code, 400)
+
+@isolated_cache
+class RecurringEventTests(CalendarTestCase):
+    def setUp(self):
+        super().setUp()
+        # Ten weekly seminars, from self.base
+        self.series = self.event('Séminaire', self.base, recurrence_rule='FREQ=WEEKLY;COUNT=10')
+        self.week = timedelta(weeks=1)
+
+    def occurrences(self, start, end):
+        return [(event['title'], event['occurrence_start'], event['start_date']) for event in sorted(
+            self.get(start=start, end=end), key=lambda event: event['start_date']
+        )]
+
+    def iso(self, value):
+        """value as the API renders it"""
+        return serializers.DateTimeField().to_representation(value)
+
+    def test_series_end(self):
+        self.assertEqual(self.series.recurrence_end, self.base + 9 * self.week + timedelta(hours=2))
+
+    def test_window_expands_the_occurrences_inside_it(self):
+        occurrences = self.occurrences(self.base + self.week, self.base + 4 * self.week)
+        self.assertEqual([start for _, start, _ in occurrences], [self.iso(self.base + week * self.week) for week in (1, 2, 3)])
+        # Past the last occurrence
+        self.assertEqual(self.occurrences(self.base + 10 * self.week, self.base + 20 * self.week), [])
+
+    def test_expansion_cost_depends_on_the_window(self):
+        rule = RecurrenceRule.parse('FREQ=DAILY')
+        with mock.patch.object(RecurrenceRule, '_period_start', autospec=True, side_effect=RecurrenceRule._period_start) as periods:
+            starts = list(rule.occurrences(self.base - timedelta(days=3650), timedelta(hours=2), self.base, self.base + self.week))
+        self.assertEqual(starts[0], self.base)
+        self.assertEqual(len(starts), 7)
+        # A few days around the window, not the ten years before it
+        self.assertLess(periods.call_count, 20)
+
+    def test_overrides_and_cancellations(self):
+        self.series.get_occurrence(self.base + self.week)
+        self.series.occurrences.filter(original_start=self.base + self.week).update(cancelled=True)
+        moved = self.series.get_occurrence(self.base + 2 * self.week)
+        moved.start_date = self.base + 2 * self.week + timedelta(days=1)
+        moved.end_date = moved.start_date + timedelta(hours=2)
+        moved.title = 'Séminaire invité'
+        moved.save()
+
+        occurrences = self.occurrences(self.base + self.week, self.base + 4 * self.week)
+        self.assertEqual(occurrences, [
+            ('Séminaire invité', self.iso(self.base + 2 * self.week), self.iso(moved.start_date)),
+            ('Séminaire', self.iso(self.base + 3 * self.week), self.iso(self.base + 3 * self.week)),
+        ])
+
+    def test_rescheduled_into_the_window(self):
+        moved = self.series.get_occurrence(self.base + 5 * self.week)
+        moved.start_date = self.base + timedelta(days=3)
+        moved.end_date = moved.start_date + timedelta(hours=2)
+        moved.save()
+        occurrences = self.occurrences(self.base + timedelta(days=1), self.base + self.week)
+        self.assertEqual(occurrences, [('Séminaire', self.iso(self.base + 5 * self.week), self.iso(moved.start_date))])
+
+    def test_upcoming_merges_series_and_single_events(self):
+        self.event('Conférence', self.base + timedelta(days=2))
+        self.event('Atelier', self.base + timedelta(days=9))
+        self.series.get_occurrence(self.base + self.week)
+        self.series.occurrences.filter(original_start=self.base + self.week).update(cancelled=True)
+        upcoming = self.get(upcoming=4)
+        self.assertEqual(
+            [(event['title'], event['occurrence_start']) for event in upcoming],
+            [
+                ('Séminaire', self.iso(self.base)),
+                ('Conférence', None),
+                ('Atelier', None),
+                ('Séminaire', self.iso(self.base + 2 * self.week)),
+            ],
+        )
+
+    def test_registrations_belong_to_one_occurrence(self):
+        member = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.client.force_authenticate(member)
+        response = self.client.post(f'/api/events/{self.series.pk}/register/', {'occurrence_start': (self.base + self.week).isoformat()}, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(f'/api/events/{self.series.pk}/register/', {'occurrence_start': (self.base + timedelta(days=1)).isoformat()}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        registered = {
+            event['occurrence_start']: event['user_registration'] is not None
+            for event in self.get(start=self.base, end=self.base + 3 * self.week)
+        }
+        self.assertEqual(registered, {self.iso(self.base): False, self.iso(self.base + self.week): True, self.iso(self.base + 2 * self.week): False})
@@ -0,0 +1,65 @@
+import csv
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..event_views import EXPORT_HEADER
+from ..models import EventOccurrence, EventRegistration
+from .test_event_registrations import create_event
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class RegistrationExportTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        self.ada = User.objects.create_user('ada', 'ada@example.com', 'secret', first_name='Ada', last_name='Lovelace')
+        self.alan = User.objects.create_user('alan', 'alan@example.com', 'secret')
+        self.event = create_event(self.admin, recurrence_rule='FREQ=WEEKLY')
+        self.occurrence = EventOccurrence.objects.create(event=self.event, original_start=self.event.start_date + timedelta(days=7))
+        self.registrations = [
+            EventRegistration.objects.create(event=self.event, user=self.ada, status='confirmed', notes='Végétarienne, « sans gluten »'),
+            EventRegistration.objects.create(event=self.event, user=self.alan, status='waitlisted'),
+            EventRegistration.objects.create(event=self.event, occurrence=self.occurrence, user=self.alan),
+        ]
+        for registration in self.registrations:
+            registration.refresh_from_db()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def expected_rows(self):
+        first, second, third = self.registrations
+        return [
+            EXPORT_HEADER,
+            [str(first.pk), '', 'ada', 'Ada Lovelace', 'ada@example.com', 'confirmed', first.registration_date.isoformat(), 'Végétarienne, « sans gluten »'],
+            [str(second.pk), '', 'alan', 'alan', 'alan@example.com', 'waitlisted', second.registration_date.isoformat(), ''],
+            [str(third.pk), self.occurrence.original_start.isoformat(), 'alan', 'alan', 'alan@example.com', 'pending', third.registration_date.isoformat(), ''],
+        ]
+
+    def test_csv(self):
+        response = self.client.get(f'/api/events/{self.event.pk}/export_registrations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="inscriptions_evenement_{self.event.pk}.csv"')
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(list(csv.reader(StringIO(content))), self.expected_rows())
+
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(f'/api/events/{self.event.pk}/export_registrations/', {'type': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="inscriptions_evenement_{self.event.pk}.xlsx"')
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Inscriptions'])
+        rows = [['' if value is None else str(value) for value in row] for row in workbook['Inscriptions'].iter_rows(values_only=True)]
+        self.assertEqual(rows, self.expected_rows())
+
+    def test_members_cannot_export(self):
+        self.client.force_authenticate(self.ada)
+        response = self.client.get(f'/api/events/{self.event.pk}/export_registrations/')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,290 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Event, EventOccurrence, EventRegistration
+from .utils import isolated_cache, reset_caches
+
+def create_event(owner, **fields):
+    start = timezone.now() + timedelta(days=7)
+    return Event.objects.create(
+        title='Séminaire', description='', location='Salle 1',
+        start_date=start, end_date=start + timedelta(hours=2), created_by=owner, **fields
+    )
+
+@isolated_cache
+class ConcurrentRegistrationTests(TransactionTestCase):
+    seats = 50
+    registrants = 300
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user('owner', 'owner@example.com', 'secret')
+        self.event = create_event(owner, max_participants=self.seats)
+        self.users = [User.objects.create_user(f'member{index}') for index in range(self.registrants)]
+
+    def register(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            return client.post(f'/api/events/{self.event.pk}/register/', {}, format='json')
+        finally:
+            connection.close()
+
+    def test_parallel_registrations_never_overbook(self):
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            responses = list(pool.map(self.register, self.users))
+
+        self.assertEqual([response.status_code for response in responses], [201] * self.registrants)
+        statuses = [response.data['status'] for response in responses]
+        self.assertEqual(statuses.count('pending'), self.seats)
+        self.assertEqual(statuses.count('waitlisted'), self.registrants - self.seats)
+
+        self.event.refresh_from_db()
+        registrations = self.event.registrations
+        self.assertEqual(registrations.filter(status__in=EventRegistration.SEAT_STATUSES).count(), self.seats)
+        self.assertEqual(self.event.reserved_count, self.seats)
+        self.assertEqual(self.event.confirmed_count, 0)
+        self.assertEqual(registrations.count(), self.registrants)
+
+        # The waitlist is served in registration order
+        first_waitlisted = registrations.filter(status='waitlisted').order_by('registration_date', 'id').first()
+        client = APIClient()
+        client.force_authenticate(registrations.filter(status='pending').first().user)
+        self.assertEqual(client.post(f'/api/events/{self.event.pk}/unregister/', {}, format='json').status_code, 200)
+        first_waitlisted.refresh_from_db()
+        self.assertEqual(first_waitlisted.status, 'pending')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_count, self.seats)
+
+@isolated_cache
+class ConcurrentOccurrenceOverrideTests(TransactionTestCase):
+    seats = 20
+    registrants = 40
+    overrides = 20
+
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.event = create_event(self.staff, max_participants=self.seats, recurrence_rule='FREQ=WEEKLY;COUNT=3')
+        self.start = self.event.start_date.isoformat()
+        self.users = [User.objects.create_user(f'member{index}') for index in range(self.registrants)]
+
+    def post(self, user, action, data):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            return client.post(f'/api/events/{self.event.pk}/{action}/', data, format='json')
+        finally:
+            connection.close()
+
+    def run_request(self, job):
+        if isinstance(job, User):
+            return self.post(job, 'register', {'occurrence_start': self.start})
+        return self.post(self.staff, 'override_occurrence', {'occurrence_start': self.start, 'location': f'Salle {job}'})
+
+    def test_overrides_alongside_registrations_lose_no_seat(self):
+        jobs = [job for pair in zip(self.users, range(self.overrides)) for job in pair] + self.users[self.overrides:]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            responses = list(pool.map(self.run_request, jobs))
+
+        self.assertTrue(all(response.status_code in (200, 201) for response in responses))
+        occurrence = self.event.occurrences.get()
+        registrations = occurrence.registrations
+        self.assertEqual(registrations.filter(status__in=EventRegistration.SEAT_STATUSES).count(), self.seats)
+        self.assertEqual(registrations.filter(status='waitlisted').count(), self.registrants - self.seats)
+        self.assertEqual((occurrence.confirmed_count, occurrence.reserved_count), (0, self.seats))
+        self.assertTrue(occurrence.location.startswith('Salle '))
+
+@isolated_cache
+class UniqueRegistrationTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.member = User.objects.create_user('member')
+        self.event = create_event(self.member)
+
+    def test_duplicate_event_registration_is_refused(self):
+        EventRegistration.objects.create(event=self.event, user=self.member)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EventRegistration.objects.create(event=self.event, user=self.member, status='waitlisted')
+
+    def test_duplicate_occurrence_registration_is_refused(self):
+        occurrence = EventOccurrence.objects.create(event=self.event, original_start=self.event.start_date)
+        other = EventOccurrence.objects.create(event=self.event, original_start=self.event.start_date + timedelta(days=7))
+        EventRegistration.objects.create(event=self.event, occurrence=occurrence, user=self.member)
+        # One registration per occurrence, besides the one to the event itself
+        EventRegistration.objects.create(event=self.event, occurrence=other, user=self.member)
+        EventRegistration.objects.create(event=self.event, user=self.member)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EventRegistration.objects.create(event=self.event, occurrence=occurrence, user=self.member)
+
+@isolated_cache
+class OwnRegistrationUpdateTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user('owner', 'owner@example.com', 'secret')
+        self.event = create_event(owner, max_participants=1)
+        self.other_event = create_event(owner)
+        self.holder = User.objects.create_user('holder')
+        self.member = User.objects.create_user('member')
+        EventRegistration.objects.create(event=self.event, user=self.holder)
+        self.registration = EventRegistration.objects.create(event=self.event, user=self.member, status='waitlisted')
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_owner_cannot_confirm_or_move_a_registration(self):
+        url = f'/api/event-registrations/{self.registration.pk}/'
+        response = self.client.patch(url, {'status': 'confirmed', 'event': self.other_event.pk, 'notes': 'Végétarien'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.registration.refresh_from_db()
+        self.assertEqual(self.registration.status, 'waitlisted')
+        self.assertEqual(self.registration.event_id, self.event.pk)
+        self.assertEqual(self.registration.notes, 'Végétarien')
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.confirmed_count, self.event.reserved_count), (0, 1))
+
+    def test_put_cannot_change_the_status_either(self):
+        url = f'/api/event-registrations/{self.registration.pk}/'
+        response = self.client.put(url, {'status': 'pending', 'event': self.event.pk, 'user': self.member.pk, 'notes': ''}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.registration.refresh_from_db()
+        self.assertEqual(self.registration.status, 'waitlisted')
+
+@isolated_cache
+class BulkRegistrationStatusTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.event = create_event(self.staff, max_participants=3)
+        self.members = [User.objects.create_user(f'member{index}') for index in range(6)]
+        self.registrations = [
+            EventRegistration.objects.create(event=self.event, user=member, status='pending' if index < 3 else 'waitlisted')
+            for index, member in enumerate(self.members)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.url = f'/api/events/{self.event.pk}/bulk_registration_status/'
+
+    def test_invalid_registration_ids_are_rejected(self):
+        for registration_ids in (['abc'], 'abc', 12, [1, None], [True], {'id': 1}):
+            response = self.client.post(self.url, {'status': 'confirmed', 'registration_ids': registration_ids}, format='json')
+            self.assertEqual(response.status_code, 400, registration_ids)
+
+    def test_waitlisted_registrations_only_take_free_seats(self):
+        waitlisted = [registration.pk for registration in self.registrations[3:]]
+        response = self.client.post(self.url, {'status': 'confirmed', 'registration_ids': waitlisted}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(response.data['skipped'], waitlisted)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.confirmed_count, self.event.reserved_count), (0, 3))
+
+    def test_cancellations_free_seats_for_the_oldest_waitlisted(self):
+        cancelled = [self.registrations[0].pk, self.registrations[1].pk]
+        response = self.client.post(self.url, {'status': 'cancelled', 'registration_ids': cancelled}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['promoted'], [self.registrations[3].pk, self.registrations[4].pk])
+
+        # Confirming everyone left fills the seats and leaves the last waitlisted registration out
+        response = self.client.post(self.url, {'status': 'confirmed', 'current_status': 'pending'}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        response = self.client.post(self.url, {'status': 'confirmed', 'current_status': 'waitlisted'}, format='json')
+        self.assertEqual(response.data['skipped'], [self.registrations[5].pk])
+
+        self.event.refresh_from_db()
+        registrations = self.event.registrations
+        self.assertEqual(self.event.confirmed_count, registrations.filter(status='confirmed').count())
+        self.assertEqual(self.event.reserved_count, registrations.filter(status__in=EventRegistration.SEAT_STATUSES).count())
+        self.assertEqual(self.event.reserved_count, 3)
+
+@isolated_cache
+class SeatCounterSaveTests(TestCase):
+    """Saving an event or occurrence loaded earlier keeps the counters registrations changed since"""
+
+    def setUp(self):
+        reset_caches()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'secret')
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+
+    def test_stale_event_save_keeps_the_counters(self):
+        event = create_event(self.owner, max_participants=1)
+        stale = Event.objects.get(pk=event.pk)
+        EventRegistration.objects.create(event=event, user=self.member, status='pending')
+
+        stale.title = 'Séminaire renommé'
+        stale.save()
+
+        event.refresh_from_db()
+        self.assertEqual(event.title, 'Séminaire renommé')
+        self.assertEqual((event.confirmed_count, event.reserved_count), (0, 1))
+        self.assertTrue(event.is_full)
+        # The saved instance is refreshed too
+        self.assertEqual(stale.reserved_count, 1)
+
+    def test_stale_occurrence_save_keeps_the_counters(self):
+        event = create_event(self.owner, max_participants=1, recurrence_rule='FREQ=WEEKLY;COUNT=3')
+        occurrence = event.get_occurrence(event.start_date)
+        stale = EventOccurrence.objects.get(pk=occurrence.pk)
+        EventRegistration.objects.create(event=event, occurrence=occurrence, user=self.member, status='confirmed')
+
+        stale.location = 'Salle 2'
+        stale.save()
+
+        occurrence.refresh_from_db()
+        self.assertEqual(occurrence.location, 'Salle 2')
+        self.assertEqual((occurrence.confirmed_count, occurrence.reserved_count), (1, 1))
+        self.assertTrue(occurrence.is_full)
+
+@isolated_cache
+class AttendeeListExposureTests(TestCase):
+    """Only staff see the registrations embedded in an event, whatever the action"""
+
+    def setUp(self):
+        reset_caches()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.event = create_event(self.admin)
+        EventRegistration.objects.create(event=self.event, user=self.admin)
+        self.client = APIClient()
+
+    def event_data(self, **fields):
+        start = timezone.now() + timedelta(days=3)
+        return {
+            'title': 'Atelier', 'description': 'Prise en main', 'location': 'Salle 2',
+            'start_date': start.isoformat(), 'end_date': (start + timedelta(hours=1)).isoformat(), **fields,
+        }
+
+    def test_members_get_the_compact_representation(self):
+        self.client.force_authenticate(self.member)
+        responses = [
+            self.client.get(f'/api/events/{self.event.pk}/'),
+            self.client.post('/api/events/', self.event_data(), format='json'),
+            self.client.patch(f'/api/events/{self.event.pk}/', {'location': 'Salle 3'}, format='json'),
+            self.client.put(f'/api/events/{self.event.pk}/', self.event_data(), format='json'),
+        ]
+        self.assertEqual([response.status_code for response in responses], [200, 201, 200, 200])
+        for response in responses:
+            self.assertNotIn('registrations', response.data)
+            self.assertIn('registered_count', response.data)
+
+    def test_staff_get_the_attendees(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(f'/api/events/{self.event.pk}/', {'location': 'Salle 3'}, format='json')
+        self.assertEqual([registration['user_email'] for registration in response.data['registrations']], ['admin@example.com'])
+        self.assertNotIn('registrations', self.client.get('/api/events/').data[0])
+
+    def test_members_writes_are_still_validated(self):
+        self.client.force_authenticate(self.member)
+        response = self.client.post('/api/events/', self.event_data(recurrence_rule='FREQ=YEARLY'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('recurrence_rule', response.data)
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Event, EventRegistration, EventReminder
+from .utils import isolated_cache, reset_caches
+
+def send_reminders(**options):
+    call_command('send_event_reminders', stdout=StringIO(), **options)
+
+@isolated_cache
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EventReminderTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user('owner', 'owner@example.com', 'secret')
+        start = timezone.now() + timedelta(hours=3)
+        self.event = Event.objects.create(
+            title='Séminaire', description='', location='Salle 1',
+            start_date=start, end_date=start + timedelta(hours=1), created_by=owner,
+        )
+        self.registrations = [
+            EventRegistration.objects.create(
+                event=self.event, user=User.objects.create_user(f'member{index}', f'member{index}@example.com'),
+                status='confirmed',
+            )
+            for index in range(5)
+        ]
+        EventRegistration.objects.create(event=self.event, user=User.objects.create_user('waiting', 'waiting@example.com'), status='waitlisted')
+
+    def recipients(self):
+        return sorted(address for message in mail.outbox for address in message.to)
+
+    def test_each_reminder_is_sent_once(self):
+        send_reminders(batch_size=2)
+        send_reminders(batch_size=2)
+
+        self.assertEqual(self.recipients(), [f'member{index}@example.com' for index in range(5)])
+        self.assertEqual(EventReminder.objects.filter(hours_before=24).count(), 5)
+
+    def test_reminders_claimed_by_another_run_are_not_sent(self):
+        create = EventReminder.objects.bulk_create
+        taken = self.registrations[:2]
+
+        def concurrent_claim(reminders, **kwargs):
+            # Another dispatcher read the same batch and inserted its claims first
+            if not EventReminder.objects.filter(dispatch='other').exists():
+                create([EventReminder(registration=registration, hours_before=24, dispatch='other') for registration in taken])
+            return create(reminders, **kwargs)
+
+        with mock.patch.object(EventReminder.objects, 'bulk_create', side_effect=concurrent_claim):
+            send_reminders()
+
+        self.assertEqual(self.recipients(), [f'member{index}@example.com' for index in range(2, 5)])
+
+    def test_failed_send_releases_the_claims(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError):
+            with self.assertRaises(OSError):
+                send_reminders()
+        self.assertFalse(EventReminder.objects.exists())
+
+        send_reminders()
+        self.assertEqual(len(mail.outbox), 5)
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..ical_views import FEED_SALT
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class PersonalFeedTokenTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.user = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def feed_url(self):
+        return self.client.get('/api/events/calendar-feed/').data['user_url']
+
+    def test_feed_url_is_stable_until_rotated(self):
+        url = self.feed_url()
+        self.assertEqual(self.feed_url(), url)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        rotated = self.client.post('/api/events/calendar-feed/').data['user_url']
+        self.assertNotEqual(rotated, url)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(rotated).status_code, 200)
+        self.assertEqual(self.feed_url(), rotated)
+
+    def test_tokens_without_the_user_key_are_refused(self):
+        self.feed_url()
+        # The former token format signed only the user id
+        for payload in (self.user.pk, [self.user.pk, ''], [self.user.pk, 'guessed']):
+            token = signing.dumps(payload, salt=FEED_SALT)
+            self.assertEqual(self.client.get(f'/api/events/calendar/{token}.ics').status_code, 404)
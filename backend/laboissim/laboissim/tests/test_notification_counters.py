@@ -0,0 +1,130 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..models import (
+    AccountRequest, ContactMessage, EventRegistration, InternalMessage, NotificationCounter,
+    UnreadMessageCounter, recount_notification_counters,
+)
+from .test_event_registrations import create_event
+from .utils import isolated_cache, reset_caches
+
+def counters():
+    return (
+        dict(NotificationCounter.objects.exclude(value=0).values_list('name', 'value')),
+        set(UnreadMessageCounter.objects.exclude(count=0).values_list('user_id', 'sender_id', 'count')),
+    )
+
+@isolated_cache
+class NotificationCounterTests(TestCase):
+    """The counters maintained on writes match a recount from the tables"""
+
+    def setUp(self):
+        reset_caches()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def assertMatchesRecount(self):
+        maintained = counters()
+        recount_notification_counters()
+        self.assertEqual(maintained, counters())
+
+    def test_contact_messages(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = ContactMessage.objects.create(name='A', email='a@example.com', subject='Question', category='general', message='...')
+            ContactMessage.objects.create(name='B', email='b@example.com', subject='Question', category='general', message='...')
+        self.assertEqual(counters()[0], {'contact_messages_new': 2})
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'read'
+            first.save()
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactMessage.objects.all().delete()
+        self.assertEqual(counters()[0], {})
+        self.assertMatchesRecount()
+
+    def test_account_requests(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            requests = [
+                AccountRequest.objects.create(name=f'new{index}', email=f'new{index}@example.com', password='secret', reason='...')
+                for index in range(3)
+            ]
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/messages/account-requests/bulk_review/', {
+                'status': 'approved', 'ids': [requests[0].pk, requests[1].pk],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counters()[0], {'account_requests_pending': 1})
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            requests[2].delete()
+        self.assertMatchesRecount()
+
+    def test_event_registrations(self):
+        event = create_event(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            registration = EventRegistration.objects.create(event=event, user=self.member, status='pending')
+            EventRegistration.objects.create(event=event, user=self.admin, status='pending')
+        self.assertEqual(counters()[0], {'event_registrations_pending': 2})
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.status = 'confirmed'
+            registration.save()
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/events/{event.pk}/bulk_registration_status/', {
+                'status': 'confirmed', 'current_status': 'pending',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counters()[0], {})
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.delete()
+        self.assertMatchesRecount()
+
+    def test_unread_messages(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = InternalMessage.objects.create(sender=self.admin, receiver=self.member, subject='Un', message='...')
+            InternalMessage.objects.create(sender=self.admin, receiver=self.member, subject='Deux', message='...')
+        self.assertEqual(counters()[1], {(self.member.pk, self.admin.pk, 2)})
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'read'
+            first.save()
+        self.assertMatchesRecount()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InternalMessage.objects.all().delete()
+        self.assertMatchesRecount()
+
+    def test_counter_rows_are_updated_after_the_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                ContactMessage.objects.create(name='A', email='a@example.com', subject='Question', category='general', message='...')
+                self.assertFalse(NotificationCounter.objects.filter(value__gt=0).exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(counters()[0], {'contact_messages_new': 1})
+
+    def test_rolled_back_writes_leave_the_counters_alone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    ContactMessage.objects.create(name='A', email='a@example.com', subject='Question', category='general', message='...')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(counters()[0], {})
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..pagination import encode_cursor
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class AdminUsersKeysetTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        # Three batches of users joined at the very same instant, as bulk imports do
+        joined = timezone.now().replace(microsecond=123456) - timedelta(days=10)
+        for batch in range(3):
+            for index in range(7):
+                user = User.objects.create_user(f'user{batch}_{index}', f'user{batch}_{index}@example.com', 'secret')
+                User.objects.filter(pk=user.pk).update(date_joined=joined + timedelta(days=batch))
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def walk(self, ordering, page_size=4):
+        ids = []
+        cursor = None
+        while True:
+            params = {'ordering': ordering, 'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/api/admin/users/', params)
+            self.assertEqual(response.status_code, 200)
+            ids += [user['id'] for user in response.data['results']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_ties_on_the_sort_key_are_neither_skipped_nor_repeated(self):
+        for ordering, expected in (
+            ('date_joined', User.objects.order_by('date_joined', 'id')),
+            ('-date_joined', User.objects.order_by('-date_joined', '-id')),
+        ):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.walk(ordering), list(expected.values_list('id', flat=True)))
+
+    def test_rows_inserted_while_paging_do_not_shift_pages(self):
+        response = self.client.get('/api/admin/users/', {'ordering': 'date_joined', 'page_size': 5})
+        seen = [user['id'] for user in response.data['results']]
+        # Sorts before the rows already read: offset paging would repeat the last of them
+        first = User.objects.order_by('date_joined', 'id').first()
+        User.objects.create_user('late', 'late@example.com', 'secret', date_joined=first.date_joined - timedelta(days=1))
+
+        response = self.client.get('/api/admin/users/', {
+            'ordering': 'date_joined', 'page_size': 100, 'cursor': response.data['next_cursor'],
+        })
+        rest = [user['id'] for user in response.data['results']]
+        self.assertFalse(set(seen) & set(rest))
+        self.assertEqual(len(seen) + len(rest), User.objects.count() - 1)
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in (
+            'not base64 !',
+            encode_cursor(['2026-01-01T00:00:00+00:00']),
+            encode_cursor(['not a date', 1]),
+            encode_cursor(['2026-01-01T00:00:00+00:00', 'not an id']),
+            encode_cursor(['2026-01-01T00:00:00+00:00', [1]]),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/admin/users/', {'ordering': 'date_joined', 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.data)
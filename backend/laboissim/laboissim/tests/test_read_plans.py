@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..event_views import EVENT_LIST_READ_PLAN, EventListSerializer
+from ..message_views import INTERNAL_MESSAGE_READ_PLAN, InternalMessageSerializer
+from ..models import Event, EventRegistration, InternalMessage, Publication, UserFile, UserProfile, exterieurs
+from ..publication_views import PUBLICATION_READ_PLAN, PublicationSerializer
+from ..views import EXTENDED_USER_READ_PLAN, ExtendedUserSerializer
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class ReadPlanParityTests(TestCase):
+    """Each ReadPlan renders what its serializer gives with many=True"""
+
+    def setUp(self):
+        reset_caches()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'secret', first_name='Alice', last_name='Martin')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'secret', is_staff=True)
+        UserProfile.objects.filter(user=self.alice).update(
+            profile_image='profile_images/alice.png', bio='Chercheuse', website='https://example.org', role='admin',
+        )
+        # Accounts created before profiles existed have none
+        self.legacy = User.objects.create_user('legacy', '', 'secret')
+        UserProfile.objects.filter(user=self.legacy).delete()
+
+        external = exterieurs.objects.create(name='Externe', email='externe@example.org', cv='external_cvs/cv.pdf')
+        stored = UserFile.objects.create(file='user_files/article.pdf', name='article.pdf', file_type='pdf', size=1024, uploaded_by=self.alice)
+        empty = UserFile.objects.create(file='', name='vide', file_type='', size=0, uploaded_by=self.bob)
+        tagged = Publication.objects.create(title='Étiquetée', abstract='Résumé', posted_by=self.alice, keywords='a, b')
+        tagged.tagged_members.set([self.bob, self.alice])
+        tagged.tagged_externals.set([external])
+        tagged.attached_files.set([stored, empty])
+        Publication.objects.create(title='Seule', abstract='', posted_by=self.bob)
+
+        start = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        self.event = Event.objects.create(
+            title='Séminaire', description='', start_date=start, end_date=start + timedelta(hours=2),
+            location='Salle 1', event_type='seminar', max_participants=1, created_by=self.alice,
+        )
+        Event.objects.create(
+            title='Atelier', description='', start_date=start, end_date=start + timedelta(hours=1),
+            location='', event_type='workshop', created_by=self.bob,
+        )
+        EventRegistration.objects.create(event=self.event, user=self.bob, status='confirmed')
+
+        first = InternalMessage.objects.create(sender=self.alice, receiver=self.bob, subject='Bonjour', message='...')
+        InternalMessage.objects.create(sender=self.bob, receiver=self.alice, subject='Re: Bonjour', message='...', reply_to=first)
+
+        self.request = Request(APIRequestFactory().get('/api/'))
+
+    def assertParity(self, plan, serializer_class, queryset, **context):
+        context = {'request': self.request, **context}
+        expected = serializer_class(queryset, many=True, context=context).data
+        self.assertEqual(plan.serialize(queryset, context), expected)
+
+    def test_extended_users(self):
+        self.assertParity(EXTENDED_USER_READ_PLAN, ExtendedUserSerializer, User.objects.order_by('id'))
+
+    def test_publications(self):
+        self.assertParity(PUBLICATION_READ_PLAN, PublicationSerializer, Publication.objects.order_by('-posted_at'))
+
+    def test_events(self):
+        registrations = {(registration.event_id, None): registration for registration in EventRegistration.objects.all()}
+        self.assertParity(
+            EVENT_LIST_READ_PLAN, EventListSerializer, Event.objects.order_by('start_date', 'id'),
+            user_registrations=registrations,
+        )
+
+    def test_internal_messages(self):
+        self.assertParity(INTERNAL_MESSAGE_READ_PLAN, InternalMessageSerializer, InternalMessage.objects.order_by('-created_at'))
+
+    def test_sparse_fieldsets(self):
+        self.request = Request(APIRequestFactory().get('/api/', {'fields': 'id,title,tagged_members,attached_files'}))
+        self.assertParity(PUBLICATION_READ_PLAN, PublicationSerializer, Publication.objects.order_by('-posted_at'))
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..models import SiteContent
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class SiteContentTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        SiteContent.objects.create(id=1, footer_team_name='LABOISSIM')
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.client = APIClient()
+
+    def test_public_content_is_served_from_memory(self):
+        response = self.client.get('/api/site-content/public/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['footer_team_name'], 'LABOISSIM')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/site-content/public/').data, response.data)
+            self.assertEqual(self.client.get('/api/site-content/public/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_editors_revalidate(self):
+        self.client.force_authenticate(self.member)
+        response = self.client.get('/api/site-content/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/site-content/').status_code, 401)
+
+    def test_put_is_seen_by_every_reader(self):
+        etag = self.client.get('/api/site-content/public/')['ETag']
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/site-content/', {'footer_team_name': 'Équipe LABOISSIM'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/site-content/public/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['footer_team_name'], 'Équipe LABOISSIM')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_only_staff_can_edit(self):
+        self.client.force_authenticate(self.member)
+        response = self.client.put('/api/site-content/', {'footer_team_name': 'Autre'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(SiteContent.objects.get().footer_team_name, 'LABOISSIM')
@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class TeamDirectoryTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        for username, last_name, role, institution, active in (
+            ('curie', 'Curie', 'chef_d_equipe', 'Sorbonne', True),
+            ('ada', 'Lovelace', 'member', 'sorbonne', True),
+            ('alan', 'Turing', 'member', 'Cambridge', True),
+            ('gone', 'Ancien', 'member', 'Sorbonne', False),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                user = User.objects.create_user(username, f'{username}@example.com', 'secret', last_name=last_name, is_active=active)
+                user.profile.role = role
+                user.profile.institution = institution
+                user.profile.save()
+        self.client = APIClient()
+
+    def usernames(self, response):
+        return [user['username'] for user in response.data['results']]
+
+    def test_active_members_sorted_by_name(self):
+        response = self.client.get('/api/team-members/directory/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(self.usernames(response), ['curie', 'ada', 'alan'])
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+    def test_filters_and_pages(self):
+        self.assertEqual(self.usernames(self.client.get('/api/team-members/directory/', {'role': 'member'})), ['ada', 'alan'])
+        # Institutions match whatever their case
+        response = self.client.get('/api/team-members/directory/', {'institution': 'SORBONNE', 'page': 2, 'page_size': 1})
+        self.assertEqual((response.data['count'], response.data['page']), (2, 2))
+        self.assertEqual(self.usernames(response), ['ada'])
+        self.assertEqual(self.client.get('/api/team-members/directory/', {'page': 'deux'}).status_code, 400)
+
+    def test_cached_until_a_profile_changes(self):
+        response = self.client.get('/api/team-members/directory/')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/team-members/directory/')
+        self.assertEqual(cached.data, response.data)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/team-members/directory/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = User.objects.get(username='alan').profile
+            profile.role = 'admin'
+            profile.save()
+        response = self.client.get('/api/team-members/directory/', {'role': 'member'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.usernames(response), ['ada'])
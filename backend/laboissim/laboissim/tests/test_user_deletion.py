@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from ..models import Event, EventRegistration, InternalMessage, Publication, UserDeletion, UserFile, UserProfile
+from ..user_deletion import process_batch, schedule_user_deletion
+from .test_event_registrations import create_event
+from .utils import isolated_cache, reset_caches
+
+def process_deletions(batch_size=2):
+    call_command('process_user_deletions', batch_size=batch_size, stdout=StringIO(), stderr=StringIO())
+
+@isolated_cache
+class UserDeletionTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.leaving = User.objects.create_user('leaving', 'leaving@example.com', 'secret')
+        self.other = User.objects.create_user('other', 'other@example.com', 'secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_everything_the_user_owns_is_deleted_in_batches(self):
+        # A full event of someone else, with a waitlist the leaving user frees a seat for
+        full = create_event(self.staff, max_participants=1)
+        EventRegistration.objects.create(event=full, user=self.leaving, status='confirmed')
+        waitlisted = EventRegistration.objects.create(event=full, user=self.other, status='waitlisted')
+        own_event = create_event(self.leaving)
+        EventRegistration.objects.create(event=own_event, user=self.other)
+        for index in range(3):
+            InternalMessage.objects.create(sender=self.leaving, receiver=self.other, subject=f'Message {index}', message='...')
+        InternalMessage.objects.create(sender=self.other, receiver=self.staff, subject='Reste', message='...')
+        Publication.objects.create(title='Article', abstract='', posted_by=self.leaving)
+        UserFile.objects.create(file='user_files/missing.pdf', name='missing.pdf', file_type='pdf', size=1, uploaded_by=self.leaving)
+
+        response = self.client.delete(f'/api/admin/delete-user/{self.leaving.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.leaving.refresh_from_db()
+        self.assertFalse(self.leaving.is_active)
+
+        process_deletions()
+
+        job = UserDeletion.objects.get(pk=response.data['deletion']['id'])
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress['messages'], 3)
+        self.assertEqual(job.progress['account'], 1)
+        self.assertFalse(User.objects.filter(pk=self.leaving.pk).exists())
+        self.assertFalse(UserProfile.objects.filter(user_id=self.leaving.pk).exists())
+        self.assertFalse(Event.objects.filter(pk=own_event.pk).exists())
+        self.assertEqual(list(InternalMessage.objects.values_list('subject', flat=True)), ['Reste'])
+        # The freed seat went to the waitlist
+        waitlisted.refresh_from_db()
+        full.refresh_from_db()
+        self.assertEqual(waitlisted.status, 'pending')
+        self.assertEqual((full.confirmed_count, full.reserved_count), (0, 1))
+
+    def test_batches_resume_step_by_step(self):
+        for index in range(5):
+            InternalMessage.objects.create(sender=self.leaving, receiver=self.other, subject=f'{index}', message='...')
+        job, = schedule_user_deletion([self.leaving], self.staff)
+
+        self.assertTrue(process_batch(job.pk, 2))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.step, job.progress), ('running', 'messages', {'messages': 2}))
+        while process_batch(job.pk, 2):
+            pass
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress['messages'], 5)
+        self.assertFalse(process_batch(job.pk, 2))
+
+    def test_scheduling_twice_keeps_one_job(self):
+        first, = schedule_user_deletion([self.leaving])
+        second, = schedule_user_deletion([self.leaving])
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(UserDeletion.objects.count(), 1)
+
+    def test_unban_is_refused_while_the_deletion_is_scheduled(self):
+        schedule_user_deletion([self.leaving], self.staff)
+
+        response = self.client.post(f'/api/admin/unban-user/{self.leaving.pk}/')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/admin/bulk-user-action/', {
+            'operation': 'unban', 'user_ids': [self.leaving.pk, self.other.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = {result['id']: result['status'] for result in response.data['results']}
+        self.assertEqual(results, {self.leaving.pk: 'error', self.other.pk: 'ok'})
+        self.leaving.refresh_from_db()
+        self.assertFalse(self.leaving.is_active)
+
+    def test_unban_is_allowed_once_nothing_is_scheduled(self):
+        self.client.post(f'/api/admin/ban-user/{self.leaving.pk}/')
+        response = self.client.post(f'/api/admin/unban-user/{self.leaving.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.leaving.refresh_from_db()
+        self.assertTrue(self.leaving.is_active)
+
+@isolated_cache
+class DeletionAlongsideRegistrationsTests(TransactionTestCase):
+    """Seats freed by a deletion go to the waitlist, not to registrations made meanwhile"""
+
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.leaving = User.objects.create_user('leaving', 'leaving@example.com', 'secret')
+        self.event = create_event(self.staff, max_participants=1)
+        EventRegistration.objects.create(event=self.event, user=self.leaving, status='confirmed')
+        self.waitlisted = EventRegistration.objects.create(
+            event=self.event, user=User.objects.create_user('waiting'), status='waitlisted'
+        )
+        self.newcomers = [User.objects.create_user(f'newcomer{index}') for index in range(10)]
+        schedule_user_deletion([self.leaving], self.staff)
+
+    def run_job(self, job):
+        try:
+            if job is None:
+                process_deletions(batch_size=1)
+                return None
+            client = APIClient()
+            client.force_authenticate(job)
+            return client.post(f'/api/events/{self.event.pk}/register/', {}, format='json')
+        finally:
+            connection.close()
+
+    def test_freed_seat_goes_to_the_waitlist(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(self.run_job, [*self.newcomers[:5], None, *self.newcomers[5:]]))
+
+        self.assertTrue(all(response.status_code == 201 for response in responses if response is not None))
+        self.waitlisted.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.waitlisted.status, 'pending')
+        self.assertEqual(self.event.registrations.filter(status__in=EventRegistration.SEAT_STATUSES).count(), 1)
+        self.assertEqual((self.event.confirmed_count, self.event.reserved_count), (0, 1))
+        self.assertEqual(UserDeletion.objects.get().status, 'done')
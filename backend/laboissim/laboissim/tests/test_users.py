@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..admin import UniqueEmailUserChangeForm
+from ..models import get_user_by_email
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class UsersListTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.member = User.objects.create_user('member', 'member@example.com', 'secret')
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.client = APIClient()
+
+    def test_members_do_not_see_email_addresses(self):
+        self.client.force_authenticate(self.member)
+        response = self.client.get('/api/users/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({user['username'] for user in response.data}, {'member', 'staff'})
+        self.assertTrue(all('email' not in user for user in response.data))
+
+    def test_staff_see_email_addresses(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/users/')
+
+        self.assertEqual({user['email'] for user in response.data}, {'member@example.com', 'staff@example.com'})
+
+@isolated_cache
+class DuplicateEmailTests(TestCase):
+    """Accounts sharing an email address, as some did before the unique email key"""
+
+    def setUp(self):
+        reset_caches()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.owner = User.objects.create_user('owner', 'shared@example.com', 'secret')
+        self.duplicate = User.objects.create_user('duplicate', 'Shared@Example.com', 'secret')
+        self.client = APIClient()
+
+    def test_duplicate_keeps_no_email_key(self):
+        self.duplicate.refresh_from_db()
+        self.assertIsNone(self.duplicate.profile.email_key)
+        self.assertEqual(get_user_by_email('SHARED@example.com'), self.owner)
+
+    def test_duplicate_can_be_banned(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(f'/api/admin/ban-user/{self.duplicate.pk}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.duplicate.refresh_from_db()
+        self.assertFalse(self.duplicate.is_active)
+
+    def test_duplicate_can_update_its_profile(self):
+        self.client.force_authenticate(self.duplicate)
+        response = self.client.patch('/api/user/profile/', {'bio': 'Doctorant'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['bio'], 'Doctorant')
+
+    def test_owner_keeps_its_key_on_save(self):
+        self.owner.first_name = 'Olivier'
+        self.owner.save()
+        self.owner.profile.refresh_from_db()
+        self.assertEqual(self.owner.profile.email_key, 'shared@example.com')
+
+    def test_admin_form_refuses_an_email_in_use(self):
+        def form(email):
+            return UniqueEmailUserChangeForm(instance=self.staff, data={
+                'username': self.staff.username, 'email': email,
+                'date_joined': self.staff.date_joined.strftime('%Y-%m-%d %H:%M:%S'), 'is_active': True,
+            })
+
+        taken = form('SHARED@example.com')
+        self.assertFalse(taken.is_valid())
+        self.assertIn('email', taken.errors)
+        self.assertTrue(form('staff.new@example.com').is_valid())
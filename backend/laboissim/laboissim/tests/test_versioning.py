@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from ..versioning import _bump, get_version
+from .utils import isolated_cache, reset_caches
+
+@isolated_cache
+class VersionBumpTests(SimpleTestCase):
+    def setUp(self):
+        reset_caches()
+
+    def test_every_bump_sets_a_new_version(self):
+        seen = {get_version('events')[0]}
+        for _ in range(20):
+            _bump('events')
+            seen.add(get_version('events')[0])
+        self.assertEqual(len(seen), 21)
+
+    def test_concurrent_bumps_never_store_the_same_version(self):
+        before = get_version('events')[0]
+
+        def bump(_):
+            _bump('events')
+            return get_version('events')[0]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            versions = list(pool.map(bump, range(200)))
+        self.assertNotIn(before, versions)
+        self.assertNotEqual(get_version('events')[0], before)
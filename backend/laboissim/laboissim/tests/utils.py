@@ -0,0 +1,17 @@
+"""Shared helpers of the laboissim tests.
+
+Run them on the SQLite stand-in database:
+    LABOISSIM_SQLITE_REPLICA=1 python manage.py test laboissim
+"""
+from django.core.cache import cache
+from django.test import override_settings
+
+from ..auth_backend import CachedJWTAuthentication
+
+# Version counters and cached payloads live in the cache: keep them out of the
+# file cache of the development server, and from one test to the next
+isolated_cache = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+
+def reset_caches():
+    cache.clear()
+    CachedJWTAuthentication._users.clear()
@@ -23,11 +23,16 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from .email_token_view import EmailTokenObtainPairView, GoogleLoginJWTView
-from .views import CurrentUserView, SiteContentView, UserProfileView, TeamMembersView, UsersView , update_user_role, ban_user, unban_user, delete_user, ProjectViewSet, ProjectDocumentViewSet
+from .views import CurrentUserView, SiteContentView, PublicSiteContentView, UserProfileView, TeamMembersView, UsersView , update_user_role, ban_user, unban_user, delete_user, bulk_user_action, user_deletion_status, ProjectViewSet, ProjectDocumentViewSet
 from .file_views import FileViewSet
 from .publication_views import PublicationViewSet, ExternalMemberViewSet
-from .message_views import ContactMessageViewSet, AccountRequestViewSet, InternalMessageViewSet
+from .message_views import ContactMessageViewSet, AccountRequestViewSet, InternalMessageViewSet, NotificationCountersView
 from .event_views import EventViewSet, EventRegistrationViewSet
+from .ical_views import public_events_feed, user_events_feed, CalendarFeedView
+from .directory_views import TeamDirectoryView, AdminUsersView
+from .change_views import ChangeFeedView
+from .batch_views import BatchView
+from .async_views import AsyncEventList, AsyncPublicationList, AsyncSiteContent, AsyncTeamMembers, async_reads
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -39,9 +44,12 @@ urlpatterns = [
     path('api/admin/ban-user/<int:user_id>/', ban_user, name='ban_user'),
     path('api/admin/unban-user/<int:user_id>/', unban_user, name='unban_user'),
     path('api/admin/delete-user/<int:user_id>/', delete_user, name='delete_user'),
+    path('api/admin/bulk-user-action/', bulk_user_action, name='bulk_user_action'),
+    path('api/admin/user-deletions/<int:deletion_id>/', user_deletion_status, name='user_deletion_status'),
 
     # Explicit URL patterns for account requests
     path('api/messages/account-requests/', AccountRequestViewSet.as_view({'get': 'list', 'post': 'create'}), name='account-request-list'),
+    path('api/messages/account-requests/bulk_review/', AccountRequestViewSet.as_view({'post': 'bulk_review'}), name='account-request-bulk-review'),
     path('api/messages/account-requests/<int:pk>/', AccountRequestViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='account-request-detail'),
     
     # Explicit URL patterns for contact messages
@@ -55,13 +63,14 @@ urlpatterns = [
     path('api/messages/internal/conversation/', InternalMessageViewSet.as_view({'get': 'conversation'}), name='internal-message-conversation'),
     path('api/messages/internal/<int:pk>/mark_as_read/', InternalMessageViewSet.as_view({'post': 'mark_as_read'}), name='internal-message-mark-read'),
     path('api/messages/internal/unread_count/', InternalMessageViewSet.as_view({'get': 'unread_count'}), name='internal-message-unread-count'),
+    path('api/notifications/counters/', NotificationCountersView.as_view(), name='notification-counters'),
     
     # Explicit URL patterns for files
     path('api/files/', FileViewSet.as_view({'get': 'list', 'post': 'create'}), name='file-list'),
     path('api/files/<int:pk>/', FileViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='file-detail'),
     
     # Explicit URL patterns for publications
-    path('api/publications/', PublicationViewSet.as_view({'get': 'list', 'post': 'create'}), name='publication-list'),
+    path('api/publications/', async_reads(AsyncPublicationList, PublicationViewSet.as_view({'get': 'list', 'post': 'create'})), name='publication-list'),
     path('api/publications/<int:pk>/', PublicationViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='publication-detail'),
     path('api/publications/search_members/', PublicationViewSet.as_view({'get': 'search_members'}), name='search_members_explicit'),
     path('api/publications/search_externals/', PublicationViewSet.as_view({'get': 'search_externals'}), name='search_externals_explicit'),
@@ -71,12 +80,18 @@ urlpatterns = [
     path('api/external-members/<int:pk>/', ExternalMemberViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='external-member-detail'),
     
     # Explicit URL patterns for events (backup)
-    path('api/events/', EventViewSet.as_view({'get': 'list', 'post': 'create'}), name='event-list'),
+    path('api/events/', async_reads(AsyncEventList, EventViewSet.as_view({'get': 'list', 'post': 'create'})), name='event-list'),
     path('api/events/<int:pk>/', EventViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='event-detail'),
     path('api/events/<int:pk>/register/', EventViewSet.as_view({'post': 'register'}), name='event-register'),
     path('api/events/<int:pk>/unregister/', EventViewSet.as_view({'post': 'unregister'}), name='event-unregister'),
     path('api/events/<int:pk>/registrations/', EventViewSet.as_view({'get': 'registrations'}), name='event-registrations'),
+    path('api/events/calendar.ics', public_events_feed, name='events-ical'),
+    path('api/events/calendar/<str:token>.ics', user_events_feed, name='events-ical-user'),
+    path('api/events/calendar-feed/', CalendarFeedView.as_view(), name='events-calendar-feed'),
     path('api/events/<int:pk>/update_registration_status/', EventViewSet.as_view({'patch': 'update_registration_status'}), name='event-update-registration-status'),
+    path('api/events/<int:pk>/bulk_registration_status/', EventViewSet.as_view({'post': 'bulk_registration_status'}), name='event-bulk-registration-status'),
+    path('api/events/<int:pk>/override_occurrence/', EventViewSet.as_view({'post': 'override_occurrence'}), name='event-override-occurrence'),
+    path('api/events/<int:pk>/export_registrations/', EventViewSet.as_view({'get': 'export_registrations'}), name='event-export-registrations'),
     
     # Explicit URL patterns for event registrations
     path('api/event-registrations/', EventRegistrationViewSet.as_view({'get': 'list', 'post': 'create'}), name='event-registration-list'),
@@ -86,9 +101,14 @@ urlpatterns = [
     path('auth/google/jwt/', GoogleLoginJWTView.as_view(), name='google_login_jwt'),
     path('api/user/', CurrentUserView.as_view(), name='current-user'),
     path('api/user/profile/', UserProfileView.as_view(), name='user-profile'),
-    path('api/site-content/', SiteContentView.as_view(), name='site-content'),
-    path('api/team-members/', TeamMembersView.as_view(), name='team-members'),
+    path('api/site-content/', async_reads(AsyncSiteContent, SiteContentView.as_view()), name='site-content'),
+    path('api/site-content/public/', PublicSiteContentView.as_view(), name='site-content-public'),
+    path('api/team-members/', async_reads(AsyncTeamMembers, TeamMembersView.as_view()), name='team-members'),
+    path('api/team-members/directory/', TeamDirectoryView.as_view(), name='team-directory'),
+    path('api/changes/<str:collection>/', ChangeFeedView.as_view(), name='change-feed'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/users/', UsersView.as_view(), name='users'),
+    path('api/admin/users/', AdminUsersView.as_view(), name='admin-users'),
     
     # Project URLs
     path('api/projects/', ProjectViewSet.as_view({'get': 'list', 'post': 'create'}), name='project-list'),
@@ -0,0 +1,154 @@
+"""Batched deletion of user accounts.
+
+Deleting a long-standing member cascades through messages, files, publications,
+projects and events. Instead of one long transaction in the request, the user is
+deactivated at once and a UserDeletion job removes what they own in small
+batches (see the process_user_deletions command). Every batch is its own
+transaction, so locks are short and an interrupted job resumes where it stopped.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Event, EventOccurrence, EventRegistration, InternalMessage, Project,
+    ProjectDocument, Publication, UserDeletion, UserFile, UserProfile,
+)
+from .versioning import bump_model_version, bump_user_version, bump_version
+
+UNFINISHED_STATUSES = ('pending', 'running', 'failed')
+
+def schedule_user_deletion(users, requested_by=None):
+    """Deactivate users and queue their deletion, returning one job per user.
+
+    Users already queued keep their job; failed jobs are queued again.
+    """
+    users = list(users)
+    user_ids = [user.pk for user in users]
+    with transaction.atomic():
+        User.objects.filter(pk__in=user_ids).update(is_active=False)
+        existing = {
+            job.target_user_id: job
+            for job in UserDeletion.objects.filter(target_user_id__in=user_ids, status__in=UNFINISHED_STATUSES)
+        }
+        UserDeletion.objects.filter(pk__in=[job.pk for job in existing.values()], status='failed').update(
+            status='pending', error='', updated_at=timezone.now()
+        )
+        created = UserDeletion.objects.bulk_create([
+            UserDeletion(target_user_id=user.pk, username=user.username, requested_by=requested_by)
+            for user in users if user.pk not in existing
+        ])
+        # update() bypasses the signals that invalidate the team directory and user caches
+        bump_version('team')
+        for user_id in user_ids:
+            bump_user_version(user_id)
+        bump_model_version(User)
+    jobs = {job.target_user_id: job for job in created}
+    jobs.update(existing)
+    for job in existing.values():
+        if job.status == 'failed':
+            job.status, job.error = 'pending', ''
+    return [jobs[user_id] for user_id in user_ids]
+
+def deletion_scheduled(user_ids):
+    """Ids among user_ids whose deletion is queued or under way: they must stay inactive"""
+    return set(
+        UserDeletion.objects.filter(target_user_id__in=user_ids, status__in=UNFINISHED_STATUSES)
+        .values_list('target_user_id', flat=True)
+    )
+
+def _remove_files(files):
+    for storage, name in files:
+        try:
+            storage.delete(name)
+        except OSError:
+            pass
+
+def _delete_rows(queryset, batch_size, file_fields=()):
+    """Delete up to batch_size rows of queryset, removing their files once committed"""
+    model = queryset.model
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    batch = model.objects.filter(pk__in=ids)
+    files = []
+    if file_fields:
+        storages = [model._meta.get_field(field).storage for field in file_fields]
+        for names in batch.values_list(*file_fields):
+            files.extend((storage, name) for storage, name in zip(storages, names) if name)
+    batch.delete()
+    transaction.on_commit(lambda: _remove_files(files))
+    return len(ids)
+
+def _delete_own_registrations(user_id, batch_size):
+    """The user's registrations to other events, promoting the waitlists they free up"""
+    registrations = EventRegistration.objects.filter(user_id=user_id).exclude(event__created_by_id=user_id)
+    event_ids = set(registrations.order_by('pk').values_list('event_id', flat=True)[:batch_size])
+    if not event_ids:
+        return 0
+    # Event rows first, as reserve_seat and release_seat lock them, and in id order so
+    # concurrent jobs cannot deadlock; freed seats go to the waitlist before any new
+    # registration can see them
+    events = {event.pk: event for event in Event.objects.select_for_update().filter(pk__in=event_ids).order_by('pk')}
+    registrations = registrations.filter(event_id__in=events)
+    holders = set(registrations.order_by('pk').values_list('event_id', 'occurrence_id')[:batch_size])
+    deleted = _delete_rows(registrations, batch_size)
+    for event_id, occurrence_id in holders:
+        holder = EventOccurrence.objects.get(pk=occurrence_id) if occurrence_id else events[event_id]
+        holder.promote_waitlist()
+    return deleted
+
+# Children before parents, so no single DELETE cascades over an unbounded number of rows
+DELETION_STEPS = [
+    ('event_registrations', _delete_own_registrations),
+    ('event_attendees', lambda user_id, size: _delete_rows(
+        EventRegistration.objects.filter(event__created_by_id=user_id), size)),
+    ('event_occurrences', lambda user_id, size: _delete_rows(
+        EventOccurrence.objects.filter(event__created_by_id=user_id), size)),
+    ('events', lambda user_id, size: _delete_rows(
+        Event.objects.filter(created_by_id=user_id), size)),
+    ('messages', lambda user_id, size: _delete_rows(
+        InternalMessage.objects.filter(Q(sender_id=user_id) | Q(receiver_id=user_id)), size)),
+    ('project_documents', lambda user_id, size: _delete_rows(
+        ProjectDocument.objects.filter(Q(uploaded_by_id=user_id) | Q(project__created_by_id=user_id)), size, ['file'])),
+    ('projects', lambda user_id, size: _delete_rows(
+        Project.objects.filter(created_by_id=user_id), size, ['image'])),
+    ('publications', lambda user_id, size: _delete_rows(
+        Publication.objects.filter(posted_by_id=user_id), size)),
+    ('files', lambda user_id, size: _delete_rows(
+        UserFile.objects.filter(uploaded_by_id=user_id), size, ['file'])),
+    ('profile', lambda user_id, size: _delete_rows(
+        UserProfile.objects.filter(user_id=user_id), size, ['profile_image'])),
+    ('account', lambda user_id, size: _delete_rows(
+        User.objects.filter(pk=user_id), size)),
+]
+
+def process_batch(job_id, batch_size):
+    """Run one batch of a deletion job.
+
+    Returns False once the job is finished, or when another worker holds it.
+    """
+    with transaction.atomic():
+        job = (
+            UserDeletion.objects.select_for_update(skip_locked=True)
+            .filter(pk=job_id, status__in=('pending', 'running'))
+            .first()
+        )
+        if job is None:
+            return False
+
+        for name, step in DELETION_STEPS:
+            deleted = step(job.target_user_id, batch_size)
+            if deleted:
+                job.status = 'running'
+                job.step = name
+                job.progress[name] = job.progress.get(name, 0) + deleted
+                job.save(update_fields=['status', 'step', 'progress', 'updated_at'])
+                return True
+
+        job.status = 'done'
+        job.step = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'step', 'finished_at', 'updated_at'])
+        return False
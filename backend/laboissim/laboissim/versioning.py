@@ -0,0 +1,82 @@
+"""Cheap per-collection version counters kept in the shared cache.
+
+Writers bump a collection's version after commit; readers use the version
+as a cache key component and for ETag/Last-Modified headers. A bump sets a
+new unique token rather than incrementing: cache.incr() is a read-modify-write
+on the file cache, so two concurrent writers could both store the same value.
+"""
+import secrets
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+def _keys(name):
+    return f'version:{name}', f'version:{name}:modified'
+
+def _new_version():
+    """A version token never handed out before, in any process"""
+    return f'{time.time_ns():x}-{secrets.token_hex(4)}'
+
+def get_version(name):
+    """Return (version, last_modified) for a collection"""
+    version_key, modified_key = _keys(name)
+    values = cache.get_many([version_key, modified_key])
+    if version_key not in values or modified_key not in values:
+        # A fresh token, so a lost version is never reused
+        now = time.time()
+        cache.add(version_key, _new_version(), None)
+        cache.add(modified_key, now, None)
+        values = cache.get_many([version_key, modified_key])
+    return values[version_key], datetime.fromtimestamp(values[modified_key], tz=dt_timezone.utc)
+
+def _from_values(names, values):
+    return [
+        (values[version_key], datetime.fromtimestamp(values[modified_key], tz=dt_timezone.utc))
+        for version_key, modified_key in map(_keys, names)
+    ]
+
+def get_versions(names):
+    """Return [(version, last_modified)] for several collections, reading the cache once"""
+    keys = [key for name in names for key in _keys(name)]
+    values = cache.get_many(keys)
+    if len(values) < len(keys):
+        return [get_version(name) for name in names]
+    return _from_values(names, values)
+
+async def aget_versions(names):
+    """get_versions() for async views"""
+    keys = [key for name in names for key in _keys(name)]
+    values = await cache.aget_many(keys)
+    if len(values) < len(keys):
+        # Seeding is rare, the sync path handles it
+        return await sync_to_async(get_versions)(names)
+    return _from_values(names, values)
+
+def _bump(name):
+    version_key, modified_key = _keys(name)
+    cache.set_many({version_key: _new_version(), modified_key: time.time()}, None)
+
+def bump_version(name):
+    """Invalidate a collection once the current transaction commits"""
+    transaction.on_commit(lambda: _bump(name))
+
+def get_user_version(user_id):
+    """Version of one user's account data (status, role, profile)"""
+    return get_version(f'user:{user_id}')[0]
+
+async def aget_user_version(user_id):
+    return (await aget_versions([f'user:{user_id}']))[0][0]
+
+def bump_user_version(user_id):
+    bump_version(f'user:{user_id}')
+
+def model_version_name(model):
+    """Collection name of a model's own version, bumped by the signals in models.py"""
+    return f'model:{model._meta.label_lower}'
+
+def bump_model_version(model):
+    """For queryset update() and bulk_create(), which send no signals"""
+    bump_version(model_version_name(model))
@@ -3,11 +3,24 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework import serializers, status , viewsets
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import api_view, permission_classes, action
 from django.db import transaction
-from .models import SiteContent, UserProfile, Project, ProjectDocument
+from .models import SiteContent, UserProfile, Project, ProjectDocument, UserDeletion
+from .user_deletion import deletion_scheduled, schedule_user_deletion
+from .versioning import aget_versions, bump_model_version, bump_user_version, bump_version, get_version
+from .fieldsets import SparseFieldsetMixin, SparseQuerysetMixin
+from .renderers import FastJSONParser
+from .conditional import ConditionalGetMixin
+from .db_router import ReplicaReadMixin
+from .read_serializers import Computed, ReadPlan
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from rest_framework.exceptions import PermissionDenied
 
 # Serializer for the User model
@@ -34,20 +47,78 @@ class ExtendedUserSerializer(serializers.ModelSerializer):
     def get_full_name(self, obj):
         return obj.profile.full_name if hasattr(obj, 'profile') else f"{obj.first_name} {obj.last_name}".strip() or obj.username
 
+# Same output as ExtendedUserSerializer, for user lists
+EXTENDED_USER_READ_PLAN = ReadPlan(
+    ExtendedUserSerializer,
+    full_name=Computed(
+        ['first_name', 'last_name', 'username'],
+        lambda first_name, last_name, username: f"{first_name} {last_name}".strip() or username
+    ),
+)
+
 # Serializer for the SiteContent
 class SiteContentSerializer(serializers.ModelSerializer):
     class Meta:
         model = SiteContent
         fields = '__all__'
 
+SITE_CONTENT_CACHE_TIMEOUT = 60 * 60 * 24
+SITE_CONTENT_MAX_AGE = 300
+# Serialized content held by this process, with the version it was read at
+_site_content = {'version': None, 'data': None}
+
+def get_site_content():
+    """Return (data, version, last_modified) for the SiteContent singleton.
+    
+    Served from process memory while the shared 'site_content' version is
+    unchanged, then from the shared cache, and only then from the database.
+    """
+    global _site_content
+    version, last_modified = get_version('site_content')
+    local = _site_content
+    if local['version'] != version:
+        cache_key = f'site_content:{version}'
+        data = cache.get(cache_key)
+        if data is None:
+            content, _ = SiteContent.objects.get_or_create(id=1)
+            data = dict(SiteContentSerializer(content).data)
+            cache.set(cache_key, data, SITE_CONTENT_CACHE_TIMEOUT)
+        # Rebind rather than mutate, so concurrent readers never see a mixed entry
+        local = _site_content = {'version': version, 'data': data}
+    return local['data'], version, last_modified
+
+async def aget_site_content():
+    """get_site_content() for async views"""
+    global _site_content
+    (version, last_modified), = await aget_versions(['site_content'])
+    local = _site_content
+    if local['version'] != version:
+        cache_key = f'site_content:{version}'
+        data = await cache.aget(cache_key)
+        if data is None:
+            content, _ = await SiteContent.objects.aget_or_create(id=1)
+            data = dict(SiteContentSerializer(content).data)
+            await cache.aset(cache_key, data, SITE_CONTENT_CACHE_TIMEOUT)
+        local = _site_content = {'version': version, 'data': data}
+    return local['data'], version, last_modified
+
+def _site_content_etag(request, *args, **kwargs):
+    return f"site-content-{get_version('site_content')[0]}"
+
+def _site_content_last_modified(request, *args, **kwargs):
+    return get_version('site_content')[1]
+
 # API view to return and update the singleton SiteContent
 class SiteContentView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=_site_content_etag, last_modified_func=_site_content_last_modified))
     def get(self, request):
-        content, _ = SiteContent.objects.get_or_create(id=1)
-        serializer = SiteContentSerializer(content)
-        return Response(serializer.data)
+        data, _, _ = get_site_content()
+        response = Response(data)
+        # Editors must see their changes at once, so always revalidate (cheap with the ETag)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     def put(self, request):
         if not request.user.is_staff:
@@ -55,10 +126,23 @@ class SiteContentView(APIView):
         content, _ = SiteContent.objects.get_or_create(id=1)
         serializer = SiteContentSerializer(content, data=request.data, partial=True)
         if serializer.is_valid():
+            # The post_save signal bumps the 'site_content' version for every worker
             serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class PublicSiteContentView(APIView):
+    """Read-only site content for anonymous page loads, cacheable by browsers and proxies"""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @method_decorator(condition(etag_func=_site_content_etag, last_modified_func=_site_content_last_modified))
+    def get(self, request):
+        data, _, _ = get_site_content()
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=SITE_CONTENT_MAX_AGE)
+        return response
+
 # API view to return the current user's data
 class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
@@ -68,46 +152,41 @@ class CurrentUserView(APIView):
         return Response(serializer.data)
 
 # API view to get all team members
-class TeamMembersView(APIView):
+class TeamMembersView(ReplicaReadMixin, ConditionalGetMixin, APIView):
     permission_classes = [AllowAny]
+    version_names = ('team',)
 
     def get(self, request):
         """Get all team members with their profiles"""
-        users = User.objects.filter(is_active=True).prefetch_related('profile')
-        serializer = ExtendedUserSerializer(users, many=True)
-        return Response(serializer.data)
+        users = User.objects.filter(is_active=True)
+        return Response(EXTENDED_USER_READ_PLAN.serialize(users))
 
 # API view to get all users (for admin purposes)
 class UsersView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """Get all users for admin purposes"""
-        users = User.objects.select_related('profile').all()
-        users_data = []
-        
-        for user in users:
-            user_data = {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_staff': user.is_staff,
-                'is_superuser': user.is_superuser,
-                'is_active': user.is_active,
-                'date_joined': user.date_joined,
-                'role': user.profile.role if hasattr(user, 'profile') and user.profile else 'member',
-                'verified': False,  # Default to False since UserProfile doesn't have verified field
-            }
-            users_data.append(user_data)
+        """Get all users (see AdminUsersView for the paginated directory).
         
+        Email addresses are only listed for staff.
+        """
+        fields = ['id', 'username', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'is_active', 'date_joined']
+        if request.user.is_staff:
+            fields.insert(2, 'email')
+        users_data = list(
+            User.objects.values(
+                *fields,
+                role=Coalesce(F('profile__role'), Value('member')),
+                # Default to False since UserProfile doesn't have verified field
+                verified=Value(False),
+            )
+        )
         return Response(users_data)
 
 # API view to update user profile
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
 
     def get(self, request):
         """Get current user's profile"""
@@ -254,8 +333,17 @@ def unban_user(request, user_id):
         )
 
     try:
-        target_user.is_active = True
-        target_user.save()
+        with transaction.atomic():
+            # Row lock shared with schedule_user_deletion(): a deletion is either seen here or
+            # scheduled after this commit, deactivating the account again
+            target_user = User.objects.select_for_update().get(pk=target_user.pk)
+            if deletion_scheduled([target_user.pk]):
+                return Response(
+                    {"error": "La suppression de ce compte est programmée, il ne peut pas être réactivé."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            target_user.is_active = True
+            target_user.save()
         
         serializer = ExtendedUserSerializer(target_user)
         return Response({
@@ -275,7 +363,7 @@ def unban_user(request, user_id):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def delete_user(request, user_id):
-    """Delete a user permanently"""
+    """Deactivate a user and queue the permanent deletion of their account"""
     try:
         user_id_int = int(user_id)
         target_user = User.objects.get(id=user_id_int)
@@ -293,12 +381,13 @@ def delete_user(request, user_id):
         )
 
     try:
-        username = target_user.username
-        target_user.delete()
+        # The account is deactivated now and its data deleted in batches by process_user_deletions
+        deletion, = schedule_user_deletion([target_user], request.user)
         
         return Response({
-            "message": f"Utilisateur {username} a été supprimé avec succès."
-        }, status=status.HTTP_200_OK)
+            "message": f"La suppression de l'utilisateur {target_user.username} a été programmée.",
+            "deletion": UserDeletionSerializer(deletion).data
+        }, status=status.HTTP_202_ACCEPTED)
 
     except Exception as e:
         import logging
@@ -309,15 +398,133 @@ def delete_user(request, user_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+class UserDeletionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserDeletion
+        fields = ['id', 'target_user_id', 'username', 'status', 'step', 'progress', 'error', 'created_at', 'updated_at', 'finished_at']
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def user_deletion_status(request, deletion_id):
+    """Progress of a background user deletion"""
+    try:
+        deletion = UserDeletion.objects.get(id=deletion_id)
+    except UserDeletion.DoesNotExist:
+        return Response({"error": "Suppression non trouvée."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(UserDeletionSerializer(deletion).data)
+
+BULK_USER_OPERATIONS = ['set_role', 'ban', 'unban', 'delete']
+BULK_USER_MAX_IDS = 1000
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def bulk_user_action(request):
+    """Apply one operation (set_role, ban, unban, delete) to many users in a single transaction.
+
+    Body: {"operation": ..., "user_ids": [...], "role": ... (set_role only)}.
+    Returns a per-id outcome so the caller can report partial failures.
+    """
+    operation = request.data.get('operation')
+    if operation not in BULK_USER_OPERATIONS:
+        return Response({"error": "Opération invalide."}, status=status.HTTP_400_BAD_REQUEST)
+
+    role = request.data.get('role')
+    if operation == 'set_role' and role not in dict(UserProfile.ROLE_CHOICES):
+        return Response({"error": "Rôle spécifié invalide."}, status=status.HTTP_400_BAD_REQUEST)
+
+    raw_ids = request.data.get('user_ids')
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return Response({"error": "user_ids doit être une liste non vide."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(raw_ids) > BULK_USER_MAX_IDS:
+        return Response(
+            {"error": f"Au plus {BULK_USER_MAX_IDS} utilisateurs par requête."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    results = {}
+    user_ids = []
+    for raw_id in raw_ids:
+        try:
+            user_ids.append(int(raw_id))
+        except (TypeError, ValueError):
+            results[str(raw_id)] = {"status": "error", "error": "Identifiant invalide."}
+    user_ids = list(dict.fromkeys(user_ids))
+
+    with transaction.atomic():
+        scheduled = set()
+        if operation == 'unban':
+            # As in unban_user: lock the accounts, then skip those being deleted
+            list(User.objects.select_for_update().filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+            scheduled = deletion_scheduled(user_ids)
+        users = User.objects.select_related('profile').in_bulk(user_ids)
+        changed_users, changed_profiles, new_profiles, deleted_ids = [], [], [], []
+
+        for user_id in user_ids:
+            target_user = users.get(user_id)
+            if target_user is None:
+                results[user_id] = {"status": "error", "error": "Utilisateur non trouvé."}
+                continue
+            # An admin can neither lock themselves out nor drop their own rights
+            if target_user.id == request.user.id and operation != 'unban':
+                results[user_id] = {"status": "error", "error": "Vous ne pouvez pas modifier votre propre compte."}
+                continue
+
+            if operation == 'ban':
+                target_user.is_active = False
+                changed_users.append(target_user)
+            elif operation == 'unban':
+                if user_id in scheduled:
+                    results[user_id] = {"status": "error", "error": "La suppression de ce compte est programmée."}
+                    continue
+                target_user.is_active = True
+                changed_users.append(target_user)
+            elif operation == 'set_role':
+                target_user.is_staff = role == 'admin'
+                target_user.is_superuser = False
+                changed_users.append(target_user)
+                profile = getattr(target_user, 'profile', None)
+                if profile is None:
+                    new_profiles.append(UserProfile(user=target_user, role=role))
+                else:
+                    profile.role = role
+                    changed_profiles.append(profile)
+            else:
+                deleted_ids.append(user_id)
+            results[user_id] = {"status": "ok"}
+
+        if changed_users:
+            fields = ['is_staff', 'is_superuser'] if operation == 'set_role' else ['is_active']
+            User.objects.bulk_update(changed_users, fields, batch_size=500)
+        if changed_profiles:
+            UserProfile.objects.bulk_update(changed_profiles, ['role'], batch_size=500)
+        if new_profiles:
+            UserProfile.objects.bulk_create(new_profiles)
+        if deleted_ids:
+            for deletion in schedule_user_deletion([users[user_id] for user_id in deleted_ids], request.user):
+                results[deletion.target_user_id]["deletion_id"] = deletion.pk
+        # bulk_update bypasses the post_save signals that invalidate the team directory
+        # and the authenticated user caches
+        bump_version('team')
+        for user in changed_users:
+            bump_user_version(user.pk)
+        for model in (User, UserProfile):
+            bump_model_version(model)
+
+    succeeded = sum(1 for result in results.values() if result["status"] == "ok")
+    return Response({
+        "message": f"{succeeded} utilisateur(s) traité(s) sur {len(raw_ids)}.",
+        "results": [{"id": user_id, **result} for user_id, result in results.items()],
+    }, status=status.HTTP_200_OK)
+
 # Project Serializers
-class ProjectDocumentSerializer(serializers.ModelSerializer):
+class ProjectDocumentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by_name = serializers.CharField(source='uploaded_by.get_full_name', read_only=True)
     
     class Meta:
         model = ProjectDocument
         fields = ['id', 'name', 'file', 'uploaded_by', 'uploaded_by_name', 'uploaded_at', 'file_type', 'size']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     team_members_names = serializers.SerializerMethodField()
     documents = ProjectDocumentSerializer(many=True, read_only=True)
@@ -340,11 +547,12 @@ class ProjectSerializer(serializers.ModelSerializer):
         return obj.documents.count()
 
 # Project Viewsets
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
+    version_names = (Project, ProjectDocument, 'team')
     
     def get_queryset(self):
         user = self.request.user
@@ -386,11 +594,12 @@ class ProjectViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
-class ProjectDocumentViewSet(viewsets.ModelViewSet):
+class ProjectDocumentViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ProjectDocument.objects.all()
     serializer_class = ProjectDocumentSerializer
     permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
+    version_names = (ProjectDocument, 'team')
     
     def get_queryset(self):
         project_id = self.request.query_params.get('project_id')
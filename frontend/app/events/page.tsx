@@ -263,14 +263,13 @@ export default function EventsPage() {
                     ) : (
                       <Button 
                         className="btn-modern text-white flex-1"
-                        disabled={event.is_full}
                         onClick={(e) => {
                           e.stopPropagation()
                           handleRegisterClick(event)
                         }}
                       >
                         <UserCheck className="h-4 w-4 mr-2" />
-                        {event.is_full ? 'Complet' : 'S\'inscrire'}
+                        {event.is_full ? 'Liste d\'attente' : 'S\'inscrire'}
                       </Button>
                     )}
                   </div>
@@ -388,14 +387,13 @@ export default function EventsPage() {
                   ) : (
                     <Button 
                       className="btn-modern text-white"
-                      disabled={selectedEvent.is_full}
                       onClick={() => {
                         setShowEventDetails(false)
                         handleRegisterClick(selectedEvent)
                       }}
                     >
                       <UserCheck className="h-4 w-4 mr-2" />
-                      {selectedEvent.is_full ? 'Complet' : 'S\'inscrire'}
+                      {selectedEvent.is_full ? 'Liste d\'attente' : 'S\'inscrire'}
                     </Button>
                   )}
                 </div>
@@ -430,7 +428,8 @@ export default function EventsPage() {
                         }
                       >
                         {registration.status === "confirmed" ? "Confirmé" :
-                         registration.status === "pending" ? "En attente" : "Annulé"}
+                         registration.status === "pending" ? "En attente" :
+                         registration.status === "waitlisted" ? "Liste d'attente" : "Annulé"}
                       </Badge>
                     </div>
                   ))
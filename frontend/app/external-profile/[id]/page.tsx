@@ -6,6 +6,7 @@ import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
 import { Button } from "@/components/ui/button"
 import { Separator } from "@/components/ui/separator"
+import { readAllPages } from "@/lib/utils"
 import { 
   ArrowLeft, 
   Mail, 
@@ -79,7 +80,7 @@ export default function ExternalProfilePage({ params }: { params: { id: string }
         headers
       })
       if (publicationsResponse.ok) {
-        const allPublications = await publicationsResponse.json()
+        const allPublications = await readAllPages(publicationsResponse, { headers })
         const memberPublications = allPublications.filter((pub: any) => 
           pub.tagged_externals?.some((ext: any) => ext.id.toString() === params.id)
         )
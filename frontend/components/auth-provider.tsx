@@ -3,6 +3,7 @@
 import { createContext, useContext, useState, useEffect, type ReactNode, useCallback } from "react"
 import { jwtDecode } from "jwt-decode";
 import { useToast,toast } from "@/hooks/use-toast";
+import { batchFetch, readAllPages } from "@/lib/utils";
 
 interface User {
   id: string
@@ -178,12 +179,18 @@ export function AuthProvider({ children }: { children: ReactNode }) {
           localStorage.setItem("user", JSON.stringify(user));
           setConnectedUsers([user]);
           
-          // Only fetch data after user is properly set
-          setTimeout(() => {
-            fetchMessages();
-            fetchAccountRequests();
-            fetchInternalMessages();
-            fetchUsers();
+          // Only fetch data after user is properly set, the four lists in one round trip
+          setTimeout(async () => {
+            const [messagesRes, requestsRes, internalRes, usersRes] = await batchFetch([
+              "/api/messages/contact/",
+              "/api/messages/account-requests/",
+              "/api/messages/internal/",
+              "/api/users/",
+            ], { "Authorization": `Bearer ${token}` }).catch(() => [])
+            fetchMessages(messagesRes);
+            fetchAccountRequests(requestsRes);
+            fetchInternalMessages(internalRes);
+            fetchUsers(usersRes);
           }, 100);
         })
         .catch((error) => {
@@ -627,11 +634,11 @@ const updateUserRole = async (
   }
 
   // Function to fetch all messages from backend
-  const fetchMessages = async () => {
+  const fetchMessages = async (prefetched?: Response) => {
     if (!user || !isTokenValid()) return
     
     try {
-      const response = await fetch("http://localhost:8000/api/messages/contact/", {
+      const response = prefetched ?? await fetch("http://localhost:8000/api/messages/contact/", {
         headers: getAuthHeaders(),
       })
 
@@ -644,7 +651,7 @@ const updateUserRole = async (
         throw new Error("Failed to fetch messages")
       }
 
-      const messages = await response.json()
+      const messages = await readAllPages(response, { headers: getAuthHeaders() })
       setMessages(messages)
     } catch (error) {
       console.error("Error fetching messages:", error)
@@ -653,12 +660,12 @@ const updateUserRole = async (
   }
 
   // Function to fetch all account requests from backend
-  const fetchAccountRequests = async () => {
+  const fetchAccountRequests = async (prefetched?: Response) => {
     if (!user || !isTokenValid()) return
     
     try {
       console.log('Fetching account requests...')
-      const response = await fetch("http://localhost:8000/api/messages/account-requests/", {
+      const response = prefetched ?? await fetch("http://localhost:8000/api/messages/account-requests/", {
         headers: getAuthHeaders(),
       })
 
@@ -671,7 +678,7 @@ const updateUserRole = async (
         throw new Error("Failed to fetch account requests")
       }
 
-      const requests = await response.json()
+      const requests = await readAllPages(response, { headers: getAuthHeaders() })
       console.log('Account requests fetched:', requests)
       setAccountRequests(requests)
     } catch (error) {
@@ -681,11 +688,11 @@ const updateUserRole = async (
   }
 
   // Function to fetch all internal messages from backend
-  const fetchInternalMessages = async () => {
+  const fetchInternalMessages = async (prefetched?: Response) => {
     if (!user || !isTokenValid()) return
     
     try {
-      const response = await fetch("http://localhost:8000/api/messages/internal/", {
+      const response = prefetched ?? await fetch("http://localhost:8000/api/messages/internal/", {
         headers: getAuthHeaders(),
       })
 
@@ -698,7 +705,7 @@ const updateUserRole = async (
         throw new Error("Failed to fetch internal messages")
       }
 
-      const messages = await response.json()
+      const messages = await readAllPages(response, { headers: getAuthHeaders() })
       setInternalMessages(messages)
     } catch (error) {
       console.error("Error fetching internal messages:", error)
@@ -707,12 +714,12 @@ const updateUserRole = async (
   }
 
   // Function to fetch all users from backend
-  const fetchUsers = async () => {
+  const fetchUsers = async (prefetched?: Response) => {
     if (!user || !isTokenValid() || isFetchingUsers) return
     
     try {
       setIsFetchingUsers(true)
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/users/`, {
+      const response = prefetched ?? await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/users/`, {
         headers: getAuthHeaders(),
       })
 
@@ -729,7 +736,7 @@ const updateUserRole = async (
       // Map backend user data to frontend User type
       const mappedUsers: User[] = usersData.map((userData: any) => ({
         id: userData.id.toString(),
-        email: userData.email,
+        email: userData.email ?? "",  // Only listed for staff
         name: userData.first_name && userData.last_name 
           ? `${userData.first_name} ${userData.last_name}`.trim()
           : userData.username,
@@ -750,11 +757,27 @@ const updateUserRole = async (
   }
 
   const getNotifications = async () => {
-    const unreadCount = await getUnreadCount();
-    return {
-      newMessages: messages.filter((m) => m.status === "new").length,
-      pendingRequests: accountRequests.filter((r) => r.status === "pending").length,
-      unreadInternalMessages: unreadCount,
+    try {
+      // Counters maintained by the backend: one cheap request for every badge
+      const response = await fetch("http://localhost:8000/api/notifications/counters/", {
+        headers: getAuthHeaders(),
+      })
+      if (!response.ok) {
+        throw new Error("Failed to fetch notification counters")
+      }
+      const counters = await response.json()
+      return {
+        newMessages: counters.new_contact_messages ?? 0,
+        pendingRequests: counters.pending_account_requests ?? 0,
+        unreadInternalMessages: counters.unread_messages,
+      }
+    } catch (error) {
+      handleApiError(error)
+      return {
+        newMessages: messages.filter((m) => m.status === "new").length,
+        pendingRequests: accountRequests.filter((r) => r.status === "pending").length,
+        unreadInternalMessages: 0,
+      }
     }
   }
 
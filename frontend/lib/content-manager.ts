@@ -187,10 +187,8 @@ export function useContentManager() {
     async function fetchContent() {
       setLoading(true)
       try {
-        const token = typeof window !== 'undefined' ? localStorage.getItem("token") : null;
-        const res = await fetch("http://localhost:8000/api/site-content/", {
-          headers: token ? { "Authorization": `Bearer ${token}` } : {},
-        })
+        // Public, cacheable endpoint: the content is the same for every visitor
+        const res = await fetch("http://localhost:8000/api/site-content/public/")
         if (res.ok) {
           const data = await res.json()
           // Map backend fields to SiteContent structure
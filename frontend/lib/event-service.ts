@@ -1,3 +1,5 @@
+import { readAllPages } from './utils'
+
 interface Event {
   id: string
   title: string
@@ -7,25 +9,34 @@ interface Event {
   start_date: string
   end_date: string
   max_participants?: number
+  // RFC 5545 RRULE value, empty for single events
+  recurrence_rule: string
+  recurrence_end?: string | null
+  // Set on the occurrences of a recurring event returned by calendar-window listings
+  occurrence_start?: string | null
   is_active: boolean
   created_by: string
   created_by_name: string
   created_at: string
   updated_at: string
   registered_count: number
+  reserved_count: number
   is_full: boolean
-  registrations: EventRegistration[]
-  user_registration?: EventRegistration | null
+  // Only embedded for staff on the detail endpoint
+  registrations?: EventRegistration[]
+  user_registration?: Pick<EventRegistration, 'id' | 'status' | 'registration_date'> | null
 }
 
 interface EventRegistration {
   id: string
   event: string
   user: string
+  occurrence?: string | null
+  occurrence_start?: string | null
   user_name: string
   user_email: string
   user_full_name: string
-  status: 'pending' | 'confirmed' | 'cancelled'
+  status: 'pending' | 'confirmed' | 'waitlisted' | 'cancelled'
   registration_date: string
   notes?: string
 }
@@ -38,6 +49,7 @@ interface CreateEventData {
   start_date: string
   end_date: string
   max_participants?: number
+  recurrence_rule?: string
 }
 
 interface UpdateEventData extends Partial<CreateEventData> {
@@ -56,12 +68,14 @@ const getAuthHeaders = () => {
 }
 
 // Get all events
-export const getEvents = async (authHeaders?: Record<string, string>): Promise<Event[]> => {
-  console.log('Fetching events from:', `${API_BASE_URL}/events/`)
+// Optional filters: start/end (ISO dates, overlapping window), event_type, is_active, upcoming (next N)
+export const getEvents = async (authHeaders?: Record<string, string>, filters?: Record<string, string>): Promise<Event[]> => {
+  const query = filters ? `?${new URLSearchParams(filters).toString()}` : ''
+  console.log('Fetching events from:', `${API_BASE_URL}/events/${query}`)
   
   const headers = authHeaders || getAuthHeaders()
   
-  const response = await fetch(`${API_BASE_URL}/events/`, {
+  const response = await fetch(`${API_BASE_URL}/events/${query}`, {
     headers,
   })
   
@@ -74,7 +88,7 @@ export const getEvents = async (authHeaders?: Record<string, string>): Promise<E
     throw new Error(errorData.error || errorData.detail || `Failed to fetch events: ${response.status}`)
   }
   
-  return response.json()
+  return readAllPages<Event>(response, { headers })
 }
 
 // Get a single event
@@ -217,7 +231,7 @@ export const getUserRegistrations = async (): Promise<EventRegistration[]> => {
     throw new Error('Failed to fetch user registrations')
   }
   
-  return response.json()
+  return readAllPages<EventRegistration>(response, { headers: getAuthHeaders() })
 }
 
 export type { Event, EventRegistration, CreateEventData, UpdateEventData }
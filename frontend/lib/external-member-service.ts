@@ -1,3 +1,5 @@
+import { readAllPages } from './utils';
+
 interface ExternalMember {
   id: string;
   name: string;
@@ -66,7 +68,7 @@ export async function getExternalMembers(): Promise<ExternalMember[]> {
     throw new Error(`Failed to get external members: ${response.status} ${errorText}`);
   }
 
-  return response.json();
+  return readAllPages<ExternalMember>(response, { headers: getAuthHeaders() });
 }
 
 export type { ExternalMember, CreateExternalMemberData };
@@ -1,3 +1,5 @@
+import { readAllPages } from './utils';
+
 interface FileResponse {
   id: string;
   name: string;
@@ -62,7 +64,7 @@ export async function getUserFiles(): Promise<FileResponse[]> {
       throw new Error(`Failed to fetch files: ${response.status} ${errorText}`);
     }
 
-    const data = await response.json();
+    const data = await readAllPages<FileResponse>(response, { headers });
     console.log('Files fetched successfully:', data);
     return data;
   } catch (error) {
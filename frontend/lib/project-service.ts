@@ -1,3 +1,5 @@
+import { readAllPages } from './utils';
+
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
 export interface Project {
@@ -70,7 +72,7 @@ export const getProjects = async (): Promise<Project[]> => {
     throw new Error('Failed to fetch projects');
   }
 
-  return response.json();
+  return readAllPages<Project>(response, { headers: getAuthHeaders() });
 };
 
 export const getProject = async (id: string): Promise<Project> => {
@@ -191,7 +193,7 @@ export const getProjectDocuments = async (projectId: string): Promise<ProjectDoc
     throw new Error('Failed to fetch project documents');
   }
 
-  return response.json();
+  return readAllPages<ProjectDocument>(response, { headers: getAuthHeaders() });
 };
 
 export const uploadProjectDocument = async (projectId: string, file: File): Promise<ProjectDocument> => {
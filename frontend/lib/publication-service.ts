@@ -1,3 +1,5 @@
+import { readAllPages } from './utils';
+
 interface PublicationResponse {
   id: string;
   title: string;
@@ -91,7 +93,7 @@ export async function getPublications(): Promise<PublicationResponse[]> {
       throw new Error(`Failed to fetch publications: ${response.status} ${errorText}`);
     }
 
-    const data = await response.json();
+    const data = await readAllPages<PublicationResponse>(response);
     console.log('Publications fetched successfully:', data);
     return data;
   } catch (error) {
@@ -36,3 +36,35 @@ export async function refreshToken() {
   }
   return null;
 }
+
+// Read a paginated list response to the end, following the Link rel="next" header
+export async function readAllPages<T = any>(response: Response, options: RequestInit = {}): Promise<T[]> {
+  const items: T[] = await response.json();
+  let next = response.headers.get('Link')?.match(/<([^>]+)>;\s*rel="next"/)?.[1];
+  while (next) {
+    const page = await fetch(next, options);
+    if (!page.ok) {
+      throw new Error(`Failed to fetch page: ${page.status}`);
+    }
+    items.push(...(await page.json()));
+    next = page.headers.get('Link')?.match(/<([^>]+)>;\s*rel="next"/)?.[1];
+  }
+  return items;
+}
+
+// Run several GET requests against the API in one round trip (POST /api/batch/).
+// Each result is returned as a Response, so callers handle it like a direct fetch.
+export async function batchFetch(paths: string[], headers: HeadersInit = {}, baseUrl = 'http://localhost:8000'): Promise<Response[]> {
+  const response = await fetch(`${baseUrl}/api/batch/`, {
+    method: 'POST',
+    headers: { ...headers, 'Content-Type': 'application/json' },
+    body: JSON.stringify({ requests: paths.map(path => ({ method: 'GET', path })) }),
+  });
+  if (!response.ok) {
+    throw new Error(`Failed to run batch: ${response.status}`);
+  }
+  const { responses } = await response.json();
+  return responses.map((item: { status: number; headers: Record<string, string>; body: any }) =>
+    new Response(item.body === null ? null : JSON.stringify(item.body), { status: item.status, headers: item.headers })
+  );
+}